@@ -0,0 +1,88 @@
+"""
+Consultas analíticas sobre um ano de transações no arquivo colunar.
+
+Gera `--days` dias de transações sintéticas, grava no arquivo (um flush por
+dia, depois compactação) e mede a latência de consultas típicas: total do
+ano, série diária, um estabelecimento em um trimestre e ranking por
+estabelecimento numa faixa de valor.
+
+Uso: python benchmarks/bench_archive.py --days 365 --rows-per-day 30000 --output results.json
+"""
+import argparse
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from common import measure, peak_rss_mb, report
+from src.api.archive import TransactionArchive
+
+START = datetime(2024, 1, 1)
+
+
+def make_day(day: int, rows: int, merchants: int, rng) -> pd.DataFrame:
+    seconds = np.sort(rng.integers(0, 86_400, rows))
+    return pd.DataFrame({
+        "timestamp": pd.Timestamp(START + timedelta(days=day)) + pd.to_timedelta(seconds, unit="s"),
+        "amount": rng.lognormal(5, 1.5, rows).round(2),
+        "merchant": np.char.add("merchant_", (rng.zipf(1.3, rows) % merchants).astype(str)),
+        "category": np.array(["retail", "services", "travel", "food", "crypto"])[rng.integers(0, 5, rows)],
+        "is_fraud": rng.random(rows) < 0.02,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--rows-per-day", type=int, default=30_000)
+    parser.add_argument("--merchants", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    end = (START + timedelta(days=args.days - 1)).date()
+    queries = {
+        "year_total": {},
+        "year_by_day": {"group_by": "day"},
+        "merchant_quarter": {"merchant": "merchant_1", "start": date(2024, 1, 1), "end": date(2024, 3, 31)},
+        "category_by_merchant_amount_band": {"category": "travel", "min_amount": 1_000, "max_amount": 10_000,
+                                             "group_by": "merchant", "limit": 20},
+        "last_week_by_amount_band": {"start": end - timedelta(days=6), "group_by": "amount_band"},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="financeai-archive-") as root:
+        archive = TransactionArchive(root, flush_rows=10 ** 9)
+        write_seconds = 0.0
+        for day in range(args.days):
+            frame = make_day(day, args.rows_per_day, args.merchants, rng)
+            started = time.perf_counter()
+            archive.append_frame(frame)
+            archive.flush()
+            write_seconds += time.perf_counter() - started
+        rows = args.days * args.rows_per_day
+        results = {
+            "rows": rows,
+            "write": {"seconds": write_seconds, "rows_per_second": rows / write_seconds},
+            "archive": archive.stats(),
+            "queries": {},
+        }
+        for name, params in queries.items():
+            timing = measure(lambda: archive.query(**params), repeat=args.repeat)
+            answer = archive.query(**params)
+            results["queries"][name] = {
+                **timing,
+                "best_ms": timing["best_seconds"] * 1000,
+                "partitions_scanned": answer["partitions_scanned"],
+                "rows_scanned": answer["rows_scanned"],
+                "groups_total": answer["groups_total"],
+            }
+        results["peak_rss_mb"] = peak_rss_mb()
+
+    report("archive", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Pontuação de boletos: predict_anomalies + predict_fraud_probability vs score().
+
+O caminho antigo reajustava o scaler em cada chamada e avaliava o Isolation
+Forest duas vezes (decision_function e predict). score() pré-processa uma vez
+e avalia cada floresta uma única vez.
+
+Uso: python benchmarks/bench_boleto_scoring.py --boletos 200000
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from common import measure, report
+from src.models.fraud_detection import FEATURES, FraudDetectionModel
+
+
+def make_boletos(n_rows: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'valor_boleto': rng.lognormal(6, 1, n_rows),
+        'tempo_cliente': rng.integers(0, 120, n_rows),
+        'frequencia_pagamentos': rng.uniform(0, 30, n_rows),
+        'valor_medio_transacoes': rng.lognormal(5, 1, n_rows),
+    })
+    labels = (data['valor_boleto'] / data['valor_medio_transacoes'] + rng.normal(0, 1, n_rows) > 4).astype(int)
+    return data, labels.to_numpy()
+
+
+def previous_scoring(model: FraudDetectionModel, data: pd.DataFrame):
+    # Comportamento anterior: três passadas de pré-processamento com reajuste do scaler
+    # e o Isolation Forest avaliado duas vezes
+    anomaly_input = StandardScaler().fit_transform(data[FEATURES])
+    scores = model.isolation_forest.decision_function(anomaly_input)
+    is_anomaly = model.isolation_forest.predict(anomaly_input) == -1
+    probability = model.random_forest.predict_proba(StandardScaler().fit_transform(data[FEATURES]))[:, 1]
+    return scores, is_anomaly, probability
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--boletos", type=int, default=200_000)
+    parser.add_argument("--train-rows", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    train, labels = make_boletos(args.train_rows, seed=1)
+    model = FraudDetectionModel()
+    model.train_anomaly_detection(train)
+    model.train_supervised(train, labels, reuse_scaler=True)
+
+    day, _ = make_boletos(args.boletos)
+    previous = measure(lambda: previous_scoring(model, day), repeat=args.repeat)
+    unified = measure(lambda: model.score(day), repeat=args.repeat)
+    results = {
+        "boletos": args.boletos,
+        "previous": {**previous, "boletos_per_second": args.boletos / previous["best_seconds"]},
+        "score": {**unified, "boletos_per_second": args.boletos / unified["best_seconds"]},
+        "speedup": previous["best_seconds"] / unified["best_seconds"],
+    }
+    report("boleto_scoring", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
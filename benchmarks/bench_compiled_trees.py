@@ -0,0 +1,64 @@
+"""
+Latência do motor de árvores compilado vs estimadores do scikit-learn.
+
+Uso: python benchmarks/bench_compiled_trees.py --batch-sizes 1 8 64 --output results.json
+"""
+import argparse
+
+import numpy as np
+
+from common import measure, report
+from src.api.compiled_trees import compile_estimator
+from src.api.ml_models import FinancialMLModels, RISK_FEATURES, TRANSACTION_FEATURES
+from bench_feature_extraction import make_frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--train-rows", type=int, default=20_000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64, 512])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    data = make_frame(args.train_rows)
+    models = FinancialMLModels()
+    models.train_fraud_detector(data)
+    models.train_risk_analyzer(data, (data['debt_ratio'] > 0.6).astype(int).to_numpy())
+
+    scaler = compile_estimator(models.scaler)
+    detector = compile_estimator(models.fraud_detector)
+    analyzer = compile_estimator(models.risk_analyzer)
+
+    sample = make_frame(max(args.batch_sizes), seed=7)
+    transactions = scaler.transform(sample[TRANSACTION_FEATURES].to_numpy(np.float64))
+    clients = sample[RISK_FEATURES].to_numpy(np.float64)
+
+    results = {}
+    for size in args.batch_sizes:
+        X_fraud, X_risk = transactions[:size], clients[:size]
+        np.testing.assert_array_equal(detector.score_samples(X_fraud),
+                                      models.fraud_detector.score_samples(X_fraud))
+        np.testing.assert_array_equal(analyzer.predict_proba(X_risk),
+                                      models.risk_analyzer.predict_proba(X_risk))
+        row = {}
+        for name, stock, compiled in [
+            ("isolation_forest", lambda: models.fraud_detector.score_samples(X_fraud),
+             lambda: detector.score_samples(X_fraud)),
+            ("random_forest", lambda: models.risk_analyzer.predict_proba(X_risk),
+             lambda: analyzer.predict_proba(X_risk)),
+        ]:
+            stock_us = measure(stock, repeat=args.repeat)["mean_seconds"] * 1e6
+            compiled_us = measure(compiled, repeat=args.repeat)["mean_seconds"] * 1e6
+            row[name] = {
+                "sklearn_us": stock_us,
+                "compiled_us": compiled_us,
+                "speedup": stock_us / compiled_us,
+            }
+        results[f"batch_{size}"] = row
+
+    report("compiled_trees", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Throughput e pico de memória da ingestão de CSV em streaming.
+
+Gera um CSV sintético de transações com --size-mb e mede, em um processo
+separado para isolar o pico de RSS, a leitura em blocos (profile_csv) e,
+com --legacy, a leitura anterior (arquivo inteiro em memória + pd.read_csv).
+
+Uso: python benchmarks/bench_csv_ingestion.py --size-mb 2048 --output results.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import peak_rss_mb, report
+
+
+def write_synthetic_csv(path: str, size_mb: int, chunk_rows: int = 200_000, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    target = size_mb * 1024 * 1024
+    header = True
+    with open(path, "w") as f:
+        while f.tell() < target:
+            chunk = pd.DataFrame({
+                "amount": rng.lognormal(5, 1, chunk_rows).round(2),
+                "merchant": rng.choice([f"merchant_{i}" for i in range(500)], chunk_rows),
+                "category": rng.choice(["retail", "services", "travel", "crypto"], chunk_rows),
+                "hour_of_day": rng.integers(0, 24, chunk_rows),
+                "day_of_week": rng.integers(0, 7, chunk_rows),
+            })
+            chunk.to_csv(f, header=header, index=False)
+            header = False
+
+
+def measure_once(path: str, mode: str, chunk_rows: int) -> dict:
+    from src.api.ingestion import profile_csv
+
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    start = time.perf_counter()
+    if mode == "streaming":
+        with open(path, "rb") as f:
+            rows = profile_csv(f, chunk_rows)["rows_processed"]
+    else:
+        import io
+        with open(path, "rb") as f:
+            content = f.read()
+        rows = len(pd.read_csv(io.BytesIO(content)))
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "rows": rows,
+        "file_mb": size_mb,
+        "seconds": elapsed,
+        "mb_per_second": size_mb / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_isolated(path: str, mode: str, chunk_rows: int) -> dict:
+    output = subprocess.check_output([
+        sys.executable, os.path.abspath(__file__), "--measure", path,
+        "--mode", mode, "--chunk-rows", str(chunk_rows),
+    ])
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--legacy", action="store_true", help="mede também a leitura em memória")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", default="streaming", help=argparse.SUPPRESS)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure_once(args.measure, args.mode, args.chunk_rows)))
+        return
+
+    fd, path = tempfile.mkstemp(suffix=".csv", prefix="financeai-bench-")
+    os.close(fd)
+    try:
+        write_synthetic_csv(path, args.size_mb)
+        results = {"streaming": run_isolated(path, "streaming", args.chunk_rows)}
+        if args.legacy:
+            results["in_memory"] = run_isolated(path, "in_memory", args.chunk_rows)
+    finally:
+        os.remove(path)
+
+    report("csv_ingestion", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Latência dos dashboards conforme o histórico de transações cresce.
+
+Os endpoints leem os agregados incrementais; o tempo deve ficar constante
+enquanto o número de transações aumenta.
+
+Uso: python benchmarks/bench_dashboard.py --steps 10000 100000 500000
+"""
+import argparse
+import os
+import tempfile
+
+from bench_transaction_ingest import make_rows
+from common import measure, report
+from src.api.main import build_dashboard, build_dashboard_data, generate_sample_data
+from src.api.storage import TransactionStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--steps", type=int, nargs="+", default=[10_000, 100_000, 300_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    tmp_path = None
+    url = args.database_url
+    if url is None:
+        fd, tmp_path = tempfile.mkstemp(suffix=".db", prefix="financeai-bench-")
+        os.close(fd)
+        url = f"sqlite:///{tmp_path}"
+
+    results = {"sample_data": measure(generate_sample_data, repeat=args.repeat), "steps": []}
+    try:
+        store = TransactionStore(url)
+        inserted = 0
+        for seed, target in enumerate(sorted(args.steps)):
+            store.add_many(make_rows(target - inserted, seed=seed))
+            inserted = target
+            results["steps"].append({
+                "transactions": inserted,
+                "dashboard": measure(lambda: build_dashboard(store), repeat=args.repeat),
+                "dashboard_data": measure(lambda: build_dashboard_data(store), repeat=args.repeat),
+            })
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+    report("dashboard", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
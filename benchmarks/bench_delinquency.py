@@ -0,0 +1,71 @@
+"""
+Vazão do modelo de inadimplência em carteiras grandes (contratos/segundo).
+
+Compara o caminho antigo (reajuste do scaler + predict_proba) com
+predict_batch (scaler ajustado uma vez + inplace_predict do booster).
+
+Uso: python benchmarks/bench_delinquency.py --contracts 1000000
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from common import measure, peak_rss_mb, report
+from src.models.delinquency_prediction import FEATURES, DelinquencyPredictionModel
+
+
+def make_contracts(n_rows: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'historico_pagamentos': rng.uniform(0, 1, n_rows),
+        'valor_contrato': rng.lognormal(10, 1, n_rows),
+        'prazo_contrato': rng.integers(6, 120, n_rows),
+        'score_credito': rng.integers(300, 900, n_rows),
+        'renda': rng.lognormal(8.5, 0.6, n_rows),
+        'tempo_emprego': rng.integers(0, 40, n_rows),
+        'quantidade_parcelas_pagas': rng.integers(0, 120, n_rows),
+        'taxa_utilizacao_credito': rng.uniform(0, 1, n_rows),
+    })
+    risk = 1.5 * data['taxa_utilizacao_credito'] - data['historico_pagamentos'] - (data['score_credito'] - 600) / 300
+    labels = (risk + rng.normal(0, 0.5, n_rows) > 0).astype(int).to_numpy()
+    return data[FEATURES], labels
+
+
+def refit_predict(model: DelinquencyPredictionModel, data: pd.DataFrame) -> np.ndarray:
+    # Comportamento anterior: o scaler era reajustado a cada previsão
+    processed = model.scaler.__class__().fit_transform(data[FEATURES])
+    return model.model.predict_proba(processed)[:, 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--contracts", type=int, default=1_000_000)
+    parser.add_argument("--train-rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    train, labels = make_contracts(args.train_rows, seed=1)
+    model = DelinquencyPredictionModel()
+    model.train(train, labels)
+
+    portfolio, _ = make_contracts(args.contracts)
+    matrix = portfolio.to_numpy(dtype=np.float64)
+    timings = {
+        "refit_predict_proba": measure(lambda: refit_predict(model, portfolio), repeat=args.repeat),
+        "predict_batch_frame": measure(lambda: model.predict_batch(portfolio), repeat=args.repeat),
+        "predict_batch_matrix": measure(lambda: model.predict_batch(matrix), repeat=args.repeat),
+    }
+    results = {"contracts": args.contracts}
+    for name, timing in timings.items():
+        results[name] = {**timing, "contracts_per_second": args.contracts / timing["best_seconds"]}
+    results["speedup"] = (
+        timings["refit_predict_proba"]["best_seconds"] / timings["predict_batch_frame"]["best_seconds"]
+    )
+    results["peak_rss_mb"] = peak_rss_mb()
+    report("delinquency", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Custo por transação do feature store online e memória por chave.
+
+Uso: python benchmarks/bench_feature_store.py --transactions 500000 --merchants 50000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from common import report
+from src.api.feature_store import FeatureStore
+
+
+def make_transactions(n_rows: int, merchants: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    start = datetime(2024, 1, 1)
+    seconds = np.sort(rng.integers(0, 7 * 24 * 3600, n_rows))
+    amounts = rng.lognormal(5, 1, n_rows).round(2)
+    merchant_ids = rng.zipf(1.3, n_rows) % merchants
+    categories = np.array(["retail", "services", "travel", "food", "crypto"])[rng.integers(0, 5, n_rows)]
+    return [
+        {"amount": float(a), "merchant": f"merchant_{m}", "category": str(c),
+         "timestamp": start + timedelta(seconds=int(s))}
+        for a, m, s, c in zip(amounts, merchant_ids, seconds, categories)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transactions", type=int, default=500_000)
+    parser.add_argument("--merchants", type=int, default=50_000)
+    parser.add_argument("--max-keys", type=int, default=100_000)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    transactions = make_transactions(args.transactions, args.merchants)
+    store = FeatureStore(max_keys=args.max_keys)
+    start = time.perf_counter()
+    for transaction in transactions:
+        store.enrich(transaction)
+    update_seconds = time.perf_counter() - start
+
+    probes = transactions[-10_000:]
+    start = time.perf_counter()
+    for transaction in probes:
+        store.enrich(transaction, update=False)
+    read_seconds = time.perf_counter() - start
+
+    results = {
+        "transactions": args.transactions,
+        "enrich_update_us": update_seconds / len(transactions) * 1e6,
+        "enrich_read_only_us": read_seconds / len(probes) * 1e6,
+        "updates_per_second": len(transactions) / update_seconds,
+        **store.stats(),
+    }
+    report("feature_store", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
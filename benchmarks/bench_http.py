@@ -0,0 +1,216 @@
+"""
+Gerador de carga HTTP contra a aplicação ASGI, sem servidor nem serviços externos.
+
+Treina modelos sintéticos num registro temporário, aponta a API para ele e para
+um SQLite temporário e dispara requisições concorrentes por rota pelo
+httpx.ASGITransport. Para cada rota reporta vazão (req/s), p50/p95/p99 e os
+status recebidos; depois mede a vazão do /upload com CSVs sintéticos de
+tamanho crescente.
+
+Os tempos incluem o cliente httpx no mesmo processo e event loop: servem para
+comparar commits entre si, não como números absolutos de produção.
+
+Uso: python benchmarks/bench_http.py --requests 2000 --concurrency 32 --upload-sizes-mb 1 8 32
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from bench_boleto_scoring import make_boletos
+from bench_csv_ingestion import write_synthetic_csv
+from bench_delinquency import make_contracts
+from bench_models import train_models
+from common import report
+
+DEFAULT_ROUTES = [
+    "health", "api_health", "dashboard", "dashboard_data", "detect_fraud",
+    "detect_fraud_batch", "analyze_risk", "analyze_risk_repeated", "delinquency_batch", "boletos_batch",
+]
+
+
+def transaction(rng: random.Random) -> dict:
+    return {
+        "amount": round(rng.lognormvariate(5, 1), 2),
+        "merchant": f"merchant_{rng.randrange(500)}",
+        "timestamp": (datetime(2024, 1, 1) + timedelta(minutes=rng.randrange(500_000))).isoformat(),
+        "category": rng.choice(["retail", "services", "travel", "crypto"]),
+    }
+
+
+def client_profile(rng: random.Random) -> dict:
+    return {
+        "income": rng.gauss(5000, 1500),
+        "debt_ratio": rng.random(),
+        "credit_history_length": rng.randrange(30),
+        "num_credit_lines": rng.randrange(10),
+        "payment_history_score": rng.uniform(0, 100),
+    }
+
+
+def build_routes(batch_size: int, seed: int = 42) -> dict:
+    """
+    Rota -> (método, path, função que gera o corpo JSON de cada requisição)
+    """
+    rng = random.Random(seed)
+    contracts = make_contracts(batch_size, seed=seed)[0].to_dict("records")
+    boletos = make_boletos(batch_size, seed=seed)[0].to_dict("records")
+    # Poucos clientes consultados várias vezes (retentativas, telas atualizadas): acertos no cache de predições
+    repeated_profiles = [client_profile(rng) for _ in range(20)]
+    return {
+        "health": ("GET", "/health", None),
+        "api_health": ("GET", "/api/health", None),
+        "dashboard": ("GET", "/dashboard", None),
+        "dashboard_data": ("GET", "/api/dashboard/data", None),
+        "detect_fraud": ("POST", "/detect/fraud", lambda: transaction(rng)),
+        "detect_fraud_batch": ("POST", "/detect/fraud/batch",
+                               lambda: {"transactions": [transaction(rng) for _ in range(batch_size)]}),
+        "analyze_risk": ("POST", "/analyze/risk", lambda: client_profile(rng)),
+        "analyze_risk_repeated": ("POST", "/analyze/risk", lambda: rng.choice(repeated_profiles)),
+        "delinquency_batch": ("POST", "/predict/delinquency/batch", lambda: {"contracts": contracts}),
+        "boletos_batch": ("POST", "/detect/fraud/boletos", lambda: {"boletos": boletos}),
+    }
+
+
+def summarize(latencies, statuses, elapsed: float) -> dict:
+    latencies_ms = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "max_ms": latencies_ms.max(),
+        "statuses": {str(status): statuses.count(status) for status in sorted(set(statuses))},
+    }
+
+
+async def load_route(client, method: str, path: str, make_body, requests: int, concurrency: int) -> dict:
+    """
+    `concurrency` clientes em laço fechado até completar `requests` requisições
+    """
+    # Corpos gerados antes da medição
+    bodies = [make_body() if make_body else None for _ in range(requests)]
+    latencies, statuses = [], []
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < requests:
+            body = bodies[next_index]
+            next_index += 1
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - start)
+            statuses.append(response.status_code)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - start)
+
+
+async def upload_throughput(client, sizes_mb, repeat: int) -> list:
+    results = []
+    for size_mb in sizes_mb:
+        fd, path = tempfile.mkstemp(suffix=".csv", prefix="financeai-bench-")
+        os.close(fd)
+        try:
+            write_synthetic_csv(path, size_mb, chunk_rows=20_000)
+            with open(path, "rb") as f:
+                content = f.read()
+        finally:
+            os.remove(path)
+        timings, rows = [], 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = await client.post("/upload", files=[("files", ("bench.csv", content, "text/csv"))])
+            timings.append(time.perf_counter() - start)
+            response.raise_for_status()
+            rows = response.json()["results"][0]["analysis"]["rows_processed"]
+        best = min(timings)
+        file_mb = len(content) / (1024 * 1024)
+        results.append({
+            "file_mb": file_mb,
+            "rows": rows,
+            "best_seconds": best,
+            "mean_seconds": sum(timings) / len(timings),
+            "mb_per_second": file_mb / best,
+            "rows_per_second": rows / best,
+        })
+    return results
+
+
+def prepare_environment(workdir: str, train_rows: int):
+    """
+    Registro de modelos e banco temporários; precisa rodar antes de importar a API
+    """
+    financial, boleto, delinquency = train_models(train_rows)
+    paths = {
+        "MODELS_PATH": os.path.join(workdir, "models"),
+        "BOLETO_FRAUD_MODEL_PATH": os.path.join(workdir, "boleto_fraud"),
+        "DELINQUENCY_MODEL_PATH": os.path.join(workdir, "delinquency"),
+    }
+    financial.save_models(paths["MODELS_PATH"])
+    boleto.save_model(paths["BOLETO_FRAUD_MODEL_PATH"])
+    delinquency.save_model(paths["DELINQUENCY_MODEL_PATH"])
+    os.environ.update(paths)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'financeai.db')}"
+
+
+async def run(args) -> dict:
+    import httpx
+
+    from bench_transaction_ingest import make_rows
+    from src.api import main
+
+    # Histórico para os dashboards lerem dos agregados
+    main.get_transaction_store().add_many(make_rows(args.transactions))
+
+    routes = build_routes(args.batch_size)
+    transport = httpx.ASGITransport(app=main.app)
+    results = {"concurrency": args.concurrency, "batch_size": args.batch_size, "routes": {}}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name in args.routes:
+            method, path, make_body = routes[name]
+            # Aquecimento: primeiras requisições de cada rota fora da medição
+            await load_route(client, method, path, make_body, min(args.requests, 50), args.concurrency)
+            results["routes"][name] = {
+                "method": method,
+                "path": path,
+                **await load_route(client, method, path, make_body, args.requests, args.concurrency),
+            }
+        if args.upload_sizes_mb:
+            results["upload"] = await upload_throughput(client, args.upload_sizes_mb, args.upload_repeat)
+    main.inference_executor.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--routes", nargs="+", choices=DEFAULT_ROUTES, default=DEFAULT_ROUTES)
+    parser.add_argument("--requests", type=int, default=2000, help="requisições por rota")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=100, help="itens por requisição nas rotas de lote")
+    parser.add_argument("--transactions", type=int, default=10_000, help="histórico para os dashboards")
+    parser.add_argument("--train-rows", type=int, default=5_000)
+    parser.add_argument("--upload-sizes-mb", type=int, nargs="*", default=[1, 8, 32])
+    parser.add_argument("--upload-repeat", type=int, default=3)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="financeai-bench-") as workdir:
+        prepare_environment(workdir, args.train_rows)
+        results = asyncio.run(run(args))
+
+    report("http", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Tempo de carga e memória por worker do registro de modelos (Linux).
+
+Para cada modo (mmap e cópia), N processos filhos carregam a versão ativa
+do registro; reportamos tempo de carga, RSS e PSS (memória proporcional,
+que divide páginas compartilhadas entre os processos) de cada worker.
+
+Uso: python benchmarks/bench_model_loading.py --workers 4 --rows 200000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from common import report
+from bench_feature_extraction import make_frame
+from src.api.ml_models import FinancialMLModels
+
+
+def memory_mb(pid: int) -> dict:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key.lower() + "_mb"] = int(rest.split()[0]) / 1024
+    return values
+
+
+def load_in_workers(path: str, workers: int, mmap_mode):
+    pipes, pids = [], []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            start = time.perf_counter()
+            FinancialMLModels().load_models(path, mmap_mode=mmap_mode)
+            os.write(write_fd, f"{time.perf_counter() - start}".encode())
+            os.close(write_fd)
+            time.sleep(3600)  # Mantém o processo vivo para medir a memória
+            os._exit(0)
+        os.close(write_fd)
+        pipes.append(read_fd)
+        pids.append(pid)
+
+    results = []
+    for pid, read_fd in zip(pids, pipes):
+        load_seconds = float(os.read(read_fd, 64).decode())
+        os.close(read_fd)
+        results.append({"load_seconds": load_seconds})
+    # Mede depois que todos carregaram, para o PSS refletir o compartilhamento
+    for pid, result in zip(pids, results):
+        result.update(memory_mb(pid))
+        os.kill(pid, 9)
+        os.waitpid(pid, 0)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    data = make_frame(args.rows)
+    models = FinancialMLModels()
+    models.train_fraud_detector(data)
+    models.train_risk_analyzer(data, (data['debt_ratio'] > 0.6).astype(int).to_numpy())
+
+    path = tempfile.mkdtemp(prefix="financeai-models-")
+    try:
+        models.save_models(path)
+        results = {"rows": args.rows, "workers": args.workers}
+        for name, mmap_mode in [("mmap", "r"), ("copy", None)]:
+            per_worker = load_in_workers(path, args.workers, mmap_mode)
+            results[name] = {
+                "per_worker": per_worker,
+                "mean_load_seconds": sum(w["load_seconds"] for w in per_worker) / len(per_worker),
+                "total_pss_mb": sum(w["pss_mb"] for w in per_worker),
+            }
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+    report("model_loading", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Micro-benchmarks dos modelos: latência de uma chamada e vazão em lote.
+
+Cobre a extração de features e as chamadas detect_fraud/analyze_risk de
+FinancialMLModels (uma linha e lotes), o score() do FraudDetectionModel e o
+predict_batch() do DelinquencyPredictionModel.
+
+Uso: python benchmarks/bench_models.py --batch-sizes 1 64 1024 65536 --output results.json
+"""
+import argparse
+
+from bench_boleto_scoring import make_boletos
+from bench_delinquency import make_contracts
+from bench_feature_extraction import make_frame
+from common import measure, report
+from src.api.ml_models import FinancialMLModels, RISK_FEATURES, TRANSACTION_FEATURES
+from src.models.delinquency_prediction import DelinquencyPredictionModel
+from src.models.fraud_detection import FraudDetectionModel
+
+
+def timed(fn, rows: int, repeat: int) -> dict:
+    timing = measure(fn, repeat=repeat)
+    return {
+        **timing,
+        "microseconds_per_call": timing["best_seconds"] * 1e6,
+        "rows_per_second": rows / timing["best_seconds"],
+    }
+
+
+def train_models(train_rows: int):
+    data = make_frame(train_rows, seed=1)
+    financial = FinancialMLModels()
+    financial.train_fraud_detector(data[TRANSACTION_FEATURES])
+    financial.train_risk_analyzer(data[RISK_FEATURES], (data['debt_ratio'] > 0.6).astype(int).to_numpy())
+
+    boletos, boleto_labels = make_boletos(train_rows, seed=1)
+    boleto = FraudDetectionModel()
+    boleto.train_anomaly_detection(boletos)
+    boleto.train_supervised(boletos, boleto_labels, reuse_scaler=True)
+
+    contracts, contract_labels = make_contracts(train_rows, seed=1)
+    delinquency = DelinquencyPredictionModel()
+    delinquency.train(contracts, contract_labels)
+    return financial, boleto, delinquency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 1024, 65_536])
+    parser.add_argument("--train-rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    financial, boleto, delinquency = train_models(args.train_rows)
+    largest = max(args.batch_sizes)
+    frame = make_frame(largest)
+    records = frame.to_dict("records")
+    boletos, _ = make_boletos(largest)
+    contracts, _ = make_contracts(largest)
+
+    record = records[0]
+    results = {
+        "single": {
+            "extract_transaction_features": timed(
+                lambda: financial._extract_single_transaction_features(record), 1, args.repeat * 50),
+            "extract_risk_features": timed(lambda: financial._extract_risk_features_single(record), 1,
+                                           args.repeat * 50),
+            "detect_fraud": timed(lambda: financial.detect_fraud(record), 1, args.repeat),
+            "analyze_risk": timed(lambda: financial.analyze_risk(record), 1, args.repeat),
+            "boleto_score": timed(lambda: boleto.score(boletos.head(1)), 1, args.repeat),
+            "delinquency_predict": timed(lambda: delinquency.predict_batch(contracts.head(1)), 1,
+                                         args.repeat),
+        },
+        "batch": [],
+    }
+    for size in sorted(args.batch_sizes):
+        batch_records = records[:size]
+        batch_frame = frame.head(size)
+        # Lotes grandes: menos repetições para manter o tempo total limitado
+        repeat = max(3, min(args.repeat, 200_000 // max(size, 1)))
+        results["batch"].append({
+            "batch_size": size,
+            "extract_transaction_features": timed(
+                lambda: financial._extract_transaction_features(batch_frame), size, repeat),
+            "extract_risk_features": timed(
+                lambda: financial._extract_risk_features(batch_frame), size, repeat),
+            "detect_fraud_batch": timed(lambda: financial.detect_fraud_batch(batch_records), size, repeat),
+            "detect_fraud_frame": timed(lambda: financial.detect_fraud_frame(batch_frame), size, repeat),
+            "analyze_risk_batch": timed(lambda: financial.analyze_risk_batch(batch_records), size, repeat),
+            "boleto_score": timed(lambda: boleto.score(boletos.head(size)), size, repeat),
+            "delinquency_predict_batch": timed(lambda: delinquency.predict_batch(contracts.head(size)), size,
+                                               repeat),
+        })
+
+    report("models", {"train_rows": args.train_rows, **results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Codificação de payloads grandes: caminho padrão do FastAPI vs FastJSONResponse.
+
+O caminho padrão reproduz o antigo /api/dashboard/data: jsonable_encoder,
+validação contra DashboardResponse e JSONResponse. Mede tempo e pico de
+alocações (tracemalloc) para históricos de `--points` elementos.
+
+Uso: python benchmarks/bench_serialization.py --points 10000
+"""
+import argparse
+import tracemalloc
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from common import measure, report
+from src.api.main import DashboardData, DashboardResponse, TransactionHistory
+from src.api.serialization import FastJSONResponse, _stdlib_dumps, orjson
+
+
+def make_payload(points: int) -> DashboardData:
+    rng = np.random.default_rng(42)
+    values = rng.lognormal(8, 0.3, points)
+    trends = np.concatenate([[0.0], np.diff(values) / values[:-1] * 100])
+    return DashboardData(
+        total_transactions=points,
+        average_transaction=values.mean(),
+        fraud_rate=np.float64(0.015),
+        delinquency_rate=np.float64(0.078),
+        transaction_history=[
+            TransactionHistory(name=f"{i % 28 + 1:02d}/{i % 12 + 1:02d}", value=v, trend=t)
+            for i, (v, t) in enumerate(zip(values, trends))
+        ],
+    )
+
+
+def default_path(data: DashboardData) -> bytes:
+    encoded = jsonable_encoder(data)
+    validated = DashboardResponse.model_validate(encoded)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def peak_allocations_mb(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    data = make_payload(args.points)
+    paths = {
+        "jsonable_encoder_validate": lambda: default_path(data),
+        "fast_json_response": lambda: FastJSONResponse(data).body,
+        "stdlib_fallback": lambda: _stdlib_dumps(data),
+    }
+    results = {"points": args.points, "orjson": orjson is not None}
+    for name, fn in paths.items():
+        results[name] = {
+            **measure(fn, repeat=args.repeat),
+            "peak_allocations_mb": peak_allocations_mb(fn),
+            "bytes": len(fn()),
+        }
+    results["speedup"] = (
+        results["jsonable_encoder_validate"]["best_seconds"] / results["fast_json_response"]["best_seconds"]
+    )
+    report("serialization", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Memória e vazão dos modos de servidor, cada um num processo real escutando TCP.
+
+- current: `python main.py` como hoje (um processo uvicorn; RELOAD=false para
+  não medir o observador de arquivos)
+- uvicorn_workers: `uvicorn --workers N`; cada worker importa a API e carrega
+  os próprios modelos (com PROMETHEUS_MULTIPROC_DIR, como o prefork)
+- prefork: SERVER_MODE=prefork com N workers; modelos carregados no pai e
+  compartilhados copy-on-write
+
+Memória somada sobre a árvore de processos (/proc/<pid>/smaps_rollup): RSS
+conta as páginas compartilhadas uma vez por processo, PSS as divide entre os
+processos que as compartilham (o custo real). Medida com o servidor ocioso e
+de novo após a carga, quando a contagem de referências já sujou páginas
+herdadas. Vazão: `--concurrency` clientes HTTP em laço fechado por rota.
+
+Linux apenas (/proc). Uso: python benchmarks/bench_server.py --workers 4 --output results.json
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_http import build_routes, load_route, prepare_environment
+from bench_stream import free_port
+from common import ROOT_DIR, report
+
+DEFAULT_ROUTES = ["detect_fraud", "analyze_risk", "detect_fraud_batch"]
+
+
+def process_tree(pid: int) -> list:
+    pids, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        pids.append(current)
+        try:
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    stack.extend(int(child) for child in f.read().split())
+        except OSError:
+            continue
+    return pids
+
+
+def tree_memory_mb(pid: int) -> dict:
+    totals = {"Rss": 0, "Pss": 0}
+    pids = process_tree(pid)
+    for current in pids:
+        try:
+            with open(f"/proc/{current}/smaps_rollup") as f:
+                for line in f:
+                    name, _, value = line.partition(":")
+                    if name in totals:
+                        totals[name] += int(value.split()[0])
+        except OSError:
+            continue
+    return {"processes": len(pids), "rss_mb": totals["Rss"] / 1024, "pss_mb": totals["Pss"] / 1024}
+
+
+def launch(mode: str, workers: int, port: int, workdir: str) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": ROOT_DIR, "MODEL_WATCH_INTERVAL_SECONDS": "0", "PORT": str(port),
+           "RELOAD": "false", "DEBUG": "false"}
+    if mode == "current":
+        command = [sys.executable, "main.py"]
+    elif mode == "uvicorn_workers":
+        env["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="metrics-", dir=workdir)
+        command = [sys.executable, "-m", "uvicorn", "src.api.main:app", "--port", str(port),
+                   "--workers", str(workers), "--log-level", "warning"]
+    else:
+        env.update(SERVER_MODE="prefork", WORKERS=str(workers))
+        command = [sys.executable, "main.py"]
+    return subprocess.Popen(command, env=env, cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(base_url: str, started: float) -> float:
+    import httpx
+
+    while time.perf_counter() - started < 180:
+        try:
+            if httpx.get(f"{base_url}/ready").status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("server did not become ready")
+
+
+async def load(base_url: str, args) -> dict:
+    import httpx
+
+    routes = build_routes(args.batch_size)
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as client:
+        for name in args.routes:
+            method, path, make_body = routes[name]
+            # Aquecimento: espalha as primeiras requisições por todos os workers
+            await load_route(client, method, path, make_body, args.concurrency * 4, args.concurrency)
+            results[name] = await load_route(client, method, path, make_body, args.requests, args.concurrency)
+    return results
+
+
+def run_mode(mode: str, args, workdir: str) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = launch(mode, args.workers, port, workdir)
+    try:
+        ready_seconds = wait_ready(base_url, started)
+        time.sleep(args.settle_seconds)  # aquecimento em segundo plano dos demais workers
+        idle = tree_memory_mb(server.pid)
+        routes = asyncio.run(load(base_url, args))
+        loaded = tree_memory_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+    return {"ready_seconds": ready_seconds, "memory_idle": idle, "memory_after_load": loaded, "routes": routes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modes", nargs="+", choices=["current", "uvicorn_workers", "prefork"],
+                        default=["current", "uvicorn_workers", "prefork"])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--routes", nargs="+", default=DEFAULT_ROUTES)
+    parser.add_argument("--requests", type=int, default=2000, help="requisições por rota")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=100, help="itens por requisição nas rotas de lote")
+    parser.add_argument("--train-rows", type=int, default=5_000)
+    parser.add_argument("--settle-seconds", type=float, default=3.0)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="financeai-bench-") as workdir:
+        prepare_environment(workdir, args.train_rows)
+        results = {"workers": args.workers, "cpus": os.cpu_count(), "modes": {}}
+        for mode in args.modes:
+            results["modes"][mode] = run_mode(mode, args, workdir)
+
+    report("server", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Tempo de inicialização da API: import de src.api.main e tempo até a primeira resposta.
+
+Cada medição roda em um processo novo (imports frios do Python, cache de
+disco quente) com modelos sintéticos salvos num registro temporário, uma vez
+com carregamento preguiçoso (MODEL_LAZY_LOADING=true) e outra com a carga
+durante o import. Os tempos contam a partir do início do import:
+
+- import_seconds: `from src.api import main`
+- first_health_seconds: primeira resposta de /health (após o startup do app)
+- first_prediction_seconds: primeira resposta de /detect/fraud
+- ready_seconds: /ready respondendo 200 (modelos carregados e aquecidos)
+
+Uso: python benchmarks/bench_startup.py --repeat 3 --output results.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT_DIR, report
+
+FRAUD_REQUEST = {"amount": 150.0, "merchant": "Loja", "timestamp": "2024-01-10T10:00:00", "category": "retail"}
+
+
+def measure_once() -> dict:
+    start = time.perf_counter()
+    from src.api import main
+    imported = time.perf_counter() - start
+    heavy_loaded = {name: name in sys.modules for name in ("sklearn", "xgboost", "scipy")}
+
+    from fastapi.testclient import TestClient
+
+    result = {"import_seconds": imported, "loaded_after_import": heavy_loaded}
+    with TestClient(main.app) as client:
+        client.get("/health").raise_for_status()
+        result["first_health_seconds"] = time.perf_counter() - start
+        client.post("/detect/fraud", json=FRAUD_REQUEST).raise_for_status()
+        result["first_prediction_seconds"] = time.perf_counter() - start
+        while True:
+            status = client.get("/ready").status_code
+            if status == 404:  # versões sem /ready
+                result["ready_seconds"] = None
+                break
+            if status == 200:
+                result["ready_seconds"] = time.perf_counter() - start
+                break
+            time.sleep(0.005)
+    return result
+
+
+def run_isolated(env: dict) -> dict:
+    output = subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), "--measure"], env=env, cwd=ROOT_DIR
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def summarize(runs: list) -> dict:
+    summary = {"runs": runs}
+    for key in ("import_seconds", "first_health_seconds", "first_prediction_seconds", "ready_seconds"):
+        values = [run[key] for run in runs if run.get(key) is not None]
+        if values:
+            summary[f"best_{key}"] = min(values)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--train-rows", type=int, default=5_000)
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure_once()))
+        return
+
+    from bench_http import prepare_environment
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="financeai-bench-") as workdir:
+        prepare_environment(workdir, args.train_rows)
+        for mode, lazy in (("lazy", "true"), ("eager", "false")):
+            env = {**os.environ, "MODEL_LAZY_LOADING": lazy, "PYTHONPATH": ROOT_DIR}
+            results[mode] = summarize([run_isolated(env) for _ in range(args.repeat)])
+
+    report("startup", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Vazão da pontuação de fraude em fluxo contínuo contra um servidor uvicorn real.
+
+Sobe a API (um worker) com modelos sintéticos e compara, numa única conexão:
+
+- single: uma requisição POST /detect/fraud por transação (keep-alive)
+- ndjson: POST /detect/fraud/stream com o corpo enviado em partes
+- websocket: /ws/detect/fraud com mensagens de `--message-size` transações,
+  envio e recebimento concorrentes
+
+Reporta transações/s de cada modo e o maior número de transações enviadas e
+ainda sem resposta observado no cliente do WebSocket.
+
+Uso: python benchmarks/bench_stream.py --transactions 100000 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_http import prepare_environment, transaction
+from common import ROOT_DIR, report
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    import httpx
+
+    env = {**os.environ, "PYTHONPATH": ROOT_DIR, "MODEL_WATCH_INTERVAL_SECONDS": "0"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, cwd=ROOT_DIR,
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/ready").status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("server did not become ready")
+
+
+def make_lines(count: int) -> list:
+    rng = random.Random(7)
+    return [json.dumps({"id": i, **transaction(rng)}).encode() for i in range(count)]
+
+
+def single_requests(base_url: str, lines: list) -> dict:
+    import httpx
+
+    with httpx.Client(base_url=base_url) as client:
+        start = time.perf_counter()
+        for line in lines:
+            client.post("/detect/fraud", content=line, headers={"Content-Type": "application/json"}).raise_for_status()
+        elapsed = time.perf_counter() - start
+    return {"transactions": len(lines), "seconds": elapsed, "transactions_per_second": len(lines) / elapsed}
+
+
+def ndjson_stream(base_url: str, lines: list, chunk_lines: int) -> dict:
+    import httpx
+
+    def body():
+        for start in range(0, len(lines), chunk_lines):
+            yield b"\n".join(lines[start:start + chunk_lines]) + b"\n"
+
+    received = 0
+    start = time.perf_counter()
+    with httpx.Client(base_url=base_url, timeout=None) as client:
+        with client.stream("POST", "/detect/fraud/stream", content=body(),
+                           headers={"Content-Type": "application/x-ndjson"}) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    received += 1
+    elapsed = time.perf_counter() - start
+    assert received == len(lines), (received, len(lines))
+    return {"transactions": received, "seconds": elapsed, "transactions_per_second": received / elapsed}
+
+
+async def websocket_stream(url: str, lines: list, message_size: int) -> dict:
+    from websockets.asyncio.client import connect
+
+    sent = received = max_outstanding = 0
+    async with connect(url, max_size=None) as websocket:
+        async def sender():
+            nonlocal sent, max_outstanding
+            for start in range(0, len(lines), message_size):
+                chunk = lines[start:start + message_size]
+                await websocket.send(b"\n".join(chunk).decode())
+                sent += len(chunk)
+                max_outstanding = max(max_outstanding, sent - received)
+
+        start = time.perf_counter()
+        task = asyncio.create_task(sender())
+        while received < len(lines):
+            message = await websocket.recv()
+            received += message.count("\n")
+        await task
+        elapsed = time.perf_counter() - start
+    return {
+        "transactions": received,
+        "seconds": elapsed,
+        "transactions_per_second": received / elapsed,
+        "max_outstanding": max_outstanding,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--single-requests", type=int, default=2_000)
+    parser.add_argument("--message-size", type=int, default=500, help="transações por mensagem/parte")
+    parser.add_argument("--train-rows", type=int, default=5_000)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    lines = make_lines(args.transactions)
+    with tempfile.TemporaryDirectory(prefix="financeai-bench-") as workdir:
+        prepare_environment(workdir, args.train_rows)
+        port = free_port()
+        server = start_server(port)
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            results = {
+                "single": single_requests(base_url, lines[:args.single_requests]),
+                "ndjson": ndjson_stream(base_url, lines, args.message_size),
+                "websocket": asyncio.run(
+                    websocket_stream(f"ws://127.0.0.1:{port}/ws/detect/fraud", lines, args.message_size)
+                ),
+            }
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    report("stream", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
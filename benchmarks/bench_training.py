@@ -0,0 +1,96 @@
+"""
+Treinamento em memória vs em blocos (src/models/training.py): tempo e memória de pico.
+
+Gera um Parquet de transações e clientes rotulados e treina FinancialMLModels
+em subprocessos separados, para que o pico de RSS de um modo não contamine o
+outro.
+
+Uso: python benchmarks/bench_training.py --rows 2000000 --chunk-rows 200000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import peak_rss_mb, report
+
+
+def write_dataset(path: str, rows: int, seed: int = 42):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rng = np.random.default_rng(seed)
+    writer = None
+    for start in range(0, rows, 500_000):
+        n = min(500_000, rows - start)
+        frame = pd.DataFrame({
+            'amount': rng.lognormal(5, 1, n),
+            'hour_of_day': rng.integers(0, 24, n),
+            'day_of_week': rng.integers(0, 7, n),
+            'merchant_category': rng.integers(0, 20, n),
+            'income': rng.normal(5000, 1500, n),
+            'debt_ratio': rng.uniform(0, 1, n),
+            'credit_history_length': rng.integers(0, 30, n),
+            'num_credit_lines': rng.integers(0, 10, n),
+            'payment_history_score': rng.uniform(0, 100, n),
+        })
+        frame['default'] = (frame['debt_ratio'] + rng.normal(0, 0.2, n) > 0.6).astype(int)
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        writer = writer or pq.ParquetWriter(path, table.schema)
+        writer.write_table(table)
+    writer.close()
+
+
+def run(mode: str, path: str, chunk_rows: int, n_jobs: int) -> dict:
+    from src.api.ml_models import FinancialMLModels
+    from src.models.training import ChunkSource, train_financial_models
+
+    start = time.perf_counter()
+    if mode == "in_memory":
+        data = pd.read_parquet(path)
+        models = FinancialMLModels()
+        models.fraud_detector.set_params(n_jobs=n_jobs)
+        models.risk_analyzer.set_params(n_jobs=n_jobs)
+        models.train_fraud_detector(data)
+        models.train_risk_analyzer(data, data['default'].to_numpy())
+    else:
+        source = ChunkSource(path, chunk_rows)
+        train_financial_models(source, source, n_jobs=n_jobs)
+    return {"seconds": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--run", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run(args.run[0], args.run[1], args.chunk_rows, args.n_jobs)))
+        return
+
+    results = {"rows": args.rows, "chunk_rows": args.chunk_rows, "n_jobs": args.n_jobs}
+    with tempfile.TemporaryDirectory(prefix="financeai-bench-") as tmp:
+        path = os.path.join(tmp, "training.parquet")
+        write_dataset(path, args.rows)
+        results["dataset_mb"] = os.path.getsize(path) / (1024 * 1024)
+        for mode in ("in_memory", "streaming"):
+            output = subprocess.check_output([
+                sys.executable, os.path.abspath(__file__), "--run", mode, path,
+                "--chunk-rows", str(args.chunk_rows), "--n-jobs", str(args.n_jobs),
+            ])
+            results[mode] = json.loads(output.decode().strip().splitlines()[-1])
+    report("training", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
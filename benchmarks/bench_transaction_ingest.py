@@ -0,0 +1,86 @@
+"""
+Ingestão de transações: inserções individuais vs em lote (rows/sec).
+
+Uso: python benchmarks/bench_transaction_ingest.py --database-url postgresql://... --bulk-rows 200000
+Sem --database-url usa um arquivo SQLite temporário.
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from common import report
+from src.api.storage import TransactionStore, rollups, transactions
+
+
+def make_rows(n_rows: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    start = datetime(2024, 1, 1)
+    amounts = rng.lognormal(5, 1, n_rows).round(2)
+    merchants = rng.integers(0, 5000, n_rows)
+    seconds = rng.integers(0, 365 * 24 * 3600, n_rows)
+    categories = np.array(["retail", "services", "travel", "food"])[rng.integers(0, 4, n_rows)]
+    return [
+        {"amount": float(a), "merchant": f"merchant_{m}", "timestamp": start + timedelta(seconds=int(s)),
+         "category": str(c)}
+        for a, m, s, c in zip(amounts, merchants, seconds, categories)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--single-rows", type=int, default=2_000)
+    parser.add_argument("--bulk-rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    tmp_path = None
+    url = args.database_url
+    if url is None:
+        fd, tmp_path = tempfile.mkstemp(suffix=".db", prefix="financeai-bench-")
+        os.close(fd)
+        url = f"sqlite:///{tmp_path}"
+
+    try:
+        store = TransactionStore(url, batch_size=args.batch_size)
+        with store.engine.begin() as conn:
+            conn.execute(transactions.delete())
+            conn.execute(rollups.delete())
+
+        rows = make_rows(args.single_rows)
+        start = time.perf_counter()
+        for row in rows:
+            store.add(row)
+        single_seconds = time.perf_counter() - start
+
+        rows = make_rows(args.bulk_rows, seed=7)
+        start = time.perf_counter()
+        store.add_many(rows)
+        bulk_seconds = time.perf_counter() - start
+
+        single_rps = args.single_rows / single_seconds
+        bulk_rps = args.bulk_rows / bulk_seconds
+        results = {
+            "dialect": store.engine.dialect.name,
+            "copy": store.supports_copy,
+            "batch_size": args.batch_size,
+            "single_rows": args.single_rows,
+            "single_rows_per_second": single_rps,
+            "bulk_rows": args.bulk_rows,
+            "bulk_rows_per_second": bulk_rps,
+            "speedup": bulk_rps / single_rps,
+        }
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+    report("transaction_ingest", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
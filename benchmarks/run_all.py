@@ -0,0 +1,159 @@
+"""
+Executa a suíte de benchmarks e compara com uma execução anterior.
+
+Cada benchmark roda em um processo separado e grava seu JSON em
+<results-dir>/<revisão git>/<nome>.json. Com --baseline, compara métricas de
+tempo/latência (menor é melhor) e de vazão (maior é melhor) com os arquivos de
+mesmo nome do diretório informado e termina com código 1 se alguma piorar mais
+que --threshold.
+
+Perfis: "quick" (segundos, para rodar a cada commit) e "full" (padrões de
+cada script).
+
+Uso: python benchmarks/run_all.py --profile quick --baseline benchmarks/results/abc1234
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, Iterator, Optional, Tuple
+
+from common import ROOT_DIR, git_revision
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PROFILES = {
+    "quick": {
+        "models": ["--batch-sizes", "1", "64", "1024", "--train-rows", "2000", "--repeat", "10"],
+        "http": ["--requests", "300", "--concurrency", "16", "--train-rows", "2000",
+                 "--transactions", "2000", "--upload-sizes-mb", "1", "4", "--upload-repeat", "2"],
+        "feature_extraction": ["--rows", "100000", "--legacy-rows", "5000"],
+        "csv_ingestion": ["--size-mb", "32"],
+        "delinquency": ["--contracts", "100000", "--train-rows", "5000"],
+        "boleto_scoring": ["--boletos", "50000", "--train-rows", "5000"],
+        "dashboard": ["--steps", "1000", "10000", "--repeat", "5"],
+        "startup": ["--repeat", "2", "--train-rows", "2000"],
+        "feature_store": ["--transactions", "100000", "--merchants", "10000"],
+        "archive": ["--days", "60", "--rows-per-day", "5000", "--repeat", "3"],
+        "stream": ["--transactions", "20000", "--single-requests", "200", "--train-rows", "2000"],
+        "server": ["--requests", "300", "--concurrency", "16", "--train-rows", "2000"],
+        "compiled_trees": ["--train-rows", "2000", "--batch-sizes", "1", "64", "--repeat", "20"],
+        "model_loading": ["--rows", "20000", "--workers", "2"],
+        "serialization": ["--points", "2000", "--repeat", "3"],
+        "training": ["--rows", "50000", "--chunk-rows", "10000"],
+        "transaction_ingest": ["--single-rows", "200", "--bulk-rows", "10000", "--batch-size", "2000"],
+    },
+    "full": {
+        "models": [],
+        "http": [],
+        "feature_extraction": [],
+        "csv_ingestion": [],
+        "delinquency": [],
+        "boleto_scoring": [],
+        "dashboard": [],
+        "startup": [],
+        "feature_store": [],
+        "archive": [],
+        "stream": [],
+        "server": [],
+        "compiled_trees": [],
+        "model_loading": [],
+        "serialization": [],
+        "training": [],
+        "transaction_ingest": [],
+    },
+}
+
+# Sufixos das métricas comparadas: (sufixo, maior é melhor)
+COMPARED_METRICS = (
+    ("best_seconds", False),
+    ("_ms", False),
+    ("_per_second", True),
+)
+
+
+def run_benchmark(name: str, extra_args, output: str):
+    command = [sys.executable, os.path.join(BENCH_DIR, f"bench_{name}.py"), *extra_args, "--output", output]
+    print(f"$ {' '.join(command)}", file=sys.stderr)
+    subprocess.run(command, check=True, cwd=ROOT_DIR, stdout=subprocess.DEVNULL)
+
+
+def flatten(value, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """
+    Folhas numéricas do JSON como (caminho, valor); itens de listas são
+    identificados pelo primeiro campo (ex.: batch_size=64)
+    """
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten(item, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            label = str(index)
+            if isinstance(item, dict) and item:
+                key, first = next(iter(item.items()))
+                if isinstance(first, (int, float, str)):
+                    label = f"{key}={first}"
+            yield from flatten(item, f"{prefix}[{label}]")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, float(value)
+
+
+def higher_is_better(path: str) -> Optional[bool]:
+    for suffix, higher in COMPARED_METRICS:
+        if path.endswith(suffix):
+            return higher
+    return None
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> list:
+    """
+    Métricas que pioraram mais que `threshold` (fração) em relação à baseline
+    """
+    previous = dict(flatten(baseline["results"]))
+    regressions = []
+    for path, value in flatten(current["results"]):
+        higher = higher_is_better(path)
+        old = previous.get(path)
+        if higher is None or not old or not value:
+            continue
+        change = value / old - 1
+        if (change < -threshold) if higher else (change > threshold):
+            regressions.append({"metric": path, "baseline": old, "current": value, "change": change})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--only", nargs="+", help="subconjunto dos benchmarks")
+    parser.add_argument("--results-dir", default=os.path.join(BENCH_DIR, "results"))
+    parser.add_argument("--baseline", help="diretório de uma execução anterior")
+    parser.add_argument("--threshold", type=float, default=0.2, help="piora tolerada (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    output_dir = os.path.join(args.results_dir, git_revision() or "local")
+    os.makedirs(output_dir, exist_ok=True)
+    benchmarks = PROFILES[args.profile]
+    names = args.only or list(benchmarks)
+
+    regressions = {}
+    for name in names:
+        output = os.path.join(output_dir, f"{name}.json")
+        run_benchmark(name, benchmarks[name], output)
+        if args.baseline:
+            baseline_path = os.path.join(args.baseline, f"{name}.json")
+            if not os.path.exists(baseline_path):
+                continue
+            with open(output) as f, open(baseline_path) as b:
+                found = compare(json.load(f), json.load(b), args.threshold)
+            if found:
+                regressions[name] = found
+
+    summary = {"profile": args.profile, "results_dir": output_dir, "regressions": regressions}
+    print(json.dumps(summary, indent=2))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
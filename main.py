@@ -9,6 +9,11 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 def start():
     """Função para iniciar o servidor"""
     settings = get_settings()
+
+    if settings.SERVER_MODE == "prefork":
+        from src.api.prefork import serve
+
+        sys.exit(serve(settings))
     
     # Configuração do uvicorn
     config = uvicorn.Config(
@@ -0,0 +1,156 @@
+"""
+Agregados incrementais de transações para os dashboards.
+
+Cada inserção (ou lote) atualiza, na mesma transação do banco, os buckets
+diários, mensais, trimestrais e o total geral: quantidade, soma dos valores,
+fraudes e inadimplências rotuladas. Os dashboards leem apenas os buckets, em
+O(buckets), independentemente do volume de transações.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+from sqlalchemy import BigInteger, Column, Float, MetaData, String, Table, select, update
+from sqlalchemy.engine import Connection
+
+GRANULARITIES = ("day", "month", "quarter", "total")
+TOTAL_BUCKET = "all"
+
+
+def define_rollups_table(metadata: MetaData) -> Table:
+    return Table(
+        "transaction_rollups",
+        metadata,
+        Column("granularity", String(10), primary_key=True),
+        Column("bucket", String(10), primary_key=True),
+        Column("count", BigInteger, nullable=False),
+        Column("amount_sum", Float, nullable=False),
+        Column("fraud_count", BigInteger, nullable=False),
+        Column("delinquent_count", BigInteger, nullable=False),
+    )
+
+
+def compute_deltas(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Agrupa as transações por bucket de cada granularidade (vetorizado com pandas)
+    """
+    frame = pd.DataFrame(list(rows), columns=["amount", "timestamp", "is_fraud", "is_delinquent"])
+    if frame.empty:
+        return []
+    timestamps = pd.to_datetime(frame["timestamp"], utc=True)
+    values = pd.DataFrame({
+        "count": 1,
+        "amount_sum": frame["amount"].astype("float64"),
+        "fraud_count": frame["is_fraud"].astype("boolean").fillna(False).astype("int64"),
+        "delinquent_count": frame["is_delinquent"].astype("boolean").fillna(False).astype("int64"),
+    })
+    keys = {
+        "day": timestamps.dt.strftime("%Y-%m-%d"),
+        "month": timestamps.dt.strftime("%Y-%m"),
+        "quarter": timestamps.dt.year.astype(str) + "-Q" + timestamps.dt.quarter.astype(str),
+        "total": pd.Series(TOTAL_BUCKET, index=frame.index),
+    }
+    deltas = []
+    for granularity in GRANULARITIES:
+        grouped = values.groupby(keys[granularity].to_numpy()).sum()
+        for bucket, row in grouped.to_dict("index").items():
+            deltas.append({
+                "granularity": granularity,
+                "bucket": bucket,
+                "count": int(row["count"]),
+                "amount_sum": float(row["amount_sum"]),
+                "fraud_count": int(row["fraud_count"]),
+                "delinquent_count": int(row["delinquent_count"]),
+            })
+    return deltas
+
+
+def apply_deltas(conn: Connection, rollups: Table, deltas: List[Dict[str, Any]]):
+    """
+    Soma os deltas aos buckets com upsert (SQLite/Postgres) ou update+insert nos demais bancos
+    """
+    if not deltas:
+        return
+    dialect = conn.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(rollups)
+        statement = statement.on_conflict_do_update(
+            index_elements=[rollups.c.granularity, rollups.c.bucket],
+            set_={
+                name: rollups.c[name] + statement.excluded[name]
+                for name in ("count", "amount_sum", "fraud_count", "delinquent_count")
+            },
+        )
+        conn.execute(statement, deltas)
+        return
+
+    for delta in deltas:
+        key = (rollups.c.granularity == delta["granularity"]) & (rollups.c.bucket == delta["bucket"])
+        result = conn.execute(update(rollups).where(key).values(
+            count=rollups.c.count + delta["count"],
+            amount_sum=rollups.c.amount_sum + delta["amount_sum"],
+            fraud_count=rollups.c.fraud_count + delta["fraud_count"],
+            delinquent_count=rollups.c.delinquent_count + delta["delinquent_count"],
+        ))
+        if result.rowcount == 0:
+            conn.execute(rollups.insert().values(**delta))
+
+
+def bucket_stats(row: Dict[str, Any]) -> Dict[str, Any]:
+    count = row["count"]
+    return {
+        "bucket": row["bucket"],
+        "count": count,
+        "sum": row["amount_sum"],
+        "mean": row["amount_sum"] / count if count else 0.0,
+        "fraud_rate": row["fraud_count"] / count if count else 0.0,
+        "delinquency_rate": row["delinquent_count"] / count if count else 0.0,
+    }
+
+
+def read_series(conn: Connection, rollups: Table, granularity: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Últimos `limit` buckets de uma granularidade, em ordem cronológica
+    """
+    rows = conn.execute(
+        select(rollups)
+        .where(rollups.c.granularity == granularity)
+        .order_by(rollups.c.bucket.desc())
+        .limit(limit)
+    ).mappings().all()
+    return [bucket_stats(dict(row)) for row in reversed(rows)]
+
+
+def read_total(conn: Connection, rollups: Table) -> Optional[Dict[str, Any]]:
+    row = conn.execute(
+        select(rollups).where(rollups.c.granularity == "total", rollups.c.bucket == TOTAL_BUCKET)
+    ).mappings().first()
+    return bucket_stats(dict(row)) if row else None
+
+
+def bucket_label(granularity: str, bucket: str) -> str:
+    if granularity == "day":
+        return pd.Timestamp(bucket).strftime("%d/%m")
+    if granularity == "month":
+        return pd.Timestamp(bucket + "-01").strftime("%b/%y")
+    year, quarter = bucket.split("-Q")
+    return pd.Timestamp(year=int(year), month=int(quarter) * 3, day=1).strftime("%b/%y")
+
+
+def with_trend(series: List[Dict[str, Any]], granularity: str, field: str = "sum") -> List[Dict[str, Any]]:
+    """
+    Formata uma série de buckets para os gráficos: nome, valor e tendência percentual
+    """
+    points = []
+    for i, stats in enumerate(series):
+        value = stats[field]
+        previous = series[i - 1][field] if i > 0 else None
+        points.append({
+            "name": bucket_label(granularity, stats["bucket"]),
+            "value": round(value, 2),
+            "trend": round((value - previous) / previous * 100, 2) if previous else 0.0,
+        })
+    return points
@@ -0,0 +1,456 @@
+"""
+Arquivo colunar de transações, particionado por dia, para consultas analíticas.
+
+As transações ingeridas (/api/transactions, /api/transactions/bulk) e as
+linhas dos CSVs enviados são acumuladas em memória e gravadas em lotes como
+arquivos Arrow IPC sem compressão:
+
+    <raiz>/date=2024-01-05/part-<horário>-<pid>-<seq>.arrow
+
+Os arquivos são imutáveis (só há inclusão); dias já fechados são
+compactados em um único arquivo com `compact`, chamado periodicamente pelo
+flusher (um processo por vez, sob um flock na raiz). Cada arquivo guarda nos
+metadados do schema o número de linhas e o menor/maior valor.
+
+Uma consulta (`query`) descarta partições fora do intervalo de datas pelo nome
+do diretório e arquivos fora da faixa de valor pelos metadados, abre os
+arquivos de uma partição por vez (os descritores abertos ficam limitados a um
+dia), lê com mmap (sem cópia: só as páginas das colunas usadas são lidas do disco) e
+filtra/agrega com pyarrow.compute, partição por partição, sem passar por
+pandas. Dados ainda no buffer só aparecem depois do próximo flush.
+"""
+import itertools
+import os
+import threading
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: compactação sem exclusão entre processos
+    fcntl = None
+
+SCHEMA = pa.schema([
+    ("timestamp", pa.timestamp("us")),
+    ("amount", pa.float64()),
+    ("merchant", pa.string()),
+    ("category", pa.string()),
+    ("is_fraud", pa.bool_()),
+    ("is_delinquent", pa.bool_()),
+])
+COLUMNS = SCHEMA.names
+
+# (rótulo, valor mínimo inclusivo, valor máximo exclusivo)
+AMOUNT_BANDS: Tuple[Tuple[str, float, float], ...] = (
+    ("0-100", 0.0, 100.0),
+    ("100-1k", 100.0, 1_000.0),
+    ("1k-10k", 1_000.0, 10_000.0),
+    ("10k+", 10_000.0, float("inf")),
+)
+GROUP_BY = ("day", "merchant", "category", "amount_band")
+
+_PARTITION_PREFIX = "date="
+_SUFFIX = ".arrow"
+_COMPACT_LOCK = ".compact.lock"
+_BAND_EDGES = np.array([upper for _, _, upper in AMOUNT_BANDS[:-1]])
+_BAND_LABELS = pa.array([label for label, _, _ in AMOUNT_BANDS])
+_PARTIALS = [("amount", "count"), ("amount", "sum"), ("amount", "min"), ("amount", "max"), ("fraud", "sum")]
+_MERGE = [("amount_count", "sum"), ("amount_sum", "sum"), ("amount_min", "min"), ("amount_max", "max"),
+          ("fraud_sum", "sum")]
+
+
+def amount_band(label: str) -> Tuple[float, float]:
+    for name, lower, upper in AMOUNT_BANDS:
+        if name == label:
+            return lower, upper
+    raise ValueError(f"Unknown amount band: {label}")
+
+
+def _boolean(values: pd.Series) -> pd.Series:
+    try:
+        return values.astype("boolean")
+    except (TypeError, ValueError):
+        # Rótulos em formato inesperado ("sim", "S"...) não impedem o arquivamento
+        return pd.Series(pd.NA, index=values.index, dtype="boolean")
+
+
+def _normalize(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Colunas do schema; linhas sem horário ou valor válidos são descartadas
+    """
+    if "timestamp" not in frame.columns or "amount" not in frame.columns:
+        return frame.iloc[0:0].reindex(columns=COLUMNS)
+    # Horários com fuso são convertidos para UTC; sem fuso são mantidos (como no feature store)
+    timestamps = pd.to_datetime(frame["timestamp"], errors="coerce", utc=True).dt.tz_localize(None)
+    normalized = pd.DataFrame({
+        "timestamp": timestamps,
+        "amount": pd.to_numeric(frame["amount"], errors="coerce"),
+    }, index=frame.index)
+    for name in ("merchant", "category"):
+        normalized[name] = frame[name].fillna("").astype(str) if name in frame.columns else ""
+    for name in ("is_fraud", "is_delinquent"):
+        normalized[name] = _boolean(frame[name]) if name in frame.columns else pd.Series(
+            pd.NA, index=frame.index, dtype="boolean")
+    return normalized.dropna(subset=["timestamp", "amount"])
+
+
+class TransactionArchive:
+    """
+    Arquivo particionado por dia; `append` é barato e seguro entre threads
+    """
+
+    def __init__(self, root: str, flush_rows: int = 50_000):
+        self.root = root
+        self.flush_rows = flush_rows
+        os.makedirs(root, exist_ok=True)
+        self._rows: List[Dict[str, Any]] = []
+        self._frames: List[pd.DataFrame] = []
+        self._buffered = 0
+        self._buffer_lock = threading.Lock()
+        # Serializa gravações e a listagem/abertura de arquivos das consultas
+        self._files_lock = threading.Lock()
+        self._sequence = itertools.count()
+        self.rows_written = 0
+        self._flusher: Optional[threading.Thread] = None
+        self._stop_flusher = threading.Event()
+
+    # Escrita
+
+    def append(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Enfileira transações (dicts com as colunas de SCHEMA) para o próximo flush
+        """
+        rows = list(rows)
+        with self._buffer_lock:
+            self._rows.extend(rows)
+            self._buffered += len(rows)
+            full = self._buffered >= self.flush_rows
+        if full:
+            self.flush()
+        return len(rows)
+
+    def append_frame(self, frame: pd.DataFrame) -> int:
+        """
+        Enfileira um bloco de CSV; sem colunas timestamp e amount, nada é arquivado
+        """
+        normalized = _normalize(frame)
+        if normalized.empty:
+            return 0
+        with self._buffer_lock:
+            self._frames.append(normalized)
+            self._buffered += len(normalized)
+            full = self._buffered >= self.flush_rows
+        if full:
+            self.flush()
+        return len(normalized)
+
+    def flush(self) -> int:
+        """
+        Grava o buffer, um arquivo por dia presente; retorna o número de linhas gravadas
+        """
+        with self._buffer_lock:
+            rows, frames = self._rows, self._frames
+            self._rows, self._frames, self._buffered = [], [], 0
+        if rows:
+            frames.append(_normalize(pd.DataFrame(rows)))
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return 0
+        data = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        written = 0
+        days = data["timestamp"].dt.date
+        for day in sorted(days.unique()):
+            group = data[days == day]
+            try:
+                table = pa.Table.from_pandas(group.sort_values("timestamp"), schema=SCHEMA, preserve_index=False)
+                self._write(day, table)
+            except OSError:
+                # Os dias ainda não gravados voltam ao buffer para o próximo flush
+                with self._buffer_lock:
+                    remaining = data[days >= day]
+                    self._frames.append(remaining)
+                    self._buffered += len(remaining)
+                raise
+            written += table.num_rows
+        return written
+
+    def _partition_dir(self, day: date) -> str:
+        return os.path.join(self.root, f"{_PARTITION_PREFIX}{day.isoformat()}")
+
+    def _write(self, day: date, table: pa.Table, name: Optional[str] = None, replaces: Sequence[str] = ()) -> str:
+        # Publica o arquivo e remove `replaces` (os que ele substitui) num único trecho sob o lock:
+        # uma consulta vê ou os arquivos antigos ou o novo, nunca os dois
+        amounts = table["amount"]
+        metadata = {
+            "rows": str(table.num_rows),
+            "min_amount": repr(pc.min(amounts).as_py()),
+            "max_amount": repr(pc.max(amounts).as_py()),
+        }
+        table = table.replace_schema_metadata(metadata)
+        directory = self._partition_dir(day)
+        os.makedirs(directory, exist_ok=True)
+        if name is None:
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+            name = f"part-{stamp}-{os.getpid()}-{next(self._sequence):06d}{_SUFFIX}"
+        path = os.path.join(directory, name)
+        tmp_path = os.path.join(directory, f".{name}.tmp")
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=65_536)
+        with self._files_lock:
+            os.replace(tmp_path, path)
+            for old_path in replaces:
+                os.remove(old_path)
+            if not replaces:
+                self.rows_written += table.num_rows
+        return path
+
+    def compact(self, before: Optional[date] = None) -> int:
+        """
+        Junta os arquivos de cada dia anterior a `before` (padrão: hoje, UTC) em um só;
+        retorna o número de partições compactadas. Se outro processo estiver
+        compactando o mesmo arquivo, não faz nada e retorna 0.
+        """
+        before = before or datetime.now(timezone.utc).date()
+        lock = open(os.path.join(self.root, _COMPACT_LOCK), "a")
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return 0
+            compacted = 0
+            for day, paths in self._partitions(None, before):
+                if day >= before or len(paths) < 2:
+                    continue
+                tables = [pa.ipc.open_file(pa.memory_map(path)).read_all() for path in paths]
+                merged = pa.concat_tables([t.replace_schema_metadata(None) for t in tables])
+                merged = merged.sort_by("timestamp").combine_chunks()
+                self._write(day, merged, name=f"compacted-{os.path.basename(paths[-1])}", replaces=paths)
+                compacted += 1
+            return compacted
+        finally:
+            lock.close()  # libera o flock
+
+    # Leitura
+
+    def _days(self, start: Optional[date], end: Optional[date]) -> List[Tuple[date, str]]:
+        # Poda pelo nome do diretório: só as partições no intervalo são listadas
+        days = []
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if not entry.is_dir() or not entry.name.startswith(_PARTITION_PREFIX):
+                    continue
+                day = date.fromisoformat(entry.name[len(_PARTITION_PREFIX):])
+                if (start and day < start) or (end and day > end):
+                    continue
+                days.append((day, entry.path))
+        days.sort()
+        return days
+
+    @staticmethod
+    def _files(directory: str) -> List[str]:
+        return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(_SUFFIX))
+
+    def _partitions(self, start: Optional[date], end: Optional[date]) -> List[Tuple[date, List[str]]]:
+        partitions = []
+        for day, directory in self._days(start, end):
+            files = self._files(directory)
+            if files:
+                partitions.append((day, files))
+        return partitions
+
+    def _open(self, start: Optional[date], end: Optional[date]) -> Iterator[Tuple[date, List[pa.ipc.RecordBatchFileReader]]]:
+        # Uma partição por vez, listada e aberta sob o lock: arquivos removidos por `compact`
+        # depois disso seguem legíveis pelo mmap. Os leitores da anterior são liberados a cada passo.
+        for day, directory in self._days(start, end):
+            with self._files_lock:
+                readers = [pa.ipc.open_file(pa.memory_map(path)) for path in self._files(directory)]
+            if readers:
+                yield day, readers
+            del readers
+
+    def query(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        merchant: Optional[str] = None,
+        category: Optional[str] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        group_by: Optional[str] = None,
+        limit: int = 1000,
+    ) -> Dict[str, Any]:
+        """
+        Contagem, soma, média, mínimo, máximo e fraudes das transações filtradas,
+        agrupadas por `group_by` (GROUP_BY) ou no total. `end` é inclusivo e
+        `max_amount` exclusivo.
+        """
+        if group_by is not None and group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+        started = time.perf_counter()
+        columns = ["amount", "is_fraud"]
+        columns += [name for name, value in (("merchant", merchant), ("category", category)) if value is not None]
+        if group_by in ("merchant", "category") and group_by not in columns:
+            columns.append(group_by)
+        keys = [group_by] if group_by else []
+
+        partials = []
+        stats = {"partitions_scanned": 0, "files_scanned": 0, "files_skipped": 0, "rows_scanned": 0}
+        for day, readers in self._open(start, end):
+            stats["partitions_scanned"] += 1
+            for reader in readers:
+                if not self._may_match(reader.schema.metadata or {}, min_amount, max_amount):
+                    stats["files_skipped"] += 1
+                    continue
+                stats["files_scanned"] += 1
+                table = pa.Table.from_batches(
+                    [reader.get_batch(i).select(columns) for i in range(reader.num_record_batches)],
+                    schema=pa.schema([SCHEMA.field(name) for name in columns]),
+                )
+                stats["rows_scanned"] += table.num_rows
+                partial = self._aggregate(self._filter(table, merchant, category, min_amount, max_amount),
+                                          group_by, day)
+                if partial is not None:
+                    partials.append(partial)
+
+        groups = self._merge(partials, keys)
+        if group_by == "day":
+            groups.sort(key=lambda group: group["day"])
+        else:
+            groups.sort(key=lambda group: (-group["count"], str(group.get(group_by, ""))))
+        return {
+            "group_by": group_by,
+            "groups": groups[:limit],
+            "groups_total": len(groups),
+            **stats,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    @staticmethod
+    def _may_match(metadata: Dict[bytes, bytes], min_amount: Optional[float], max_amount: Optional[float]) -> bool:
+        if b"min_amount" not in metadata:
+            return True
+        if min_amount is not None and float(metadata[b"max_amount"]) < min_amount:
+            return False
+        if max_amount is not None and float(metadata[b"min_amount"]) >= max_amount:
+            return False
+        return True
+
+    @staticmethod
+    def _filter(table: pa.Table, merchant, category, min_amount, max_amount) -> pa.Table:
+        conditions = []
+        if merchant is not None:
+            conditions.append(pc.equal(table["merchant"], merchant))
+        if category is not None:
+            conditions.append(pc.equal(table["category"], category))
+        if min_amount is not None:
+            conditions.append(pc.greater_equal(table["amount"], min_amount))
+        if max_amount is not None:
+            conditions.append(pc.less(table["amount"], max_amount))
+        if not conditions:
+            return table
+        mask = conditions[0]
+        for condition in conditions[1:]:
+            mask = pc.and_(mask, condition)
+        return table.filter(mask)
+
+    @staticmethod
+    def _aggregate(table: pa.Table, group_by: Optional[str], day: date) -> Optional[pa.Table]:
+        if not table.num_rows:
+            return None
+        table = table.append_column("fraud", table["is_fraud"].cast(pa.int64()))
+        keys = []
+        if group_by in ("merchant", "category"):
+            keys = [group_by]
+        elif group_by == "amount_band":
+            bands = np.searchsorted(_BAND_EDGES, table["amount"].to_numpy(), side="right")
+            table = table.append_column("amount_band", pc.take(_BAND_LABELS, pa.array(bands)))
+            keys = ["amount_band"]
+        if keys:
+            partial = table.group_by(keys).aggregate(_PARTIALS)
+        else:
+            # Sem chaves: kernels escalares evitam montar um plano de agregação por arquivo
+            amounts = table["amount"]
+            partial = pa.table({
+                "amount_count": pa.array([pc.count(amounts).as_py()], pa.int64()),
+                "amount_sum": pa.array([pc.sum(amounts).as_py()], pa.float64()),
+                "amount_min": pa.array([pc.min(amounts).as_py()], pa.float64()),
+                "amount_max": pa.array([pc.max(amounts).as_py()], pa.float64()),
+                "fraud_sum": pa.array([pc.sum(table["fraud"]).as_py()], pa.int64()),
+            })
+        if group_by == "day":
+            # A partição inteira é um único dia
+            partial = partial.append_column("day", pa.array([day.isoformat()] * partial.num_rows))
+        return partial
+
+    @staticmethod
+    def _merge(partials: List[pa.Table], keys: List[str]) -> List[Dict[str, Any]]:
+        if not partials:
+            return []
+        merged = pa.concat_tables(partials).group_by(keys).aggregate(_MERGE)
+        groups = []
+        for row in merged.to_pylist():
+            count = row["amount_count_sum"]
+            group = {key: row[key] for key in keys}
+            group.update({
+                "count": count,
+                "total_amount": row["amount_sum_sum"],
+                "average_amount": row["amount_sum_sum"] / count if count else None,
+                "min_amount": row["amount_min_min"],
+                "max_amount": row["amount_max_max"],
+                "fraud_count": row["fraud_sum_sum"] or 0,
+            })
+            groups.append(group)
+        return groups
+
+    def stats(self) -> Dict[str, Any]:
+        partitions = self._partitions(None, None)
+        return {
+            "root": self.root,
+            "partitions": len(partitions),
+            "files": sum(len(files) for _, files in partitions),
+            "first_day": partitions[0][0].isoformat() if partitions else None,
+            "last_day": partitions[-1][0].isoformat() if partitions else None,
+            "buffered_rows": self._buffered,
+            "rows_written": self.rows_written,
+        }
+
+    # Flush periódico
+
+    def start_flusher(self, interval_seconds: float, compact_interval_seconds: float = 0):
+        """
+        Grava o buffer periodicamente em segundo plano e, a cada
+        `compact_interval_seconds` (0 desativa), compacta os dias já fechados
+        """
+        if self._flusher is not None or interval_seconds <= 0:
+            return
+        self._stop_flusher.clear()
+
+        def run():
+            last_compaction = time.monotonic()
+            while not self._stop_flusher.wait(interval_seconds):
+                try:
+                    self.flush()
+                except OSError:
+                    pass  # as linhas continuam no buffer; tenta de novo no próximo ciclo
+                if compact_interval_seconds > 0 and time.monotonic() - last_compaction >= compact_interval_seconds:
+                    last_compaction = time.monotonic()
+                    try:
+                        self.compact()
+                    except OSError:
+                        pass  # arquivos de origem intactos; tenta de novo no próximo intervalo
+
+        self._flusher = threading.Thread(target=run, name="archive-flusher", daemon=True)
+        self._flusher.start()
+
+    def stop_flusher(self):
+        self._stop_flusher.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+            self._flusher = None
@@ -0,0 +1,262 @@
+"""
+Cache de respostas HTTP com TTL, ETag e coalescência de requisições.
+
+A chave combina rota, parâmetros de consulta, versão do modelo e uma geração
+que é incrementada a cada invalidação (novas transações). Backends:
+
+- memory://                 LRU no processo atual (padrão)
+- redis://host:6379/0       compartilhado entre workers e máquinas
+
+Requisições simultâneas para a mesma chave esperam um único cálculo: no
+processo por um Future e, com Redis, entre workers por um lock SET NX.
+"""
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from .serialization import dumps
+
+# (corpo JSON, ETag)
+CacheEntry = Tuple[bytes, str]
+
+
+class MemoryCacheBackend:
+    """
+    LRU com expiração por entrada, local ao processo
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, CacheEntry]]" = OrderedDict()
+        self._generation = 0
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, entry = item
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry, ttl_seconds: float):
+        self._entries[key] = (time.monotonic() + ttl_seconds, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def generation(self) -> int:
+        return self._generation
+
+    async def bump_generation(self) -> int:
+        self._generation += 1
+        self._entries.clear()
+        return self._generation
+
+    async def acquire_lock(self, key: str, ttl_seconds: float) -> Optional[str]:
+        return "local"  # a coalescência no processo já basta
+
+    async def release_lock(self, key: str, token: str):
+        pass
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """
+    Entradas, geração e locks no Redis, compartilhados entre workers
+    """
+
+    _RELEASE = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+    def __init__(self, url: str, prefix: str = "financeai:cache:"):
+        import redis.asyncio as redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key):
+        data = await self.client.get(self.prefix + key)
+        if data is None:
+            return None
+        etag, _, body = data.partition(b"\n")
+        return body, etag.decode()
+
+    async def set(self, key, entry, ttl_seconds):
+        body, etag = entry
+        await self.client.set(self.prefix + key, etag.encode() + b"\n" + body, px=max(1, int(ttl_seconds * 1000)))
+
+    async def generation(self):
+        value = await self.client.get(self.prefix + "generation")
+        return int(value or 0)
+
+    async def bump_generation(self):
+        return int(await self.client.incr(self.prefix + "generation"))
+
+    async def acquire_lock(self, key, ttl_seconds):
+        token = uuid.uuid4().hex
+        acquired = await self.client.set(
+            self.prefix + "lock:" + key, token, nx=True, px=max(1, int(ttl_seconds * 1000))
+        )
+        return token if acquired else None
+
+    async def release_lock(self, key, token):
+        await self.client.eval(self._RELEASE, 1, self.prefix + "lock:" + key, token)
+
+
+def create_cache_backend(url: str, max_entries: int = 256):
+    """
+    Cria o backend a partir de uma URL (memory:// ou redis://...)
+    """
+    if url in ("memory://", "memory", ""):
+        return MemoryCacheBackend(max_entries)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend(url)
+    raise ValueError(f"Unsupported cache URL: {url}")
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class ResponseCache:
+    """
+    Cache de payloads JSON com TTL; `ttl_seconds <= 0` desativa o cache.
+
+    Métricas: `hits` (entrada encontrada), `misses` (payload calculado) e
+    `coalesced` (requisições que esperaram o cálculo de outra, ou seja, o
+    estouro de recomputações evitado).
+    """
+
+    def __init__(self, backend, ttl_seconds: float = 30, lock_timeout: float = 10,
+                 poll_interval: float = 0.02):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    async def key(self, path: str, params: Iterable[Tuple[str, str]], version: Optional[str] = None) -> str:
+        generation = await self.backend.generation()
+        raw = json.dumps([path, sorted(params), version, generation])
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def encode(payload: Any) -> CacheEntry:
+        body = dumps(payload)
+        return body, make_etag(body)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> CacheEntry:
+        """
+        Retorna a entrada em cache ou calcula uma única vez, mesmo sob requisições simultâneas.
+
+        O cálculo roda numa tarefa própria: se a requisição que o iniciou é
+        cancelada (cliente desconectou), as que aguardam a mesma chave ainda
+        recebem o resultado.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._lookup(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # evita o aviso de exceção não lida sem aguardadores
+
+    async def _lookup(self, key: str, compute: Callable[[], Awaitable[Any]]) -> CacheEntry:
+        entry = await self.backend.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        return await self._compute_once(key, compute)
+
+    async def _compute_once(self, key, compute) -> CacheEntry:
+        # Entre workers: quem obtém o lock calcula; os demais aguardam a entrada aparecer
+        token = await self.backend.acquire_lock(key, self.lock_timeout)
+        if token is None:
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                entry = await self.backend.get(key)
+                if entry is not None:
+                    self.coalesced += 1
+                    return entry
+        try:
+            self.misses += 1
+            entry = self.encode(await compute())
+            await self.backend.set(key, entry, self.ttl_seconds)
+            return entry
+        finally:
+            if token is not None:
+                await self.backend.release_lock(key, token)
+
+    async def invalidate(self):
+        """
+        Descarta todas as entradas incrementando a geração da chave
+        """
+        self.invalidations += 1
+        await self.backend.bump_generation()
+
+    async def respond(self, request: Request, compute: Callable[[], Awaitable[Any]],
+                      version: Optional[str] = None) -> Response:
+        """
+        Resposta JSON em cache com ETag; 304 quando If-None-Match confere
+        """
+        if not self.enabled:
+            body, etag = self.encode(await compute())
+        else:
+            key = await self.key(request.url.path, request.query_params.multi_items(), version)
+            body, etag = await self.get_or_compute(key, compute)
+
+        # no-cache: o navegador guarda a resposta mas revalida pelo ETag a cada uso, então uma
+        # escrita (nova geração da chave) aparece na hora; sem mudança a resposta é um 304 vazio
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "backend": type(self.backend).__name__,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "not_modified": self.not_modified,
+            "invalidations": self.invalidations,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+        }
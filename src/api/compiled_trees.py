@@ -0,0 +1,215 @@
+"""
+Inferência "compilada" para os ensembles de árvores do scikit-learn.
+
+As árvores treinadas são achatadas em arrays NumPy empacotados (feature,
+threshold, filho esquerdo/direito e valor da folha) e avaliadas para todas as
+árvores ao mesmo tempo, um nível por iteração. Isso elimina a validação de
+entrada e o despacho via joblib que o sklearn faz a cada chamada, o que domina
+a latência de linhas únicas e lotes pequenos.
+
+Os resultados são numericamente idênticos a `predict_proba` (RandomForest) e
+`score_samples` (IsolationForest): as entradas são convertidas para float32
+como no sklearn e as contribuições das árvores são somadas na mesma ordem.
+"""
+from typing import List, Optional
+
+import numpy as np
+
+# As árvores do sklearn comparam X em float32 com thresholds em float64
+TREE_DTYPE = np.float32
+
+
+class PackedTrees:
+    """
+    Nós de várias árvores concatenados em arrays contíguos.
+
+    Folhas apontam para si mesmas nos dois filhos, de modo que a travessia
+    pode avançar todas as árvores por `max_depth` iterações sem ramificar.
+    """
+
+    def __init__(self, trees, feature_maps: Optional[List[np.ndarray]] = None):
+        features, thresholds, lefts, rights, missing_left, leaves, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for i, tree in enumerate(trees):
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes, dtype=np.intp)
+            is_leaf = tree.children_left == -1
+
+            feature = np.where(is_leaf, 0, tree.feature).astype(np.intp)
+            if feature_maps is not None:
+                # Árvores treinadas com subconjunto de features (max_features < 1.0)
+                feature = np.asarray(feature_maps[i], dtype=np.intp)[feature]
+
+            features.append(feature)
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            missing_left.append(self._missing_go_to_left(tree, n_nodes))
+            leaves.append(is_leaf)
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        self.feature = np.ascontiguousarray(np.concatenate(features))
+        self.threshold = np.ascontiguousarray(np.concatenate(thresholds))
+        self.left = np.ascontiguousarray(np.concatenate(lefts))
+        self.right = np.ascontiguousarray(np.concatenate(rights))
+        self.missing_go_to_left = np.ascontiguousarray(np.concatenate(missing_left))
+        self.is_leaf = np.ascontiguousarray(np.concatenate(leaves))
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = max_depth
+        self.has_missing = bool(self.missing_go_to_left.any())
+
+    @staticmethod
+    def _missing_go_to_left(tree, n_nodes: int) -> np.ndarray:
+        missing = getattr(tree, "missing_go_to_left", None)
+        if missing is None:
+            return np.zeros(n_nodes, dtype=bool)
+        return np.asarray(missing, dtype=bool)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """
+        Retorna o índice global da folha de cada linha em cada árvore, shape (n_trees, n_rows)
+        """
+        X = np.asarray(X, dtype=TREE_DTYPE)
+        n_rows = X.shape[0]
+        rows = np.arange(n_rows)
+        nodes = np.repeat(self.roots[:, None], n_rows, axis=1)
+        for _ in range(self.max_depth):
+            values = X[rows, self.feature[nodes]]
+            go_left = values <= self.threshold[nodes]
+            if self.has_missing:
+                nan = np.isnan(values)
+                go_left = np.where(nan, self.missing_go_to_left[nodes], go_left)
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            if self.is_leaf[nodes].all():
+                break
+        return nodes
+
+
+def _sequential_sum(contributions: np.ndarray) -> np.ndarray:
+    # Soma árvore a árvore, na mesma ordem do sklearn. np.sum pode usar soma
+    # pairwise (ex.: uma única linha), o que muda o último bit do resultado;
+    # cumsum é sempre sequencial.
+    return np.cumsum(contributions, axis=0)[-1]
+
+
+class CompiledScaler:
+    """
+    Equivalente a StandardScaler.transform sem validação de entrada
+    """
+
+    def __init__(self, scaler):
+        self.mean = getattr(scaler, "mean_", None) if scaler.with_mean else None
+        self.scale = getattr(scaler, "scale_", None) if scaler.with_std else None
+
+    def transform(self, X) -> np.ndarray:
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        if self.mean is not None:
+            X -= self.mean
+        if self.scale is not None:
+            X /= self.scale
+        return X
+
+
+class CompiledRandomForest:
+    """
+    predict_proba de um RandomForestClassifier treinado
+    """
+
+    def __init__(self, forest):
+        if forest.n_outputs_ != 1:
+            raise ValueError("Only single-output forests can be compiled")
+        self.n_estimators = len(forest.estimators_)
+        self.n_classes = int(forest.n_classes_)
+        self.classes_ = forest.classes_
+        self.trees = PackedTrees([estimator.tree_ for estimator in forest.estimators_])
+        self.leaf_proba = np.ascontiguousarray(np.concatenate([
+            self._leaf_proba(estimator.tree_) for estimator in forest.estimators_
+        ]))
+
+    def _leaf_proba(self, tree) -> np.ndarray:
+        proba = tree.value[:, 0, :self.n_classes].astype(np.float64)
+        normalizer = proba.sum(axis=1)
+        # Versões antigas do sklearn guardam contagens em vez de frações
+        if not np.allclose(normalizer[normalizer > 0], 1.0):
+            normalizer[normalizer == 0.0] = 1.0
+            proba /= normalizer[:, None]
+        return proba
+
+    def predict_proba(self, X) -> np.ndarray:
+        leaves = self.trees.apply(X)
+        proba = _sequential_sum(self.leaf_proba[leaves])
+        proba /= self.n_estimators
+        return proba
+
+
+def _average_path_length(n_samples_leaf) -> np.ndarray:
+    n_samples_leaf = np.asarray(n_samples_leaf, dtype=np.float64)
+    average_path_length = np.zeros(n_samples_leaf.shape)
+    mask_1 = n_samples_leaf <= 1
+    mask_2 = n_samples_leaf == 2
+    not_mask = ~np.logical_or(mask_1, mask_2)
+    average_path_length[mask_2] = 1.0
+    average_path_length[not_mask] = (
+        2.0 * (np.log(n_samples_leaf[not_mask] - 1.0) + np.euler_gamma)
+        - 2.0 * (n_samples_leaf[not_mask] - 1.0) / n_samples_leaf[not_mask]
+    )
+    return average_path_length
+
+
+class CompiledIsolationForest:
+    """
+    score_samples de um IsolationForest treinado
+    """
+
+    def __init__(self, forest):
+        estimators = forest.estimators_
+        n_features = forest.n_features_in_
+        feature_maps = None
+        if forest._max_features != n_features:
+            feature_maps = forest.estimators_features_
+        self.trees = PackedTrees([estimator.tree_ for estimator in estimators], feature_maps)
+
+        decision_path_lengths = getattr(forest, "_decision_path_lengths", None)
+        average_path_lengths = getattr(forest, "_average_path_length_per_tree", None)
+        if decision_path_lengths is None or average_path_lengths is None:
+            decision_path_lengths = [e.tree_.compute_node_depths() for e in estimators]
+            average_path_lengths = [_average_path_length(e.tree_.n_node_samples) for e in estimators]
+        # Profundidade de cada folha já com o ajuste de caminho médio, como no sklearn
+        self.leaf_depth = np.ascontiguousarray(np.concatenate([
+            dpl + apl - 1.0 for dpl, apl in zip(decision_path_lengths, average_path_lengths)
+        ]))
+        self.denominator = len(estimators) * _average_path_length([forest._max_samples])[0]
+        self.offset_ = forest.offset_
+
+    def score_samples(self, X) -> np.ndarray:
+        leaves = self.trees.apply(X)
+        depths = _sequential_sum(self.leaf_depth[leaves])
+        if self.denominator == 0:
+            return -np.ones_like(depths)
+        return -(2 ** (-(depths / self.denominator)))
+
+    def decision_function(self, X) -> np.ndarray:
+        return self.score_samples(X) - self.offset_
+
+
+def compile_estimator(estimator):
+    """
+    Compila um estimador suportado (StandardScaler, RandomForestClassifier, IsolationForest)
+    """
+    from sklearn.ensemble import IsolationForest, RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    if isinstance(estimator, IsolationForest):
+        return CompiledIsolationForest(estimator)
+    if isinstance(estimator, RandomForestClassifier):
+        return CompiledRandomForest(estimator)
+    if isinstance(estimator, StandardScaler):
+        return CompiledScaler(estimator)
+    raise TypeError(f"Cannot compile estimator of type {type(estimator).__name__}")
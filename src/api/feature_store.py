@@ -0,0 +1,317 @@
+"""
+Feature store online com janelas deslizantes por estabelecimento e categoria.
+
+Cada transação atualiza, para o seu `merchant` e a sua `category`, contadores
+por faixa de tempo (buckets) em três janelas: 1 minuto, 1 hora e 24 horas.
+Cada janela é um anel de buckets com totais mantidos incrementalmente: uma
+atualização zera apenas os buckets que expiraram desde a anterior, então o
+custo amortizado é O(1) por transação e janela. A resolução é a largura do
+bucket (5 s, 5 min e 1 h).
+
+As features de uma transação descrevem o histórico *anterior* a ela:
+
+- hour_of_day, day_of_week: derivadas de `timestamp`
+- <escopo>_count_<janela>, <escopo>_sum_<janela>: quantidade e soma de `amount`
+- <escopo>_seconds_since_last: segundos desde a transação anterior da mesma
+  chave, limitado a 24 h (também o valor de chaves sem histórico)
+
+A memória é limitada: chaves sem atividade há mais de 24 h (tempo dos eventos)
+são descartadas e, acima de `max_keys`, as menos recentes também. O estado pode
+ser gravado e restaurado (`snapshot`/`restore`) para que um pod reiniciado não
+comece do zero.
+
+Na API, as features são lidas sem alterar os agregados (`enrich(update=False)`,
+`preview_many`) e as transações só entram neles com `record_many`, depois de
+pontuadas: uma requisição recusada ou com falha não é contada, e a nova
+tentativa do cliente não conta duas vezes.
+"""
+import os
+import pickle
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# (nome, duração em segundos, número de buckets)
+WINDOWS: Tuple[Tuple[str, int, int], ...] = (("1m", 60, 12), ("1h", 3600, 12), ("24h", 86400, 24))
+SCOPES = ("merchant", "category")
+MAX_SECONDS_SINCE_LAST = float(WINDOWS[-1][1])
+
+TIME_FEATURES = ["hour_of_day", "day_of_week"]
+VELOCITY_FEATURES = [
+    f"{scope}_{stat}_{name}" for scope in SCOPES for name, _, _ in WINDOWS for stat in ("count", "sum")
+] + [f"{scope}_seconds_since_last" for scope in SCOPES]
+FEATURES = TIME_FEATURES + VELOCITY_FEATURES
+
+_SNAPSHOT_FORMAT = 1
+_WIDTHS = tuple(seconds / buckets for _, seconds, buckets in WINDOWS)
+_SIZES = tuple(buckets for _, _, buckets in WINDOWS)
+_OFFSETS = tuple(sum(_SIZES[:i]) for i in range(len(WINDOWS)))
+_TOTAL_BUCKETS = sum(_SIZES)
+_EMPTY_RINGS = tuple(array("d", bytes(8 * size)) for size in _SIZES)
+# Nomes das features por escopo: ((contagem, soma) por janela, segundos desde a última)
+_NAMES = {
+    scope: (tuple((f"{scope}_count_{name}", f"{scope}_sum_{name}") for name, _, _ in WINDOWS),
+            f"{scope}_seconds_since_last")
+    for scope in SCOPES
+}
+_EPOCH = datetime(1970, 1, 1)
+
+
+class _KeyState:
+    """
+    Anéis de buckets de todas as janelas de uma chave, em dois arrays contíguos
+    """
+    __slots__ = ("last_seen", "heads", "counts", "sums", "total_counts", "total_sums")
+
+    def __init__(self, timestamp: float):
+        self.last_seen = timestamp
+        self.heads = [int(timestamp // width) for width in _WIDTHS]
+        self.counts = array("d", bytes(8 * _TOTAL_BUCKETS))
+        self.sums = array("d", bytes(8 * _TOTAL_BUCKETS))
+        self.total_counts = [0.0] * len(WINDOWS)
+        self.total_sums = [0.0] * len(WINDOWS)
+
+    def copy(self) -> "_KeyState":
+        state = _KeyState.__new__(_KeyState)
+        state.last_seen = self.last_seen
+        state.heads = list(self.heads)
+        state.counts = array("d", self.counts)
+        state.sums = array("d", self.sums)
+        state.total_counts = list(self.total_counts)
+        state.total_sums = list(self.total_sums)
+        return state
+
+    def observe(self, timestamp: float, amount: float, features: Dict[str, Any], names, update: bool):
+        """
+        Move as janelas até `timestamp` (descontando os buckets que saíram delas),
+        escreve os totais em `features` e, com `update`, soma a transação
+        """
+        counts, sums, heads = self.counts, self.sums, self.heads
+        total_counts, total_sums = self.total_counts, self.total_sums
+        for w in range(len(_WIDTHS)):
+            bucket = int(timestamp // _WIDTHS[w])
+            head = heads[w]
+            size, offset = _SIZES[w], _OFFSETS[w]
+            if bucket > head:
+                if bucket - head >= size:
+                    # Janela inteira expirada (chave ociosa): zera o anel de uma vez
+                    counts[offset:offset + size] = sums[offset:offset + size] = _EMPTY_RINGS[w]
+                    total_counts[w] = total_sums[w] = 0.0
+                else:
+                    for index in range(head + 1, bucket + 1):
+                        slot = offset + index % size
+                        total_counts[w] -= counts[slot]
+                        total_sums[w] -= sums[slot]
+                        counts[slot] = 0.0
+                        sums[slot] = 0.0
+                    if total_counts[w] <= 0:
+                        total_counts[w] = total_sums[w] = 0.0  # sem resíduo de arredondamento
+                heads[w] = head = bucket
+            count_name, sum_name = names[w]
+            features[count_name] = total_counts[w]
+            features[sum_name] = total_sums[w]
+            if update and bucket > head - size:  # eventos atrasados além da janela não entram
+                slot = offset + bucket % size
+                counts[slot] += 1.0
+                sums[slot] += amount
+                total_counts[w] += 1.0
+                total_sums[w] += amount
+
+
+def _to_datetime(value: Any) -> datetime:
+    # Epoch numérico e ausência de horário viram UTC, nunca o fuso local do host
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    return datetime.now(timezone.utc)
+
+
+class FeatureStore:
+    """
+    Agregados deslizantes por chave, seguros para uso a partir de várias threads
+    """
+
+    def __init__(self, max_keys: int = 100_000, idle_seconds: float = MAX_SECONDS_SINCE_LAST):
+        self.max_keys = max_keys
+        self.idle_seconds = idle_seconds
+        self._keys: "OrderedDict[Tuple[str, str], _KeyState]" = OrderedDict()
+        self._clock = float("-inf")  # maior timestamp de evento visto
+        self._lock = threading.Lock()
+        self.updates = 0
+        self.evictions = 0
+        self._snapshotter: Optional[threading.Thread] = None
+        self._stop_snapshots = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def enrich(self, transaction: Dict[str, Any], update: bool = True) -> Dict[str, Any]:
+        """
+        Cópia da transação com as features de tempo e de velocidade; com
+        `update=True` a transação entra nos agregados depois da leitura
+        """
+        moment = _to_datetime(transaction.get("timestamp"))
+        # Horários sem fuso são tratados como UTC: só as diferenças importam
+        timestamp = moment.timestamp() if moment.tzinfo else (moment - _EPOCH).total_seconds()
+        amount = float(transaction.get("amount") or 0.0)
+        features = dict(transaction)
+        features["hour_of_day"] = moment.hour
+        features["day_of_week"] = moment.weekday()
+        with self._lock:
+            keys = self._keys
+            for scope in SCOPES:
+                window_names, since_name = _NAMES[scope]
+                key = (scope, str(transaction.get(scope)))
+                state = keys.get(key)
+                if state is None:
+                    if update:
+                        state = keys[key] = _KeyState(timestamp)
+                    features[since_name] = MAX_SECONDS_SINCE_LAST
+                else:
+                    if update:
+                        keys.move_to_end(key)
+                    since = timestamp - state.last_seen
+                    features[since_name] = (
+                        MAX_SECONDS_SINCE_LAST if since > MAX_SECONDS_SINCE_LAST else since if since > 0 else 0.0
+                    )
+                if state is None:
+                    for count_name, sum_name in window_names:
+                        features[count_name] = features[sum_name] = 0.0
+                    continue
+                state.observe(timestamp, amount, features, window_names, update)
+                if update and timestamp > state.last_seen:
+                    state.last_seen = timestamp
+            if update:
+                self.updates += 1
+                if timestamp > self._clock:
+                    self._clock = timestamp
+                self._evict()
+        return features
+
+    def enrich_many(self, transactions: Iterable[Dict[str, Any]], update: bool = True) -> List[Dict[str, Any]]:
+        """
+        Enriquece em ordem; para montar dados de treino, passe o histórico ordenado por timestamp
+        """
+        return [self.enrich(transaction, update) for transaction in transactions]
+
+    def preview_many(self, transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Mesmas features de `enrich_many(update=True)` (cada transação vê as
+        anteriores do lote), sem alterar os agregados: confirme com `record_many`
+        """
+        scratch = FeatureStore(max_keys=len(transactions) * len(SCOPES), idle_seconds=self.idle_seconds)
+        with self._lock:
+            for transaction in transactions:
+                for scope in SCOPES:
+                    key = (scope, str(transaction.get(scope)))
+                    state = self._keys.get(key)
+                    if state is not None and key not in scratch._keys:
+                        scratch._keys[key] = state.copy()
+            scratch._clock = self._clock
+        return scratch.enrich_many(transactions)
+
+    def record_many(self, transactions: Iterable[Dict[str, Any]]) -> int:
+        """
+        Soma aos agregados transações já pontuadas; retorna quantas
+        """
+        count = 0
+        for transaction in transactions:
+            self.enrich(transaction)
+            count += 1
+        return count
+
+    def _evict(self):
+        # As chaves ficam em ordem de atualização: basta olhar o início da fila
+        keys = self._keys
+        horizon = self._clock - self.idle_seconds
+        while keys:
+            key = next(iter(keys))
+            if len(keys) <= self.max_keys and keys[key].last_seen >= horizon:
+                break
+            del keys[key]
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._keys),
+            "max_keys": self.max_keys,
+            "updates": self.updates,
+            "evictions": self.evictions,
+            "windows": [name for name, _, _ in WINDOWS],
+            "approx_memory_mb": round(len(self._keys) * (2 * 8 * _TOTAL_BUCKETS + 400) / (1024 * 1024), 2),
+        }
+
+    def snapshot(self, path: str) -> int:
+        """
+        Grava o estado em `path` (troca atômica do arquivo); retorna o número de chaves
+        """
+        with self._lock:
+            state = {
+                "format": _SNAPSHOT_FORMAT,
+                "windows": WINDOWS,
+                "clock": self._clock,
+                "keys": [
+                    (key, s.last_seen, s.heads, s.counts.tobytes(), s.sums.tobytes(), s.total_counts, s.total_sums)
+                    for key, s in self._keys.items()
+                ],
+            }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return len(state["keys"])
+
+    def restore(self, path: str) -> int:
+        """
+        Substitui o estado pelo de um snapshot; retorna o número de chaves restauradas
+        """
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.get("format") != _SNAPSHOT_FORMAT or tuple(state.get("windows", ())) != WINDOWS:
+            raise ValueError(f"Incompatible feature store snapshot: {path}")
+        keys: "OrderedDict[Tuple[str, str], _KeyState]" = OrderedDict()
+        for key, last_seen, heads, counts, sums, total_counts, total_sums in state["keys"]:
+            key_state = _KeyState.__new__(_KeyState)
+            key_state.last_seen = last_seen
+            key_state.heads = list(heads)
+            key_state.counts = array("d", counts)
+            key_state.sums = array("d", sums)
+            key_state.total_counts = list(total_counts)
+            key_state.total_sums = list(total_sums)
+            keys[tuple(key)] = key_state
+        with self._lock:
+            self._keys = keys
+            self._clock = state["clock"]
+            self._evict()
+        return len(keys)
+
+    def start_snapshots(self, path: str, interval_seconds: float):
+        """
+        Grava snapshots periódicos em segundo plano
+        """
+        if self._snapshotter is not None or interval_seconds <= 0:
+            return
+        self._stop_snapshots.clear()
+
+        def run():
+            while not self._stop_snapshots.wait(interval_seconds):
+                try:
+                    self.snapshot(path)
+                except OSError:
+                    pass  # tenta de novo no próximo ciclo
+
+        self._snapshotter = threading.Thread(target=run, name="feature-store-snapshots", daemon=True)
+        self._snapshotter.start()
+
+    def stop_snapshots(self):
+        self._stop_snapshots.set()
+        if self._snapshotter is not None:
+            self._snapshotter.join(timeout=5)
+            self._snapshotter = None
@@ -0,0 +1,336 @@
+"""
+Camada de execução da inferência.
+
+- InferenceExecutor envia as chamadas de modelo para um pool de threads ou de
+  processos (com uma cópia aquecida dos modelos em cada processo) e recusa
+  trabalho quando a fila está cheia.
+- MicroBatcher agrupa requisições concorrentes de uma rota em lotes limitados
+  por tamanho máximo e tempo máximo de espera; cada lote é executado uma única
+  vez fora do event loop e o resultado de cada item é entregue ao seu chamador.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple, Union
+
+BatchFunction = Callable[[List[Any]], Union[Sequence[Any], Awaitable[Sequence[Any]]]]
+
+
+class InferenceOverloaded(Exception):
+    """
+    Fila de inferência cheia; o cliente deve tentar novamente após `retry_after` segundos
+    """
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__("Inference queue is full")
+        self.retry_after = retry_after
+
+
+# Cópia dos modelos mantida por cada processo do pool
+_worker_models = None
+
+
+def _init_worker(models, stage_observer=None):
+    global _worker_models
+    _worker_models = models
+    # Mesma medição por etapa do processo principal (ver metrics.py)
+    from . import ml_models
+    ml_models.stage_observer = stage_observer
+
+
+def _current_stage_observer():
+    from . import ml_models
+    return ml_models.stage_observer
+
+
+def _call_worker_model(method: str, args: tuple):
+    return getattr(_worker_models, method)(*args)
+
+
+def _call_model(models, method: str, args: tuple):
+    return getattr(models, method)(*args)
+
+
+class InferenceExecutor:
+    """
+    Executa métodos de FinancialMLModels fora do event loop.
+
+    `kind="thread"` usa um pool de threads dedicado que sempre lê os modelos
+    atuais de `models_provider`; `kind="process"` cria um pool de processos
+    em que cada worker recebe uma cópia dos modelos na inicialização.
+    Chamadas além de `max_workers + max_queue` são recusadas com
+    InferenceOverloaded.
+    """
+
+    def __init__(
+        self,
+        models_provider: Callable[[], Any],
+        kind: str = "thread",
+        max_workers: int = 0,
+        max_queue: int = 1024,
+        retry_after: int = 1,
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.models_provider = models_provider
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+        self.inflight = 0
+        self.completed = 0
+        self.rejected = 0
+        self._pool: Optional[Executor] = None
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_init_worker,
+                    initargs=(self.models_provider(), _current_stage_observer()),
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="inference"
+                )
+        return self._pool
+
+    async def run(self, method: str, *args) -> Any:
+        """
+        Executa `models.<method>(*args)` no pool e aguarda o resultado
+        """
+        if self.inflight >= self.capacity:
+            self.rejected += 1
+            raise InferenceOverloaded(self.retry_after)
+        self.inflight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            if self.kind == "process":
+                future = loop.run_in_executor(self._get_pool(), _call_worker_model, method, args)
+            else:
+                future = loop.run_in_executor(
+                    self._get_pool(), _call_model, self.models_provider(), method, args
+                )
+            result = await future
+            self.completed += 1
+            return result
+        finally:
+            self.inflight -= 1
+
+    def reset(self):
+        """
+        Descarta o pool atual; o próximo pool é criado com os modelos atuais.
+        Tarefas em andamento terminam no pool antigo.
+        """
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def shutdown(self):
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "inflight": self.inflight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+class BatchMetrics:
+    """
+    Métricas de um MicroBatcher: profundidade da fila, histograma de tamanho
+    de lote e tempo de espera dos itens antes do despacho
+    """
+
+    WAIT_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250)
+
+    def __init__(self, max_batch_size: int):
+        self.size_buckets = self._size_buckets(max_batch_size)
+        self.size_counts = [0] * len(self.size_buckets)
+        self.wait_counts = [0] * (len(self.WAIT_BUCKETS_MS) + 1)
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+
+    @staticmethod
+    def _size_buckets(max_batch_size: int) -> List[int]:
+        buckets, size = [], 1
+        while size < max_batch_size:
+            buckets.append(size)
+            size *= 2
+        buckets.append(max_batch_size)
+        return buckets
+
+    def observe_batch(self, size: int, waits: List[float], run_seconds: float):
+        self.batches += 1
+        self.items += size
+        self.run_seconds_total += run_seconds
+        for i, bound in enumerate(self.size_buckets):
+            if size <= bound:
+                self.size_counts[i] += 1
+                break
+        for wait in waits:
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            wait_ms = wait * 1000
+            for i, bound in enumerate(self.WAIT_BUCKETS_MS):
+                if wait_ms <= bound:
+                    self.wait_counts[i] += 1
+                    break
+            else:
+                self.wait_counts[-1] += 1
+
+    def snapshot(self, queue_depth: int) -> Dict[str, Any]:
+        wait_labels = [f"<={bound}ms" for bound in self.WAIT_BUCKETS_MS] + ["+Inf"]
+        return {
+            "queue_depth": queue_depth,
+            "batches": self.batches,
+            "items": self.items,
+            "errors": self.errors,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "batch_size_histogram": {
+                f"<={bound}": count for bound, count in zip(self.size_buckets, self.size_counts)
+            },
+            "mean_wait_ms": self.wait_seconds_total / self.items * 1000 if self.items else 0.0,
+            "max_wait_ms": self.wait_seconds_max * 1000,
+            "wait_histogram": dict(zip(wait_labels, self.wait_counts)),
+            "mean_batch_run_ms": self.run_seconds_total / self.batches * 1000 if self.batches else 0.0,
+        }
+
+
+class MicroBatcher:
+    """
+    Agrupa chamadas concorrentes de `submit` em lotes e executa `batch_fn`
+    uma vez por lote.
+
+    `batch_fn` recebe a lista de itens e deve retornar uma sequência de
+    resultados na mesma ordem. Funções síncronas rodam no executor padrão do
+    event loop; corrotinas (ex.: InferenceExecutor.run) são aguardadas
+    diretamente. Com mais de `max_queue` itens pendentes, `submit` levanta
+    InferenceOverloaded.
+    """
+
+    def __init__(
+        self,
+        batch_fn: BatchFunction,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        max_concurrency: int = 1,
+        max_queue: Optional[int] = None,
+        retry_after: int = 1,
+        name: str = "",
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.name = name
+        self.metrics = BatchMetrics(self.max_batch_size)
+        self._pending: Deque[Tuple[Any, asyncio.Future, float]] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._collector: Optional[asyncio.Task] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Enfileira um item e aguarda o resultado do lote em que ele for executado
+        """
+        if self.max_queue is not None and self.queue_depth >= self.max_queue:
+            raise InferenceOverloaded(self.retry_after)
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        self._wakeup.set()
+        return await future
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            **self.metrics.snapshot(self.queue_depth),
+        }
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._collector is not None and not self._collector.done():
+            return
+        # Novo event loop (ex.: outro TestClient) ou coletor encerrado: recria o estado
+        self._loop = loop
+        self._pending.clear()
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._collector = loop.create_task(self._collect())
+
+    async def _collect(self):
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            # Espera o lote encher ou o prazo do item mais antigo vencer
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            await self._slots.acquire()
+            size = min(len(self._pending), self.max_batch_size)
+            batch = [self._pending.popleft() for _ in range(size)]
+            self._loop.create_task(self._execute(batch))
+
+    async def _execute(self, batch: List[Tuple[Any, asyncio.Future, float]]):
+        started = time.perf_counter()
+        waits = [started - enqueued for _, _, enqueued in batch]
+        try:
+            results = await self._run_batch([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"{self.name or 'batch_fn'} returned {len(results)} results for {len(batch)} items"
+                )
+        except Exception as exc:
+            self.metrics.errors += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self.metrics.observe_batch(len(batch), waits, time.perf_counter() - started)
+            self._slots.release()
+
+    async def _run_batch(self, items: List[Any]) -> Sequence[Any]:
+        if asyncio.iscoroutinefunction(self.batch_fn):
+            return await self.batch_fn(items)
+        return await self._loop.run_in_executor(None, self.batch_fn, items)
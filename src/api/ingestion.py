@@ -0,0 +1,195 @@
+"""
+Análise de arquivos enviados e ingestão de CSV em streaming.
+
+Um CSV é lido em blocos de linhas com `pd.read_csv(chunksize=...)` e as
+estatísticas (linhas, perfil das colunas, qualidade dos dados e, opcionalmente,
+scores de fraude) são acumuladas bloco a bloco. A memória fica limitada ao
+tamanho do bloco, independentemente do tamanho do arquivo. Cada bloco também
+pode ser repassado a um destino (`chunk_sink`, ex.: o arquivo colunar).
+"""
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Recebe um bloco do CSV e retorna a probabilidade de fraude de cada linha
+ChunkScorer = Callable[[pd.DataFrame], np.ndarray]
+# Recebe cada bloco do CSV depois do perfil (ex.: TransactionArchive.append_frame)
+ChunkSink = Callable[[pd.DataFrame], Any]
+
+
+class ColumnProfile:
+    """
+    Estatísticas acumuladas de uma coluna
+    """
+
+    def __init__(self):
+        self.non_null = 0
+        self.nulls = 0
+        self.numeric = True
+        self.total = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+
+    def update(self, values: pd.Series):
+        nulls = int(values.isna().sum())
+        self.nulls += nulls
+        self.non_null += len(values) - nulls
+        if not self.numeric:
+            return
+        if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            # Uma vez texto, a coluna deixa de ser numérica para o resto do arquivo
+            self.numeric = not values.notna().any()
+            return
+        present = values.dropna()
+        if len(present):
+            self.total += float(present.sum())
+            self.minimum = min(self.minimum, float(present.min()))
+            self.maximum = max(self.maximum, float(present.max()))
+
+    def result(self) -> Dict[str, Any]:
+        count = self.non_null + self.nulls
+        profile = {
+            "type": "numeric" if self.numeric else "text",
+            "non_null": self.non_null,
+            "null_ratio": round(self.nulls / count, 4) if count else 0.0,
+        }
+        if self.numeric and self.non_null:
+            profile.update({
+                "min": self.minimum,
+                "max": self.maximum,
+                "mean": self.total / self.non_null,
+            })
+        return profile
+
+
+class CSVProfiler:
+    """
+    Perfil incremental de um CSV, alimentado bloco a bloco
+    """
+
+    def __init__(self, fraud_scorer: Optional[ChunkScorer] = None, high_risk_threshold: float = 0.7):
+        self.rows = 0
+        self.chunks = 0
+        self.columns: Dict[str, ColumnProfile] = {}
+        self.fraud_scorer = fraud_scorer
+        self.high_risk_threshold = high_risk_threshold
+        self.scored_rows = 0
+        self.fraud_probability_sum = 0.0
+        self.high_risk_rows = 0
+
+    def update(self, chunk: pd.DataFrame):
+        self.rows += len(chunk)
+        self.chunks += 1
+        for name in chunk.columns:
+            self.columns.setdefault(name, ColumnProfile()).update(chunk[name])
+        if self.fraud_scorer is not None and 'amount' in chunk.columns:
+            scores = np.asarray(self.fraud_scorer(chunk))
+            self.scored_rows += len(scores)
+            self.fraud_probability_sum += float(scores.sum())
+            self.high_risk_rows += int((scores > self.high_risk_threshold).sum())
+
+    def data_quality_score(self) -> float:
+        """
+        Percentual de células preenchidas
+        """
+        cells = sum(c.non_null + c.nulls for c in self.columns.values())
+        if not cells:
+            return 0.0
+        filled = sum(c.non_null for c in self.columns.values())
+        return round(100.0 * filled / cells, 2)
+
+    def result(self) -> Dict[str, Any]:
+        analysis = {
+            "rows_processed": self.rows,
+            "columns_detected": len(self.columns),
+            "data_quality_score": self.data_quality_score(),
+            "chunks": self.chunks,
+            "columns": {name: profile.result() for name, profile in self.columns.items()},
+        }
+        if self.fraud_scorer is not None:
+            analysis["fraud"] = {
+                "rows_scored": self.scored_rows,
+                "mean_fraud_probability": (
+                    round(self.fraud_probability_sum / self.scored_rows * 100, 2) if self.scored_rows else None
+                ),
+                "high_risk_rows": self.high_risk_rows,
+            }
+        return analysis
+
+
+def profile_csv(
+    source: BinaryIO,
+    chunk_rows: int = 100_000,
+    fraud_scorer: Optional[ChunkScorer] = None,
+    chunk_sink: Optional[ChunkSink] = None,
+) -> Dict[str, Any]:
+    """
+    Lê um CSV em blocos de `chunk_rows` linhas e retorna o perfil acumulado.
+
+    Função síncrona: no servidor, execute em uma thread (run_in_threadpool).
+    """
+    profiler = CSVProfiler(fraud_scorer)
+    try:
+        reader = pd.read_csv(source, chunksize=chunk_rows)
+        for chunk in reader:
+            profiler.update(chunk)
+            if chunk_sink is not None:
+                chunk_sink(chunk)
+    except pd.errors.EmptyDataError:
+        pass  # arquivo vazio: perfil zerado
+    return profiler.result()
+
+
+def analyze_upload(
+    source: BinaryIO,
+    filename: str,
+    content_type: Optional[str],
+    chunk_rows: int = 100_000,
+    fraud_scorer: Optional[ChunkScorer] = None,
+    chunk_sink: Optional[ChunkSink] = None,
+) -> Dict[str, Any]:
+    """
+    Analisa um arquivo enviado de acordo com o tipo de conteúdo.
+
+    Função síncrona, usada por /upload e pelos workers de jobs.
+    """
+    if content_type == 'application/pdf':
+        # Simulate PDF analysis
+        return {
+            'filename': filename,
+            'type': 'PDF',
+            'analysis': {
+                'contract_type': 'Loan Agreement',
+                'risk_score': round(np.random.uniform(60, 95), 2),
+                'key_terms_detected': ['interest_rate', 'payment_schedule', 'collateral']
+            }
+        }
+
+    if content_type in ['image/png', 'image/jpeg']:
+        # Simulate image analysis
+        return {
+            'filename': filename,
+            'type': 'Image',
+            'analysis': {
+                'document_type': 'Bank Statement',
+                'confidence_score': round(np.random.uniform(85, 99), 2),
+                'extracted_data': {
+                    'account_number': 'XXXX-XX' + str(np.random.randint(1000, 9999)),
+                    'total_amount': round(np.random.uniform(1000, 50000), 2)
+                }
+            }
+        }
+
+    if content_type == 'text/csv':
+        return {
+            'filename': filename,
+            'type': 'CSV',
+            'analysis': profile_csv(source, chunk_rows, fraud_scorer, chunk_sink)
+        }
+
+    return {
+        'filename': filename,
+        'type': 'Unknown',
+        'analysis': None
+    }
@@ -0,0 +1,416 @@
+"""
+Jobs assíncronos para análise de arquivos grandes.
+
+Uploads são gravados em disco e enfileirados; a requisição retorna o id do
+job imediatamente e workers processam os arquivos em paralelo. O estado dos
+jobs fica em um JobStore plugável:
+
+- memory://                 processo atual (padrão, desenvolvimento)
+- sqlite:///caminho/jobs.db compartilhado entre workers da mesma máquina
+- redis://host:6379/0       compartilhado entre máquinas
+
+A fila de trabalho vive no processo: jobs "queued"/"running" de um worker que
+morreu são marcados como falhos no startup (JobManager.recover) e seus
+arquivos de spool removidos.
+"""
+import asyncio
+import glob
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import closing
+from datetime import datetime
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+TERMINAL_STATUSES = (COMPLETED, FAILED)
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+INTERRUPTED_ERROR = "job interrupted: the worker processing it stopped"
+
+# (arquivo, nome, content-type) -> resultado da análise
+FileProcessor = Callable[[BinaryIO, str, Optional[str]], Dict[str, Any]]
+
+
+def worker_id() -> str:
+    """
+    Identifica o processo dono de um job (host:pid)
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def new_job(files: List[Dict[str, Any]], job_id: Optional[str] = None) -> Dict[str, Any]:
+    now = datetime.now().isoformat()
+    return {
+        "id": job_id or uuid.uuid4().hex,
+        "status": QUEUED,
+        "worker": worker_id(),
+        "created_at": now,
+        "updated_at": now,
+        "files_total": len(files),
+        "files_done": 0,
+        "files": [{"filename": f["filename"], "content_type": f["content_type"]} for f in files],
+        "results": [None] * len(files),
+        "errors": [],
+    }
+
+
+class JobStore(ABC):
+    """
+    Interface de persistência dos jobs. `modify` deve ser atômico: vários
+    arquivos do mesmo job terminam em paralelo.
+    """
+
+    @abstractmethod
+    def create(self, job: Dict[str, Any]):
+        ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def modify(self, job_id: str, change: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Leitura-modificação-escrita atômica; KeyError se o job não existe
+        """
+
+    @abstractmethod
+    def active_jobs(self) -> Iterator[Dict[str, Any]]:
+        """
+        Jobs ainda não terminados (ACTIVE_STATUSES)
+        """
+
+    def set_status(self, job_id: str, status: str):
+        def change(job):
+            job["status"] = status
+            job["updated_at"] = datetime.now().isoformat()
+            return job
+        self.modify(job_id, change)
+
+    def update_file(self, job_id: str, index: int, result: Optional[Dict[str, Any]] = None,
+                    error: Optional[str] = None) -> Dict[str, Any]:
+        return self.modify(job_id, lambda job: self._apply_file_update(job, index, result, error))
+
+    def fail(self, job_id: str, error: str) -> Dict[str, Any]:
+        """
+        Encerra um job não terminado como falho
+        """
+        def change(job):
+            if job["status"] in ACTIVE_STATUSES:
+                job["status"] = FAILED
+                job["errors"].append({"filename": None, "error": error})
+                job["updated_at"] = datetime.now().isoformat()
+            return job
+        return self.modify(job_id, change)
+
+    @staticmethod
+    def _apply_file_update(job: Dict[str, Any], index: int, result, error) -> Dict[str, Any]:
+        if error is not None:
+            job["errors"].append({"filename": job["files"][index]["filename"], "error": error})
+        else:
+            job["results"][index] = result
+        job["files_done"] += 1
+        if job["files_done"] >= job["files_total"]:
+            job["status"] = FAILED if job["errors"] and len(job["errors"]) == job["files_total"] else COMPLETED
+        job["updated_at"] = datetime.now().isoformat()
+        return job
+
+
+class InMemoryJobStore(JobStore):
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job):
+        with self._lock:
+            self._jobs[job["id"]] = json.loads(json.dumps(job))
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job is not None else None
+
+    def modify(self, job_id, change):
+        with self._lock:
+            job = change(self._jobs[job_id])
+            return json.loads(json.dumps(job))
+
+    def active_jobs(self):
+        with self._lock:
+            jobs = [json.loads(json.dumps(job)) for job in self._jobs.values() if job["status"] in ACTIVE_STATUSES]
+        return iter(jobs)
+
+
+class SQLiteJobStore(JobStore):
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def create(self, job):
+        with closing(self._connect()) as conn:
+            conn.execute("INSERT INTO jobs (id, data) VALUES (?, ?)", (job["id"], json.dumps(job)))
+
+    def get(self, job_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def modify(self, job_id, change):
+        # BEGIN IMMEDIATE serializa a leitura-modificação-escrita entre processos
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if row is None:
+                    raise KeyError(job_id)
+                job = change(json.loads(row[0]))
+                conn.execute("UPDATE jobs SET data = ? WHERE id = ?", (json.dumps(job), job_id))
+                conn.execute("COMMIT")
+                return job
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+
+    def active_jobs(self):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT data FROM jobs WHERE json_extract(data, '$.status') IN (?, ?)", ACTIVE_STATUSES
+            ).fetchall()
+        return (json.loads(row[0]) for row in rows)
+
+
+class RedisJobStore(JobStore):
+    def __init__(self, url: str, ttl_seconds: int = 7 * 24 * 3600, prefix: str = "financeai:job:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def _key(self, job_id: str) -> str:
+        return self.prefix + job_id
+
+    def create(self, job):
+        self.client.set(self._key(job["id"]), json.dumps(job), ex=self.ttl_seconds)
+
+    def get(self, job_id):
+        data = self.client.get(self._key(job_id))
+        return json.loads(data) if data else None
+
+    def modify(self, job_id, change):
+        import redis
+
+        key = self._key(job_id)
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    data = pipe.get(key)
+                    if data is None:
+                        raise KeyError(job_id)
+                    job = change(json.loads(data))
+                    pipe.multi()
+                    pipe.set(key, json.dumps(job), ex=self.ttl_seconds)
+                    pipe.execute()
+                    return job
+                except redis.WatchError:
+                    continue
+
+    def active_jobs(self):
+        for key in self.client.scan_iter(match=self.prefix + "*", count=1000):
+            data = self.client.get(key)
+            if data:
+                job = json.loads(data)
+                if job["status"] in ACTIVE_STATUSES:
+                    yield job
+
+
+def create_job_store(url: str) -> JobStore:
+    """
+    Cria o JobStore a partir de uma URL (memory://, sqlite:///caminho, redis://...)
+    """
+    if url in ("memory://", "memory", ""):
+        return InMemoryJobStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteJobStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisJobStore(url)
+    raise ValueError(f"Unsupported job store URL: {url}")
+
+
+class JobManager:
+    """
+    Recebe uploads, persiste o estado no JobStore e processa os arquivos com
+    `workers` tarefas concorrentes; cada arquivo é analisado em uma thread.
+    """
+
+    def __init__(self, store: JobStore, processor: FileProcessor, workers: int = 4,
+                 spool_dir: Optional[str] = None):
+        self.store = store
+        self.processor = processor
+        self.workers = max(1, workers)
+        self.spool_dir = spool_dir or tempfile.gettempdir()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks and not all(t.done() for t in self._tasks):
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, uploads: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Copia os uploads para o diretório de spool e enfileira o job.
+
+        `uploads` é uma lista de {"file": arquivo binário, "filename", "content_type"}.
+        """
+        self._ensure_started()
+        os.makedirs(self.spool_dir, exist_ok=True)
+        job_id = uuid.uuid4().hex
+        files = []
+        for index, upload in enumerate(uploads):
+            fd, path = tempfile.mkstemp(prefix=self._spool_prefix(job_id, index), dir=self.spool_dir)
+            with os.fdopen(fd, "wb") as target:
+                await run_in_threadpool(shutil.copyfileobj, upload["file"], target, 1024 * 1024)
+            files.append({"path": path, "filename": upload["filename"], "content_type": upload["content_type"]})
+
+        job = new_job(files, job_id)
+        await run_in_threadpool(self.store.create, job)
+        for index, spec in enumerate(files):
+            self._queue.put_nowait((job["id"], index, spec))
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id, index, spec = await self._queue.get()
+            try:
+                await self._process(job_id, index, spec)
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, job_id: str, index: int, spec: Dict[str, Any]):
+        await run_in_threadpool(self._mark_running, job_id)
+        result, error = None, None
+        try:
+            result = await run_in_threadpool(self._analyze, spec)
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        finally:
+            try:
+                os.remove(spec["path"])
+            except OSError:
+                pass
+        await run_in_threadpool(self.store.update_file, job_id, index, result, error)
+
+    def _mark_running(self, job_id: str):
+        job = self.store.get(job_id)
+        if job is not None and job["status"] == QUEUED:
+            self.store.set_status(job_id, RUNNING)
+
+    def _analyze(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        with open(spec["path"], "rb") as f:
+            return self.processor(f, spec["filename"], spec["content_type"])
+
+    @staticmethod
+    def _spool_prefix(job_id: str, index: int) -> str:
+        return f"financeai-job-{job_id}-{index}-"
+
+    def recover(self, stale_seconds: float = 0) -> int:
+        """
+        Marca como falhos os jobs não terminados cujo worker não existe mais e remove
+        seus arquivos de spool; retorna quantos foram encerrados. Rode no startup,
+        antes de aceitar jobs.
+
+        Um job é órfão se o worker era deste host e o processo não está vivo, ou se
+        não é atualizado há mais de `stale_seconds` (0 desativa; para workers em
+        outros hosts, que não podem ser verificados).
+        """
+        recovered = 0
+        for job in list(self.store.active_jobs()):
+            if not self._is_orphan(job, stale_seconds):
+                continue
+            try:
+                self.store.fail(job["id"], INTERRUPTED_ERROR)
+            except KeyError:
+                continue
+            for path in glob.glob(os.path.join(glob.escape(self.spool_dir), f"financeai-job-{job['id']}-*")):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            recovered += 1
+        return recovered
+
+    @staticmethod
+    def _is_orphan(job: Dict[str, Any], stale_seconds: float) -> bool:
+        host, _, pid = job.get("worker", "").rpartition(":")
+        if host == socket.gethostname() and pid.isdigit():
+            if int(pid) == os.getpid():
+                return True  # fila deste processo ainda vazia: o pid foi reutilizado
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                return True
+            except PermissionError:
+                pass
+            return False
+        if stale_seconds <= 0:
+            return False
+        age = time.time() - datetime.fromisoformat(job["updated_at"]).timestamp()
+        return age > stale_seconds
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def wait_idle(self):
+        if self._queue is not None:
+            await self._queue.join()
+
+
+def progress(job: Dict[str, Any]) -> float:
+    if not job["files_total"]:
+        return 100.0
+    return round(100.0 * job["files_done"] / job["files_total"], 2)
+
+
+async def stream_job(store: JobStore, job_id: str, poll_seconds: float = 0.25, timeout: float = 3600):
+    """
+    Gera linhas NDJSON com o estado do job sempre que ele muda, até terminar
+    """
+    last_update = None
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = await run_in_threadpool(store.get, job_id)
+        if job is None:
+            return
+        if job["updated_at"] != last_update or job["status"] in TERMINAL_STATUSES:
+            last_update = job["updated_at"]
+            yield json.dumps({**job, "progress": progress(job)}) + "\n"
+        if job["status"] in TERMINAL_STATUSES:
+            return
+        await asyncio.sleep(poll_seconds)
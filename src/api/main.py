@@ -1,19 +1,39 @@
-from fastapi import FastAPI, HTTPException, Request, UploadFile, File
+from fastapi import FastAPI, HTTPException, Query, Request, UploadFile, File, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.openapi.utils import get_openapi
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import random
-from functools import lru_cache
 import asyncio
+import threading
+import time
 from fastapi.encoders import jsonable_encoder
 import json
 from .ml_models import FinancialMLModels
+from .inference import InferenceExecutor, InferenceOverloaded, MicroBatcher
+from .model_manager import ModelManager, ReloadInProgress
+from .ingestion import analyze_upload
+from .jobs import JobManager, create_job_store, progress, stream_job
+from .storage import DEFAULT_DATABASE_URL, TransactionStore
+from .aggregates import bucket_label, with_trend
+from .cache import RedisCacheBackend, ResponseCache, create_cache_backend
+from .prediction_cache import PredictionCache, canonical_key
+from .feature_store import FeatureStore
+from .archive import TransactionArchive, amount_band
+from .streaming import DuplexStreamingResponse, StreamStats, score_stream
+from .serialization import FastJSONResponse
+from .metrics import (
+    CONTENT_TYPE_LATEST, PrometheusMiddleware, install_model_hooks, record_rows, record_upload, render_metrics,
+)
+from starlette.concurrency import run_in_threadpool
+from src.models.registry import current_rss_mb
+from src.models.delinquency_prediction import FEATURES as DELINQUENCY_FEATURES, DelinquencyPredictionModel
+from src.models.fraud_detection import FEATURES as BOLETO_FEATURES, FraudDetectionModel
 import os
 
 # Importando configurações
@@ -32,6 +52,14 @@ class TransactionData(BaseModel):
     merchant: str
     timestamp: datetime
     category: str
+    is_fraud: Optional[bool] = None
+    is_delinquent: Optional[bool] = None
+
+class FraudBatchRequest(BaseModel):
+    transactions: List[TransactionData] = Field(..., min_length=1, max_length=10000)
+
+class TransactionBulkRequest(BaseModel):
+    transactions: List[TransactionData] = Field(..., min_length=1)
 
 class RiskAnalysisRequest(BaseModel):
     income: float
@@ -40,6 +68,28 @@ class RiskAnalysisRequest(BaseModel):
     num_credit_lines: int
     payment_history_score: float
 
+class ContractData(BaseModel):
+    historico_pagamentos: float
+    valor_contrato: float
+    prazo_contrato: float
+    score_credito: float
+    renda: float
+    tempo_emprego: float
+    quantidade_parcelas_pagas: float
+    taxa_utilizacao_credito: float
+
+class DelinquencyBatchRequest(BaseModel):
+    contracts: List[ContractData] = Field(..., min_length=1)
+
+class BoletoData(BaseModel):
+    valor_boleto: float
+    tempo_cliente: float
+    frequencia_pagamentos: float
+    valor_medio_transacoes: float
+
+class BoletoBatchRequest(BaseModel):
+    boletos: List[BoletoData] = Field(..., min_length=1)
+
 class TransactionHistory(BaseModel):
     name: str
     value: float
@@ -59,8 +109,6 @@ class DashboardResponse(BaseModel):
     delinquency_rate: float
     transaction_history: List[Dict[str, float | str]]
 
-# Cache para dados do dashboard
-@lru_cache(maxsize=1)
 def generate_mock_data():
     end_date = datetime.now()
     start_date = end_date - timedelta(days=30)
@@ -108,7 +156,7 @@ def generate_sample_data():
         })
     
     # Generate fraud metrics
-    fraud_dates = pd.date_range(end=datetime.now(), periods=12, freq='M')
+    fraud_dates = pd.date_range(end=datetime.now(), periods=12, freq='ME')
     fraud_metrics = []
     fraud_base = 50
     
@@ -120,7 +168,7 @@ def generate_sample_data():
         })
     
     # Generate default risk data
-    risk_dates = pd.date_range(end=datetime.now(), periods=8, freq='Q')
+    risk_dates = pd.date_range(end=datetime.now(), periods=8, freq='QE')
     default_risk = []
     risk_base = 15
     
@@ -143,6 +191,51 @@ def generate_sample_data():
         }
     }
 
+def build_dashboard_data(store: TransactionStore) -> Optional[DashboardData]:
+    """
+    DashboardData a partir dos agregados; None se ainda não há transações
+    """
+    total = store.rollup_total()
+    if total is None:
+        return None
+    daily = store.rollup_series("day", 30)
+    return DashboardData(
+        total_transactions=total["count"],
+        average_transaction=total["mean"],
+        fraud_rate=total["fraud_rate"],
+        delinquency_rate=total["delinquency_rate"],
+        transaction_history=[TransactionHistory(**point) for point in with_trend(daily, "day")]
+    )
+
+def build_dashboard(store: TransactionStore) -> Optional[Dict]:
+    """
+    Dados de /dashboard a partir dos agregados; None se ainda não há transações
+    """
+    total = store.rollup_total()
+    if total is None:
+        return None
+    transactions = with_trend(store.rollup_series("day", 30), "day")
+    # Fraudes em ‰ por mês e inadimplência em % por trimestre, como em generate_sample_data
+    fraud_metrics = [
+        {'name': bucket_label("month", stats['bucket']), 'value': round(stats['fraud_rate'] * 1000, 2)}
+        for stats in store.rollup_series("month", 12)
+    ]
+    default_risk = [
+        {'name': bucket_label("quarter", stats['bucket']), 'value': round(stats['delinquency_rate'] * 100, 2)}
+        for stats in store.rollup_series("quarter", 8)
+    ]
+    return {
+        'transactionHistory': transactions,
+        'fraudMetrics': fraud_metrics,
+        'defaultRisk': default_risk,
+        'metrics': {
+            'totalTransactions': sum(t['value'] for t in transactions),
+            'averageTransaction': sum(t['value'] for t in transactions) / len(transactions),
+            'fraudRate': fraud_metrics[-1]['value'] / 1000,
+            'defaultRate': default_risk[-1]['value'] / 100
+        }
+    }
+
 # Aplicação FastAPI
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -159,16 +252,230 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize ML models
-ml_models = FinancialMLModels()
+# Initialize ML models and load pre-trained ones if they exist.
+# Em modo preguiçoso a carga (e o import de sklearn/xgboost) fica para o primeiro
+# uso ou para o aquecimento em segundo plano no startup
+model_manager = ModelManager(
+    settings.MODELS_PATH,
+    factory=lambda: FinancialMLModels(compiled=settings.COMPILED_MODELS),
+    mmap_mode=settings.MODEL_MMAP_MODE,
+    lazy=settings.MODEL_LAZY_LOADING,
+)
+
+# Modelos de inadimplência (XGBoost) e de fraude em boletos, criados no primeiro uso
+delinquency_model: Optional[DelinquencyPredictionModel] = None
+boleto_fraud_model: Optional[FraudDetectionModel] = None
+_model_load_lock = threading.Lock()
+
+def get_delinquency_model() -> DelinquencyPredictionModel:
+    global delinquency_model
+    with _model_load_lock:
+        if delinquency_model is None:
+            model = DelinquencyPredictionModel()
+            if os.path.exists(settings.DELINQUENCY_MODEL_PATH):
+                try:
+                    model.load_model(settings.DELINQUENCY_MODEL_PATH, mmap_mode=settings.MODEL_MMAP_MODE)
+                except Exception:
+                    print("No pre-trained delinquency model found.")
+            delinquency_model = model
+    return delinquency_model
+
+def get_boleto_fraud_model() -> FraudDetectionModel:
+    global boleto_fraud_model
+    with _model_load_lock:
+        if boleto_fraud_model is None:
+            model = FraudDetectionModel(anomaly_weight=settings.BOLETO_ANOMALY_WEIGHT)
+            if os.path.exists(settings.BOLETO_FRAUD_MODEL_PATH):
+                try:
+                    model.load_model(settings.BOLETO_FRAUD_MODEL_PATH, mmap_mode=settings.MODEL_MMAP_MODE)
+                except Exception:
+                    print("No pre-trained boleto fraud model found.")
+            boleto_fraud_model = model
+    return boleto_fraud_model
+
+async def loaded_models() -> FinancialMLModels:
+    """
+    Modelos ativos; a carga preguiçosa roda numa thread, sem bloquear o event loop
+    """
+    if not model_manager.loaded:
+        await run_in_threadpool(model_manager.load_initial)
+    return model_manager.current
+
+if not settings.MODEL_LAZY_LOADING:
+    model_manager.load_initial()
+    get_delinquency_model()
+    get_boleto_fraud_model()
 
-# Load pre-trained models if they exist
-models_path = "models"
-if os.path.exists(models_path):
+# Aquecimento em segundo plano: /health responde desde o boot, /ready só depois dele
+warmup_status: Dict = {"state": "pending", "seconds": None, "error": None}
+
+def warm_up_models():
+    start = time.perf_counter()
+    warmup_status["state"] = "warming"
     try:
-        ml_models.load_models(models_path)
-    except:
-        print("No pre-trained models found. Will train new ones.")
+        model_manager.prepare()
+        get_delinquency_model()
+        get_boleto_fraud_model()
+        warmup_status["state"] = "ready"
+    except Exception as e:
+        warmup_status.update(state="failed", error=f"{type(e).__name__}: {e}")
+    finally:
+        warmup_status["seconds"] = round(time.perf_counter() - start, 4)
+
+# Pool de execução da inferência, fora do event loop
+inference_executor = InferenceExecutor(
+    lambda: model_manager.current,
+    kind=settings.INFERENCE_EXECUTOR,
+    max_workers=settings.INFERENCE_WORKERS,
+    max_queue=settings.INFERENCE_MAX_QUEUE,
+    retry_after=settings.INFERENCE_RETRY_AFTER_SECONDS,
+)
+
+async def score_fraud_batch(transactions: List[dict]):
+    return await inference_executor.run("detect_fraud_batch", transactions)
+
+async def score_risk_batch(clients: List[dict]):
+    return await inference_executor.run("analyze_risk_batch", clients)
+
+# Micro-batching das rotas de inferência online
+fraud_batcher = MicroBatcher(
+    score_fraud_batch,
+    max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+    max_wait_ms=settings.INFERENCE_MAX_WAIT_MS,
+    max_concurrency=inference_executor.max_workers,
+    max_queue=settings.INFERENCE_MAX_QUEUE,
+    retry_after=settings.INFERENCE_RETRY_AFTER_SECONDS,
+    name="detect_fraud",
+)
+risk_batcher = MicroBatcher(
+    score_risk_batch,
+    max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+    max_wait_ms=settings.INFERENCE_MAX_WAIT_MS,
+    max_concurrency=inference_executor.max_workers,
+    max_queue=settings.INFERENCE_MAX_QUEUE,
+    retry_after=settings.INFERENCE_RETRY_AFTER_SECONDS,
+    name="analyze_risk",
+)
+
+# Features de velocidade por estabelecimento e categoria, atualizadas a cada transação pontuada
+feature_store = FeatureStore(max_keys=settings.FEATURE_STORE_MAX_KEYS)
+
+# Arquivo colunar das transações ingeridas e dos CSVs enviados, para consultas analíticas
+archive: Optional[TransactionArchive] = (
+    TransactionArchive(settings.ARCHIVE_PATH, flush_rows=settings.ARCHIVE_FLUSH_ROWS)
+    if settings.ARCHIVE_PATH else None
+)
+
+# Predições repetidas (mesmo vetor de features e versão do modelo) saem do cache
+prediction_cache = PredictionCache(
+    max_entries=settings.PREDICTION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS,
+    shared=(RedisCacheBackend(settings.PREDICTION_CACHE_URL, prefix="financeai:predictions:")
+            if settings.PREDICTION_CACHE_URL else None),
+)
+
+# Pools de processos guardam cópias dos modelos: recria após cada recarga
+model_manager.on_swap.append(lambda new, old: inference_executor.reset())
+# Versão nova: as entradas locais da anterior não servem mais
+model_manager.on_swap.append(lambda new, old: prediction_cache.invalidate())
+
+@app.on_event("startup")
+def start_model_watcher():
+    model_manager.start_watching(settings.MODEL_WATCH_INTERVAL_SECONDS)
+
+@app.on_event("startup")
+def start_model_warmup():
+    if settings.MODEL_WARMUP_ON_STARTUP and warmup_status["state"] == "pending":
+        threading.Thread(target=warm_up_models, name="model-warmup", daemon=True).start()
+
+@app.on_event("startup")
+def restore_feature_store():
+    path = settings.FEATURE_STORE_SNAPSHOT_PATH
+    if not path:
+        return
+    if os.path.exists(path):
+        try:
+            feature_store.restore(path)
+        except Exception as e:
+            print(f"Could not restore feature store snapshot: {e}")
+    feature_store.start_snapshots(path, settings.FEATURE_STORE_SNAPSHOT_INTERVAL_SECONDS)
+
+@app.on_event("startup")
+def start_archive_flusher():
+    if archive is not None:
+        archive.start_flusher(settings.ARCHIVE_FLUSH_INTERVAL_SECONDS, settings.ARCHIVE_COMPACT_INTERVAL_SECONDS)
+
+@app.on_event("shutdown")
+def shutdown_inference():
+    model_manager.stop_watching()
+    inference_executor.shutdown()
+
+@app.on_event("shutdown")
+def snapshot_feature_store():
+    if settings.FEATURE_STORE_SNAPSHOT_PATH:
+        feature_store.stop_snapshots()
+        feature_store.snapshot(settings.FEATURE_STORE_SNAPSHOT_PATH)
+
+@app.on_event("shutdown")
+def flush_archive():
+    if archive is not None:
+        archive.stop_flusher()
+        archive.flush()
+
+@app.exception_handler(InferenceOverloaded)
+async def inference_overloaded_handler(request: Request, exc: InferenceOverloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Inference queue is full, retry later"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+def archive_sink():
+    return archive.append_frame if archive is not None else None
+
+def record_csv_rows(result: dict, source: str) -> dict:
+    if result.get('type') == 'CSV':
+        record_rows(source, result['analysis']['rows_processed'])
+    return result
+
+# Jobs em segundo plano para uploads grandes
+def process_job_file(source, filename: str, content_type: Optional[str]) -> dict:
+    result = analyze_upload(source, filename, content_type, settings.UPLOAD_CSV_CHUNK_ROWS,
+                            chunk_sink=archive_sink())
+    return record_csv_rows(result, "job_csv")
+
+job_manager = JobManager(
+    create_job_store(settings.JOB_STORE_URL),
+    process_job_file,
+    workers=settings.JOB_WORKERS,
+    spool_dir=settings.JOB_SPOOL_DIR,
+)
+
+@app.on_event("startup")
+def recover_jobs():
+    # A fila vive no processo: jobs de workers que morreram nunca terminariam
+    recovered = job_manager.recover(settings.JOB_STALE_SECONDS)
+    if recovered:
+        print(f"Marked {recovered} interrupted job(s) as failed")
+
+# Armazenamento de transações, criado no primeiro uso
+transaction_store: Optional[TransactionStore] = None
+
+def get_transaction_store() -> TransactionStore:
+    global transaction_store
+    if transaction_store is None:
+        transaction_store = TransactionStore(
+            settings.DATABASE_URL or DEFAULT_DATABASE_URL,
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        )
+    return transaction_store
+
+# Cache das respostas dos dashboards, invalidado a cada nova transação
+response_cache = ResponseCache(
+    create_cache_backend(settings.RESPONSE_CACHE_URL, settings.RESPONSE_CACHE_MAX_ENTRIES),
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
 
 # Middleware para tratamento global de erros
 @app.middleware("http")
@@ -181,6 +488,17 @@ async def error_handler(request: Request, call_next):
             content={"detail": f"Internal Server Error: {str(e)}"}
         )
 
+# Métricas Prometheus: latência por rota, requisições em andamento e etapas dos modelos
+if settings.METRICS_ENABLED:
+    install_model_hooks()
+    app.add_middleware(PrometheusMiddleware)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    return Response(content=await run_in_threadpool(render_metrics), media_type=CONTENT_TYPE_LATEST)
+
 # Rota raiz
 @app.get("/")
 async def root():
@@ -206,18 +524,65 @@ async def health_check():
     """
     return {
         "status": "healthy",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now().isoformat(),
+        "model_version": model_manager.version,
+        "models_ready": model_manager.ready
+    }
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Prontidão: 200 quando os modelos estão carregados e aquecidos, 503 antes disso
+    """
+    state = warmup_status["state"]
+    if state == "pending" and not settings.MODEL_WARMUP_ON_STARTUP and model_manager.loaded:
+        # Sem aquecimento no startup: pronto assim que os modelos são carregados (no import ou no primeiro uso)
+        state = "ready"
+    ready = state == "ready"
+    return JSONResponse(status_code=200 if ready else 503, content={
+        "status": state,
+        "model_version": model_manager.version,
+        "warmup_seconds": warmup_status["seconds"],
+        "error": warmup_status["error"]
+    })
+
+@app.get("/api/models")
+async def models_info():
+    """
+    Versão dos modelos carregados, tempo de carga e memória residente do worker
+    """
+    models = await loaded_models()
+    return {
+        **model_manager.status(),
+        "load_stats": models.load_stats,
+        "compiled_models": sorted(models.compiled_models),
+        "rss_mb": round(current_rss_mb(), 2),
+        "pid": os.getpid()
     }
 
+@app.post("/api/admin/models/reload", status_code=202)
+async def reload_models(version: Optional[str] = None):
+    """
+    Inicia a recarga dos modelos em segundo plano; o progresso aparece em /api/models
+    """
+    try:
+        model_manager.reload_in_background(version)
+    except ReloadInProgress:
+        raise HTTPException(status_code=409, detail="Model reload already in progress")
+    return {"status": "reloading", "current_version": model_manager.version}
+
 @app.get("/api/dashboard/data", response_model=DashboardResponse)
-async def get_dashboard_data():
+async def get_dashboard_data(request: Request):
     """
     Retorna dados otimizados para o dashboard financeiro
     """
+    async def compute():
+        # Lê os agregados incrementais; sem transações ingeridas, usa os dados de exemplo
+        data = await run_in_threadpool(build_dashboard_data, get_transaction_store())
+        return data or generate_mock_data()
+
     try:
-        # Usa cache para evitar regeneração frequente
-        data = generate_mock_data()
-        return jsonable_encoder(data)
+        return await response_cache.respond(request, compute, model_manager.version)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -225,78 +590,171 @@ async def get_dashboard_data():
         )
 
 @app.get("/dashboard")
-async def get_dashboard():
-    return generate_sample_data()
+async def get_dashboard(request: Request):
+    async def compute():
+        data = await run_in_threadpool(build_dashboard, get_transaction_store())
+        return data or generate_sample_data()
+
+    return await response_cache.respond(request, compute, model_manager.version)
+
+@app.get("/api/cache/metrics")
+async def cache_metrics():
+    """
+    Acertos, falhas e requisições coalescidas do cache de respostas
+    """
+    return response_cache.snapshot()
 
 @app.post("/upload")
-async def upload_files(files: List[UploadFile] = File(...)):
+async def upload_files(files: List[UploadFile] = File(...), score: bool = False, background: bool = False):
+    if background:
+        return await create_job(files)
+    
     results = []
+    fraud_scorer = (await loaded_models()).detect_fraud_frame if score else None
     
     for file in files:
-        content_type = file.content_type
-        
+        record_upload(file.content_type, file.size)
         try:
-            content = await file.read()
-            
-            if content_type == 'application/pdf':
-                # Simulate PDF analysis
-                result = {
-                    'filename': file.filename,
-                    'type': 'PDF',
-                    'analysis': {
-                        'contract_type': 'Loan Agreement',
-                        'risk_score': round(np.random.uniform(60, 95), 2),
-                        'key_terms_detected': ['interest_rate', 'payment_schedule', 'collateral']
-                    }
-                }
-            
-            elif content_type in ['image/png', 'image/jpeg']:
-                # Simulate image analysis
-                result = {
-                    'filename': file.filename,
-                    'type': 'Image',
-                    'analysis': {
-                        'document_type': 'Bank Statement',
-                        'confidence_score': round(np.random.uniform(85, 99), 2),
-                        'extracted_data': {
-                            'account_number': 'XXXX-XX' + str(np.random.randint(1000, 9999)),
-                            'total_amount': round(np.random.uniform(1000, 50000), 2)
-                        }
-                    }
-                }
-            
-            elif content_type == 'text/csv':
-                # Simulate CSV analysis
-                import io
-                df = pd.read_csv(io.BytesIO(content))
-                result = {
-                    'filename': file.filename,
-                    'type': 'CSV',
-                    'analysis': {
-                        'rows_processed': len(df),
-                        'columns_detected': len(df.columns),
-                        'data_quality_score': round(np.random.uniform(75, 98), 2)
-                    }
-                }
-            
-            else:
-                result = {
-                    'filename': file.filename,
-                    'type': 'Unknown',
-                    'analysis': None
-                }
-            
-            results.append(result)
+            # O upload já está em um arquivo temporário; CSVs são lidos em blocos
+            # numa thread, com memória limitada ao tamanho do bloco
+            result = await run_in_threadpool(
+                analyze_upload, file.file, file.filename, file.content_type,
+                settings.UPLOAD_CSV_CHUNK_ROWS, fraud_scorer, archive_sink()
+            )
+            results.append(record_csv_rows(result, "upload_csv"))
             
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Error processing file {file.filename}: {str(e)}")
     
-    return {"results": results}
+    return FastJSONResponse({"results": results})
+
+@app.post("/jobs", status_code=202)
+async def create_job(files: List[UploadFile] = File(...)):
+    """
+    Enfileira a análise dos arquivos e retorna o id do job imediatamente
+    """
+    for file in files:
+        record_upload(file.content_type, file.size)
+    job = await job_manager.submit([
+        {"file": file.file, "filename": file.filename, "content_type": file.content_type}
+        for file in files
+    ])
+    return JSONResponse(status_code=202, content={
+        "job_id": job["id"],
+        "status": job["status"],
+        "files_total": job["files_total"],
+        "status_url": f"/jobs/{job['id']}"
+    })
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, stream: bool = False):
+    """
+    Estado, progresso e resultados de um job; com stream=true envia NDJSON a cada mudança
+    """
+    job = await run_in_threadpool(job_manager.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if stream:
+        return StreamingResponse(stream_job(job_manager.store, job_id), media_type="application/x-ndjson")
+    return {**job, "progress": progress(job)}
+
+def score_contracts(contracts: List[ContractData], model: DelinquencyPredictionModel) -> Dict:
+    """
+    Pontua uma carteira de contratos em uma única chamada ao booster
+    """
+    features = np.array(
+        [[getattr(contract, name) for name in DELINQUENCY_FEATURES] for contract in contracts],
+        dtype=np.float64
+    )
+    probabilities = model.predict_batch(features).astype(np.float64)
+    risk_levels = np.select([probabilities > 0.7, probabilities > 0.3], ["High", "Medium"], "Low")
+    return {
+        "count": len(contracts),
+        "default_probabilities": np.round(probabilities * 100, 2),
+        "risk_levels": risk_levels,
+        "summary": {
+            "mean_default_probability": round(float(probabilities.mean()) * 100, 2),
+            "high_risk": int((risk_levels == "High").sum()),
+            "medium_risk": int((risk_levels == "Medium").sum()),
+            "low_risk": int((risk_levels == "Low").sum())
+        }
+    }
+
+@app.post("/predict/delinquency/batch")
+async def predict_delinquency_batch(request: DelinquencyBatchRequest):
+    """
+    Probabilidade de inadimplência de uma carteira de contratos, na ordem de entrada
+    """
+    if len(request.contracts) > settings.DELINQUENCY_BATCH_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.DELINQUENCY_BATCH_MAX} contracts per request"
+        )
+    model = await run_in_threadpool(get_delinquency_model)
+    if not model.is_fitted:
+        raise HTTPException(status_code=503, detail="Delinquency model not loaded")
+    result = await run_in_threadpool(score_contracts, request.contracts, model)
+    record_rows("delinquency_batch", result["count"])
+    return FastJSONResponse(result)
+
+def score_boletos(boletos: List[BoletoData], anomaly_weight: Optional[float],
+                  model: FraudDetectionModel) -> Dict:
+    """
+    Pontua um lote de boletos com uma única passada de features e de cada floresta
+    """
+    features = np.array(
+        [[getattr(boleto, name) for name in BOLETO_FEATURES] for boleto in boletos],
+        dtype=np.float64
+    )
+    scores = model.score(features, anomaly_weight)
+    fraud_score = scores['fraud_score']
+    risk_levels = np.select([fraud_score > 0.7, fraud_score > 0.3], ["High", "Medium"], "Low")
+    probability = scores['fraud_probability']
+    return {
+        "count": len(boletos),
+        "anomaly_weight": model.anomaly_weight if anomaly_weight is None else anomaly_weight,
+        "fraud_scores": np.round(fraud_score * 100, 2),
+        "anomaly_scores": np.round(scores['anomaly_score'], 4),
+        "is_anomaly": scores['is_anomaly'],
+        "fraud_probabilities": None if probability is None else np.round(probability * 100, 2),
+        "risk_levels": risk_levels,
+        "summary": {
+            "anomalies": int(scores['is_anomaly'].sum()),
+            "high_risk": int((risk_levels == "High").sum()),
+            "mean_fraud_score": round(float(fraud_score.mean()) * 100, 2)
+        }
+    }
+
+@app.post("/detect/fraud/boletos")
+async def detect_fraud_boletos(request: BoletoBatchRequest, anomaly_weight: Optional[float] = None):
+    """
+    Score de anomalia, probabilidade supervisionada e score combinado de um lote de boletos
+    """
+    if len(request.boletos) > settings.BOLETO_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BOLETO_BATCH_MAX} boletos per request")
+    if anomaly_weight is not None and not 0 <= anomaly_weight <= 1:
+        raise HTTPException(status_code=422, detail="anomaly_weight must be between 0 and 1")
+    model = await run_in_threadpool(get_boleto_fraud_model)
+    if not model.is_fitted:
+        raise HTTPException(status_code=503, detail="Boleto fraud model not loaded")
+    result = await run_in_threadpool(score_boletos, request.boletos, anomaly_weight, model)
+    record_rows("boleto_batch", result["count"])
+    return FastJSONResponse(result)
 
 @app.post("/analyze/risk")
 async def analyze_risk(request: RiskAnalysisRequest):
+    models = await loaded_models()
     client_data = request.dict()
-    risk_analysis = ml_models.analyze_risk(client_data)
+
+    async def compute():
+        if settings.INFERENCE_BATCHING:
+            return await risk_batcher.submit(client_data)
+        return await inference_executor.run("analyze_risk", client_data)
+
+    # Modelos sem versão (treinados em memória) podem mudar sem troca: não usam o cache
+    key = (canonical_key("analyze_risk", models.version, models._extract_risk_features_single(client_data))
+           if models.version else None)
+    risk_analysis = await prediction_cache.get_or_compute(key, compute)
     
     return {
         "risk_score": round(risk_analysis['credit_score'], 2),
@@ -308,36 +766,234 @@ async def analyze_risk(request: RiskAnalysisRequest):
         }
     }
 
-@app.post("/detect/fraud")
-async def detect_fraud(transaction: TransactionData):
-    transaction_dict = transaction.dict()
-    fraud_score = ml_models.detect_fraud(transaction_dict)
-    
+# Categorias que não exigem revisão manual
+NORMAL_CATEGORIES = frozenset({"retail", "services"})
+
+def build_fraud_result(fraud_score: float, transaction: TransactionData) -> dict:
+    """
+    Monta a resposta de fraude (probabilidade, nível de risco e fatores) de uma transação
+    """
+    fraud_score = float(fraud_score)
     return {
         "fraud_probability": round(fraud_score * 100, 2),
         "risk_level": "High" if fraud_score > 0.7 else "Medium" if fraud_score > 0.3 else "Low",
         "factors": {
             "amount": "Suspicious" if transaction.amount > 10000 else "Normal",
             "timing": "Normal" if 8 <= transaction.timestamp.hour <= 18 else "Suspicious",
-            "category": "Normal" if transaction.category in ["retail", "services"] else "Review"
+            "category": "Normal" if transaction.category in NORMAL_CATEGORIES else "Review"
         }
     }
 
+@app.post("/detect/fraud")
+async def detect_fraud(transaction: TransactionData):
+    await loaded_models()
+    transaction_data = transaction.dict()
+    # Só leitura: a transação entra nos agregados depois de pontuada (503 e falhas não contam)
+    transaction_dict = feature_store.enrich(transaction_data, update=False)
+    if settings.INFERENCE_BATCHING:
+        fraud_score = await fraud_batcher.submit(transaction_dict)
+    else:
+        fraud_score = await inference_executor.run("detect_fraud", transaction_dict)
+    feature_store.record_many([transaction_data])
+    
+    return build_fraud_result(fraud_score, transaction)
+
+@app.post("/detect/fraud/batch")
+async def detect_fraud_batch(request: FraudBatchRequest):
+    """
+    Pontua um lote de transações em uma única passada do modelo, preservando a ordem de entrada
+    """
+    transactions = request.transactions
+    await loaded_models()
+    # Até 10 mil linhas: o enriquecimento (e o lock do feature store) fica fora do event loop
+    rows = [t.dict() for t in transactions]
+    enriched = await run_in_threadpool(feature_store.preview_many, rows)
+    fraud_scores = await inference_executor.run("detect_fraud_batch", enriched)
+    await run_in_threadpool(feature_store.record_many, rows)
+    record_rows("fraud_batch", len(transactions))
+    
+    return FastJSONResponse({
+        "count": len(transactions),
+        "results": [
+            build_fraud_result(score, transaction)
+            for score, transaction in zip(fraud_scores, transactions)
+        ]
+    })
+
+# Streaming: conexões longas com transações em NDJSON, pontuadas em lotes
+stream_stats = StreamStats()
+
+async def score_fraud_stream_batch(transactions: List[dict]):
+    enriched = await run_in_threadpool(feature_store.preview_many, transactions)
+    scores = await inference_executor.run("detect_fraud_batch", enriched)
+    await run_in_threadpool(feature_store.record_many, transactions)
+    record_rows("fraud_stream", len(transactions))
+    return scores
+
+def fraud_stream(chunks):
+    return score_stream(
+        chunks,
+        score_fraud_stream_batch,
+        max_batch_size=settings.STREAM_MAX_BATCH_SIZE,
+        max_in_flight=settings.STREAM_MAX_IN_FLIGHT,
+        max_line_bytes=settings.STREAM_MAX_LINE_BYTES,
+        stats=stream_stats,
+    )
+
+@app.post("/detect/fraud/stream")
+async def detect_fraud_stream(request: Request):
+    """
+    Corpo NDJSON (uma transação por linha, pode ser enviado em partes); a resposta
+    traz uma linha de resultado por transação, na mesma ordem, à medida que são pontuadas
+    """
+    await loaded_models()
+    return DuplexStreamingResponse(fraud_stream(request.stream()), media_type="application/x-ndjson")
+
+@app.websocket("/ws/detect/fraud")
+async def detect_fraud_websocket(websocket: WebSocket):
+    """
+    Cada mensagem traz uma ou mais transações em NDJSON; cada resposta traz os
+    resultados de um lote, em NDJSON e na ordem de envio
+    """
+    await websocket.accept()
+    await loaded_models()
+
+    async def messages():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                data = message.get("bytes") or message.get("text", "").encode()
+                yield data + b"\n"  # o fim da mensagem também encerra a linha
+        except WebSocketDisconnect:
+            return
+
+    try:
+        async for chunk in fraud_stream(messages()):
+            await websocket.send_text(chunk.decode())
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # cliente desconectou antes de receber todos os resultados
+
+@app.get("/api/predictions/metrics")
+async def prediction_cache_metrics():
+    """
+    Taxa de acerto e tempo economizado por rota no cache de predições
+    """
+    return prediction_cache.snapshot()
+
+@app.get("/api/features/metrics")
+async def feature_store_metrics():
+    """
+    Chaves em memória, atualizações e descartes do feature store online
+    """
+    return feature_store.stats()
+
+@app.get("/api/inference/metrics")
+async def inference_metrics():
+    """
+    Métricas da inferência: pool de execução e micro-batching (fila, tamanhos de lote, espera)
+    """
+    return {
+        "batching_enabled": settings.INFERENCE_BATCHING,
+        "executor": inference_executor.snapshot(),
+        "batchers": [fraud_batcher.snapshot(), risk_batcher.snapshot()],
+        "streams": stream_stats.snapshot()
+    }
+
 @app.post("/api/transactions")
 async def create_transaction(transaction: TransactionData):
     """
     Cria uma nova transação
     """
     try:
-        # Aqui você implementaria a lógica para salvar a transação
+        store = get_transaction_store()
+        transaction_id = await run_in_threadpool(store.add, transaction.dict())
+        if archive is not None:
+            # Ao atingir ARCHIVE_FLUSH_ROWS o append grava o bloco: fora do event loop
+            await run_in_threadpool(archive.append, [transaction.dict()])
+        await response_cache.invalidate()
         return {
             "status": "success",
             "message": "Transaction created successfully",
+            "id": transaction_id,
             "data": transaction.dict()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/transactions/bulk")
+async def create_transactions_bulk(request: TransactionBulkRequest):
+    """
+    Insere milhares de transações por chamada, em lote
+    """
+    if len(request.transactions) > settings.TRANSACTIONS_BULK_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.TRANSACTIONS_BULK_MAX} transactions per request"
+        )
+    try:
+        store = get_transaction_store()
+        rows = [t.dict() for t in request.transactions]
+        inserted = await run_in_threadpool(store.add_many, rows)
+        if archive is not None:
+            await run_in_threadpool(archive.append, rows)
+        record_rows("transactions_bulk", inserted)
+        await response_cache.invalidate()
+        return {
+            "status": "success",
+            "message": "Transactions created successfully",
+            "inserted": inserted
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def get_archive() -> TransactionArchive:
+    if archive is None:
+        raise HTTPException(status_code=404, detail="Archive disabled (set ARCHIVE_PATH)")
+    return archive
+
+@app.get("/api/analytics/transactions")
+async def transaction_analytics(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    merchant: Optional[str] = None,
+    category: Optional[str] = None,
+    amount_band_label: Optional[str] = Query(None, alias="amount_band"),
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    group_by: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=100_000),
+):
+    """
+    Agregações do histórico arquivado (contagem, soma, média, extremos e fraudes)
+    filtradas por período (inclusivo), estabelecimento, categoria e faixa de valor
+    """
+    store = get_archive()
+    try:
+        if amount_band_label is not None:
+            lower, upper = amount_band(amount_band_label)
+            min_amount = lower if min_amount is None else max(min_amount, lower)
+            max_amount = upper if max_amount is None else min(max_amount, upper)
+        return await run_in_threadpool(
+            store.query, start, end, merchant, category, min_amount, max_amount, group_by, limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/archive/metrics")
+async def archive_metrics():
+    return await run_in_threadpool(get_archive().stats)
+
+@app.post("/api/admin/archive/compact")
+async def compact_archive():
+    """
+    Junta os arquivos de cada dia já encerrado em um só
+    """
+    store = get_archive()
+    await run_in_threadpool(store.flush)
+    return {"partitions_compacted": await run_in_threadpool(store.compact)}
+
 # Customização do schema OpenAPI
 def custom_openapi():
     if app.openapi_schema:
@@ -0,0 +1,143 @@
+"""
+Métricas Prometheus da API.
+
+- latência por rota (histograma) e requisições em andamento (gauge)
+- tempo por etapa dentro das chamadas de modelo (extração de features,
+  escala, avaliação das árvores, pós-processamento: sigmoide e montagem dos
+  resultados)
+- tempo de codificação das respostas JSON (FastJSONResponse, rotas de modelo)
+- bytes enviados em uploads e linhas processadas
+
+Com vários workers do uvicorn, defina PROMETHEUS_MULTIPROC_DIR com um
+diretório vazio antes de iniciar: cada processo grava seus valores em arquivos
+mapeados em memória e /metrics agrega todos os processos.
+"""
+import os
+import time
+from typing import Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import REGISTRY, multiprocess
+
+from . import ml_models, serialization
+
+REQUEST_LATENCY = Histogram(
+    "financeai_http_request_duration_seconds",
+    "Latência das requisições HTTP por rota",
+    ["method", "route", "status"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "financeai_http_requests_in_flight",
+    "Requisições HTTP em andamento",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+MODEL_STAGE_SECONDS = Histogram(
+    "financeai_model_stage_duration_seconds",
+    "Tempo por etapa dentro das chamadas de modelo",
+    ["call", "stage"],
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.25, 1),
+)
+RESPONSE_SERIALIZATION_SECONDS = Histogram(
+    "financeai_response_serialization_seconds",
+    "Tempo de codificação das respostas JSON (FastJSONResponse)",
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.25, 1),
+)
+UPLOAD_BYTES = Counter(
+    "financeai_upload_bytes_total",
+    "Bytes recebidos em uploads",
+    ["content_type"],
+)
+ROWS_PROCESSED = Counter(
+    "financeai_rows_processed_total",
+    "Linhas processadas (CSV, lotes de inferência, ingestão)",
+    ["source"],
+)
+
+
+def observe_stage(call: str, stage: str, seconds: float):
+    MODEL_STAGE_SECONDS.labels(call, stage).observe(seconds)
+
+
+def observe_serialization(seconds: float):
+    RESPONSE_SERIALIZATION_SECONDS.observe(seconds)
+
+
+def install_model_hooks():
+    """
+    Liga a medição por etapa em ml_models (também nos processos de inferência)
+    e a da codificação das respostas
+    """
+    ml_models.stage_observer = observe_stage
+    serialization.render_observer = observe_serialization
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir"))
+
+
+def render_metrics() -> bytes:
+    """
+    Texto no formato Prometheus; em modo multiprocesso, agrega todos os workers
+    """
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_process_dead(pid: int):
+    """
+    Descarta os gauges de um worker encerrado (modo multiprocesso)
+    """
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(pid)
+
+
+def record_upload(content_type: Optional[str], size: Optional[int]):
+    if size:
+        UPLOAD_BYTES.labels(content_type or "unknown").inc(size)
+
+
+def record_rows(source: str, rows: int):
+    if rows:
+        ROWS_PROCESSED.labels(source).inc(rows)
+
+
+class PrometheusMiddleware:
+    """
+    Middleware ASGI: conta requisições em andamento e mede a latência por rota.
+
+    A rota é o template do path (ex.: /jobs/{job_id}), resolvido pelo roteador
+    durante a requisição, para manter a cardinalidade baixa.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        in_flight = REQUESTS_IN_FLIGHT.labels(method)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(method, getattr(route, "path", "unmatched"), str(status)).observe(elapsed)
@@ -1,82 +1,288 @@
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier, IsolationForest
-from sklearn.preprocessing import StandardScaler
 import pandas as pd
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any, Iterable, Optional
+import hashlib
 import joblib
 import os
+import time
+from .compiled_trees import compile_estimator
+from .vocabulary import Vocabulary
+from src.models.registry import ModelRegistry
+
+TRANSACTION_FEATURES = ['amount', 'hour_of_day', 'day_of_week', 'merchant_category']
+RISK_FEATURES = ['income', 'debt_ratio', 'credit_history_length', 'num_credit_lines', 'payment_history_score']
+COMPILABLE_MODELS = ('fraud_detector', 'risk_analyzer')
+# Free-form string columns and the dense integer feature each one is encoded into
+CATEGORICAL_FEATURES = {'merchant': 'merchant_id', 'category': 'merchant_category'}
+# The compiled engine wins on single rows and small batches; larger batches amortize
+# sklearn's per-call overhead, so they keep using the stock estimators (same results)
+COMPILED_MAX_ROWS = 256
+
+# Optional observer of per-stage timings, called as observer(call, stage, seconds).
+# Installed by src/api/metrics.py; while it is None no clock is read on the hot path.
+stage_observer: Optional[Callable[[str, str, float], None]] = None
+
+def legacy_version(path: str) -> str:
+    """
+    Version of a legacy flat layout, derived from the files' size and mtime: each
+    replacement on disk gets a new version, so prediction cache keys change with it
+    """
+    signature = []
+    for name in ('fraud_detector', 'risk_analyzer', 'scaler'):
+        stat = os.stat(os.path.join(path, f'{name}.joblib'))
+        signature.append(f'{stat.st_size}:{stat.st_mtime_ns}')
+    return 'legacy-' + hashlib.blake2b('|'.join(signature).encode(), digest_size=6).hexdigest()
+
+class _Stages:
+    # Times consecutive stages of one model call with a single clock read per stage
+    __slots__ = ('call', 'observer', 'last')
+
+    def __init__(self, call: str):
+        self.call = call
+        self.observer = stage_observer
+        self.last = time.perf_counter() if self.observer is not None else 0.0
+
+    def mark(self, stage: str):
+        if self.observer is not None:
+            now = time.perf_counter()
+            self.observer(self.call, stage, now - self.last)
+            self.last = now
+
+def extract_columns(data: pd.DataFrame, columns: List[str], dtype=np.float64) -> np.ndarray:
+    # Missing columns default to 0, like dict.get(name, 0) in the single-record path
+    frame = data.reindex(columns=columns, fill_value=0)
+    return np.ascontiguousarray(frame.to_numpy(dtype=dtype))
 
 class FinancialMLModels:
-    def __init__(self):
+    def __init__(self, compiled: Optional[Iterable[str]] = None):
+        # Imported on first construction so that importing the API does not pull in sklearn/scipy
+        from sklearn.ensemble import IsolationForest, RandomForestClassifier
+        from sklearn.preprocessing import StandardScaler
+
         self.fraud_detector = IsolationForest(contamination='auto', random_state=42)
         self.risk_analyzer = RandomForestClassifier(n_estimators=100, random_state=42)
         self.scaler = StandardScaler()
+        # Columns the fraud detector was trained on; velocity features from the
+        # online feature store (feature_store.FEATURES) can be added at training time
+        self.transaction_features = list(TRANSACTION_FEATURES)
+        # Vocabularies of the string columns (see CATEGORICAL_FEATURES), fitted with the fraud detector
+        self.vocabularies: Dict[str, Vocabulary] = {}
+        self._encoders: List[tuple] = []
+        # Models served through the compiled tree engine (see compiled_trees.py)
+        self.compiled_models = self._check_compilable(compiled or ())
+        self._compiled: Dict[str, Any] = {}
+        self.version: Optional[str] = None
+        self.load_stats: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def _check_compilable(names: Iterable[str]) -> set:
+        names = set(names)
+        unknown = names - set(COMPILABLE_MODELS)
+        if unknown:
+            raise ValueError(f"Unknown compiled models: {sorted(unknown)}")
+        return names
+
+    def compile_models(self, names: Optional[Iterable[str]] = None):
+        # Rebuilds the compiled engines after fitting or loading; unfitted models are skipped
+        if names is not None:
+            self.compiled_models = self._check_compilable(names)
+        self._compiled = {}
+        if 'fraud_detector' in self.compiled_models and hasattr(self.fraud_detector, 'estimators_'):
+            self._compiled['fraud_detector'] = (
+                compile_estimator(self.scaler),
+                compile_estimator(self.fraud_detector)
+            )
+        if 'risk_analyzer' in self.compiled_models and hasattr(self.risk_analyzer, 'estimators_'):
+            self._compiled['risk_analyzer'] = compile_estimator(self.risk_analyzer)
         
-    def train_fraud_detector(self, transactions: pd.DataFrame):
+    def fit_vocabularies(self, transactions: pd.DataFrame, min_count: int = 1):
+        # Builds a vocabulary for every string column present; values seen fewer than
+        # `min_count` times share the unknown id
+        self.vocabularies = {
+            column: Vocabulary.build(transactions[column], min_count=min_count)
+            for column in CATEGORICAL_FEATURES
+            if column in transactions.columns
+        }
+        self._index_encoders()
+
+    def _index_encoders(self):
+        # (feature position, feature name, string column, vocabulary) for each encoded feature in use
+        self._encoders = [
+            (self.transaction_features.index(name), name, column, self.vocabularies[column])
+            for column, name in CATEGORICAL_FEATURES.items()
+            if column in self.vocabularies and name in self.transaction_features
+        ]
+
+    def train_fraud_detector(self, transactions: pd.DataFrame, features: Optional[List[str]] = None):
+        if features is not None:
+            self.transaction_features = list(features)
+        if any(column in transactions.columns for column in CATEGORICAL_FEATURES):
+            self.fit_vocabularies(transactions)
+        self._index_encoders()
         features = self._extract_transaction_features(transactions)
         self.scaler.fit(features)
         scaled_features = self.scaler.transform(features)
         self.fraud_detector.fit(scaled_features)
+        self.compile_models()
         
     def detect_fraud(self, transaction: Dict[str, Any]) -> float:
+        stages = _Stages('detect_fraud')
         features = self._extract_single_transaction_features(transaction)
-        scaled_features = self.scaler.transform([features])
-        score = self.fraud_detector.score_samples([scaled_features[0]])[0]
-        return 1 / (1 + np.exp(-score))  # Convert to probability
+        stages.mark('feature_extraction')
+        score = self._fraud_scores([features], stages)[0]
+        probability = 1 / (1 + np.exp(-score))  # Convert to probability
+        stages.mark('postprocess')
+        return probability
+
+    def detect_fraud_batch(self, transactions: List[Dict[str, Any]]) -> np.ndarray:
+        # One feature matrix, one scale pass and one score pass for the whole batch
+        stages = _Stages('detect_fraud_batch')
+        features = self._extract_transaction_features_batch(transactions)
+        stages.mark('feature_extraction')
+        scores = self._fraud_scores(features, stages)
+        probabilities = 1 / (1 + np.exp(-scores))
+        stages.mark('postprocess')
+        return probabilities
+
+    def detect_fraud_frame(self, transactions: pd.DataFrame) -> np.ndarray:
+        # Columnar variant for CSV chunks and other DataFrame batches
+        stages = _Stages('detect_fraud_frame')
+        features = self._extract_transaction_features(transactions)
+        stages.mark('feature_extraction')
+        scores = self._fraud_scores(features, stages)
+        probabilities = 1 / (1 + np.exp(-scores))
+        stages.mark('postprocess')
+        return probabilities
+
+    def _fraud_scores(self, features, stages: _Stages) -> np.ndarray:
+        compiled = self._compiled.get('fraud_detector')
+        if compiled is not None and len(features) <= COMPILED_MAX_ROWS:
+            scaler, detector = compiled
+        else:
+            scaler, detector = self.scaler, self.fraud_detector
+        scaled = scaler.transform(features)
+        stages.mark('scaling')
+        scores = detector.score_samples(scaled)
+        stages.mark('tree_evaluation')
+        return scores
         
     def train_risk_analyzer(self, historical_data: pd.DataFrame, labels: np.ndarray):
         features = self._extract_risk_features(historical_data)
         self.risk_analyzer.fit(features, labels)
+        self.compile_models()
         
     def analyze_risk(self, client_data: Dict[str, Any]) -> Dict[str, float]:
+        stages = _Stages('analyze_risk')
         features = self._extract_risk_features_single(client_data)
-        probabilities = self.risk_analyzer.predict_proba([features])[0]
-        return {
-            'default_risk': float(probabilities[1]),
-            'credit_score': float(self._calculate_credit_score(probabilities[1]))
+        stages.mark('feature_extraction')
+        default_risk = self._default_probabilities([features])[0]
+        stages.mark('tree_evaluation')
+        result = {
+            'default_risk': float(default_risk),
+            'credit_score': float(self._calculate_credit_score(default_risk))
         }
+        stages.mark('postprocess')
+        return result
+
+    def analyze_risk_batch(self, clients: List[Dict[str, Any]]) -> List[Dict[str, float]]:
+        stages = _Stages('analyze_risk_batch')
+        features = np.array([self._extract_risk_features_single(c) for c in clients], dtype=np.float64)
+        stages.mark('feature_extraction')
+        default_risk = self._default_probabilities(features)
+        stages.mark('tree_evaluation')
+        results = [
+            {
+                'default_risk': float(p),
+                'credit_score': float(self._calculate_credit_score(p))
+            }
+            for p in default_risk
+        ]
+        stages.mark('postprocess')
+        return results
+        
+    def _default_probabilities(self, features) -> np.ndarray:
+        estimator = self.risk_analyzer
+        if 'risk_analyzer' in self._compiled and len(features) <= COMPILED_MAX_ROWS:
+            estimator = self._compiled['risk_analyzer']
+        return estimator.predict_proba(features)[:, 1]
         
-    def _extract_transaction_features(self, transactions: pd.DataFrame) -> np.ndarray:
-        features = []
-        for _, row in transactions.iterrows():
-            features.append(self._extract_single_transaction_features(row.to_dict()))
-        return np.array(features)
+    def _extract_transaction_features(self, transactions: pd.DataFrame, dtype=np.float64) -> np.ndarray:
+        # String columns are encoded as whole columns unless the numeric feature is already present
+        encoded = {
+            name: vocabulary.encode(transactions[column])
+            for _, name, column, vocabulary in self._encoders
+            if name not in transactions.columns and column in transactions.columns
+        }
+        if encoded:
+            transactions = transactions.assign(**encoded)
+        return extract_columns(transactions, self.transaction_features, dtype)
+
+    def _extract_transaction_features_batch(self, transactions: List[Dict[str, Any]]) -> np.ndarray:
+        features = np.empty((len(transactions), len(self.transaction_features)), dtype=np.float64)
+        for i, transaction in enumerate(transactions):
+            features[i] = [float(transaction.get(name, 0)) for name in self.transaction_features]
+        for index, name, column, vocabulary in self._encoders:
+            missing = np.fromiter((name not in t for t in transactions), dtype=bool, count=len(transactions))
+            if missing.all():
+                features[:, index] = vocabulary.encode([t.get(column) for t in transactions])
+            elif missing.any():
+                rows = np.flatnonzero(missing)
+                features[rows, index] = vocabulary.encode([transactions[i].get(column) for i in rows])
+        return features
         
     def _extract_single_transaction_features(self, transaction: Dict[str, Any]) -> List[float]:
-        return [
-            float(transaction.get('amount', 0)),
-            float(transaction.get('hour_of_day', 0)),
-            float(transaction.get('day_of_week', 0)),
-            float(transaction.get('merchant_category', 0))
-        ]
+        row = [float(transaction.get(name, 0)) for name in self.transaction_features]
+        for index, name, column, vocabulary in self._encoders:
+            if name not in transaction:
+                row[index] = vocabulary.encode_one(transaction.get(column))
+        return row
         
-    def _extract_risk_features(self, data: pd.DataFrame) -> np.ndarray:
-        features = []
-        for _, row in data.iterrows():
-            features.append(self._extract_risk_features_single(row.to_dict()))
-        return np.array(features)
+    def _extract_risk_features(self, data: pd.DataFrame, dtype=np.float64) -> np.ndarray:
+        return extract_columns(data, RISK_FEATURES, dtype)
         
     def _extract_risk_features_single(self, data: Dict[str, Any]) -> List[float]:
-        return [
-            float(data.get('income', 0)),
-            float(data.get('debt_ratio', 0)),
-            float(data.get('credit_history_length', 0)),
-            float(data.get('num_credit_lines', 0)),
-            float(data.get('payment_history_score', 0))
-        ]
+        return [float(data.get(name, 0)) for name in RISK_FEATURES]
         
     def _calculate_credit_score(self, default_probability: float) -> float:
         base_score = 850
         risk_impact = default_probability * 400
         return max(300, base_score - risk_impact)
 
-    def save_models(self, path: str):
-        os.makedirs(path, exist_ok=True)
-        joblib.dump(self.fraud_detector, os.path.join(path, 'fraud_detector.joblib'))
-        joblib.dump(self.risk_analyzer, os.path.join(path, 'risk_analyzer.joblib'))
-        joblib.dump(self.scaler, os.path.join(path, 'scaler.joblib'))
+    def save_models(self, path: str, version: Optional[str] = None) -> str:
+        # Publishes a new version in the model registry at `path` and makes it active
+        registry = ModelRegistry(path)
+        self.version = registry.publish(
+            {
+                'fraud_detector': self.fraud_detector,
+                'risk_analyzer': self.risk_analyzer,
+                'scaler': self.scaler,
+                'vocabularies': self.vocabularies
+            },
+            metadata={'model': type(self).__name__, 'transaction_features': self.transaction_features},
+            version=version
+        )
+        return self.version
 
-    def load_models(self, path: str):
-        self.fraud_detector = joblib.load(os.path.join(path, 'fraud_detector.joblib'))
-        self.risk_analyzer = joblib.load(os.path.join(path, 'risk_analyzer.joblib'))
-        self.scaler = joblib.load(os.path.join(path, 'scaler.joblib'))
+    def load_models(self, path: str, version: Optional[str] = None, mmap_mode: Optional[str] = 'r'):
+        if ModelRegistry.exists(path):
+            registry = ModelRegistry(path)
+            artifacts, manifest = registry.load(version, mmap_mode=mmap_mode)
+            self.fraud_detector = artifacts['fraud_detector']
+            self.risk_analyzer = artifacts['risk_analyzer']
+            self.scaler = artifacts['scaler']
+            self.vocabularies = artifacts.get('vocabularies', {})
+            self.version = manifest['version']
+            self.transaction_features = list(
+                manifest.get('metadata', {}).get('transaction_features', TRANSACTION_FEATURES)
+            )
+            self.load_stats = registry.last_load
+        else:
+            # Legacy flat layout: three joblib files and no manifest
+            self.fraud_detector = joblib.load(os.path.join(path, 'fraud_detector.joblib'), mmap_mode=mmap_mode)
+            self.risk_analyzer = joblib.load(os.path.join(path, 'risk_analyzer.joblib'), mmap_mode=mmap_mode)
+            self.scaler = joblib.load(os.path.join(path, 'scaler.joblib'), mmap_mode=mmap_mode)
+            self.transaction_features = list(TRANSACTION_FEATURES)
+            self.vocabularies = {}
+            self.version = legacy_version(path)
+        self._index_encoders()
+        self.compile_models()
@@ -0,0 +1,275 @@
+"""
+Gerenciamento dos modelos servidos pela API com recarga a quente.
+
+Uma nova versão é carregada e aquecida em segundo plano e só então trocada
+atomicamente pela atual (uma atribuição de referência). Requisições em
+andamento mantêm a referência ao modelo antigo e terminam nele; nenhuma
+requisição espera por uma carga.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from src.models.registry import ModelRegistry
+
+from .ml_models import FinancialMLModels
+
+logger = logging.getLogger(__name__)
+
+LEGACY_FILES = ("fraud_detector.joblib", "risk_analyzer.joblib", "scaler.joblib")
+
+
+class ReloadInProgress(Exception):
+    """
+    Já existe uma recarga de modelos em andamento
+    """
+
+
+def warm_up(models: FinancialMLModels, n_samples: int = 4):
+    """
+    Executa algumas previsões sintéticas para aquecer caches e alocações
+    """
+    if hasattr(models.fraud_detector, "estimators_"):
+        models.detect_fraud_batch([{"amount": 100.0 * (i + 1)} for i in range(n_samples)])
+        models.detect_fraud({"amount": 100.0})
+    if hasattr(models.risk_analyzer, "estimators_"):
+        clients = [
+            {"income": 5000.0, "debt_ratio": 0.1 * i, "credit_history_length": i,
+             "num_credit_lines": 2, "payment_history_score": 80.0}
+            for i in range(n_samples)
+        ]
+        models.analyze_risk_batch(clients)
+        models.analyze_risk(clients[0])
+
+
+class ModelManager:
+    """
+    Mantém a instância ativa de FinancialMLModels e a substitui sem downtime.
+
+    `on_swap` recebe callbacks chamados com (novo, antigo) logo após cada troca,
+    por exemplo para recriar pools de processos ou invalidar caches.
+
+    Com `lazy=True` nada é criado nem carregado na construção: a carga acontece
+    no primeiro acesso a `current` ou em `prepare()`, chamado em segundo plano
+    no startup. `ready` indica modelos carregados e aquecidos.
+    """
+
+    def __init__(
+        self,
+        models_path: str,
+        factory: Callable[[], FinancialMLModels] = FinancialMLModels,
+        mmap_mode: Optional[str] = "r",
+        lazy: bool = False,
+    ):
+        self.models_path = models_path
+        self.factory = factory
+        self.mmap_mode = mmap_mode
+        self.on_swap: List[Callable[[FinancialMLModels, FinancialMLModels], None]] = []
+        self.reload_count = 0
+        self.last_reload: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+        self.ready = False
+        self._current: Optional[FinancialMLModels] = None if lazy else factory()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._source_signature = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+
+    @property
+    def current(self) -> FinancialMLModels:
+        current = self._current
+        if current is None:
+            # Modo preguiçoso: a primeira chamada carrega; as concorrentes esperam por ela
+            self.load_initial()
+            current = self._current
+        return current
+
+    @property
+    def loaded(self) -> bool:
+        return self._current is not None
+
+    @property
+    def version(self) -> Optional[str]:
+        """
+        Versão ativa, sem disparar a carga preguiçosa (None enquanto não carregada)
+        """
+        current = self._current
+        return current.version if current is not None else None
+
+    @property
+    def reloading(self) -> bool:
+        return self._reload_lock.locked()
+
+    def load_initial(self):
+        """
+        Carrega os modelos salvos, se existirem, sem aquecimento nem callbacks.
+        Só a primeira chamada tem efeito.
+        """
+        with self._init_lock:
+            if self._initialized:
+                return
+            candidate = self._current if self._current is not None else self.factory()
+            if os.path.exists(self.models_path):
+                try:
+                    signature = self._signature()
+                    candidate.load_models(self.models_path, mmap_mode=self.mmap_mode)
+                    self._source_signature = signature
+                except Exception:
+                    print("No pre-trained models found. Will train new ones.")
+            self._current = candidate
+            self._initialized = True
+
+    def prepare(self):
+        """
+        Carga inicial (se ainda não feita) e aquecimento; depois disso `ready` é verdadeiro
+        """
+        self.load_initial()
+        warm_up(self._current)
+        self.ready = True
+
+    def reload(self, version: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Carrega, aquece e ativa uma versão dos modelos (a ativa no registro por padrão).
+
+        Bloqueia a thread chamadora; use em segundo plano. Levanta
+        ReloadInProgress se outra recarga estiver em andamento.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            raise ReloadInProgress()
+        try:
+            signature = self._signature()
+            start = time.perf_counter()
+            candidate = self.factory()
+            candidate.load_models(self.models_path, version=version, mmap_mode=self.mmap_mode)
+            loaded = time.perf_counter()
+            warm_up(candidate)
+            warmed = time.perf_counter()
+
+            # Sob _init_lock: uma carga preguiçosa em andamento termina antes e não desfaz a troca
+            with self._init_lock:
+                swapping = time.perf_counter()
+                previous, self._current = self._current, candidate
+                self._initialized = self.ready = True
+            swap_pause = time.perf_counter() - swapping
+
+            self._source_signature = signature
+            for callback in self.on_swap:
+                callback(candidate, previous)
+
+            self.reload_count += 1
+            self.last_error = None
+            self.last_reload = {
+                "version": candidate.version,
+                "previous_version": previous.version if previous is not None else None,
+                "load_seconds": loaded - start,
+                "warmup_seconds": warmed - loaded,
+                "swap_pause_seconds": swap_pause,
+                "completed_at": datetime.now().isoformat(),
+            }
+            logger.info("Models reloaded: %s", self.last_reload)
+            return self.last_reload
+        except Exception as exc:
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            logger.exception("Model reload failed")
+            raise
+        finally:
+            self._reload_lock.release()
+
+    def restore(self, models: FinancialMLModels):
+        """
+        Reativa uma instância já carregada e aquecida (ex.: a anterior a uma recarga
+        recusada), sem ler o disco; chama os callbacks de troca como `reload`
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            raise ReloadInProgress()
+        try:
+            with self._init_lock:
+                previous, self._current = self._current, models
+                self._initialized = True
+            for callback in self.on_swap:
+                callback(models, previous)
+        finally:
+            self._reload_lock.release()
+
+    def reload_in_background(self, version: Optional[str] = None) -> threading.Thread:
+        if self.reloading:
+            raise ReloadInProgress()
+
+        def run():
+            try:
+                self.reload(version)
+            except Exception:
+                pass  # registrado em last_error
+
+        thread = threading.Thread(target=run, name="model-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "ready": self.ready,
+            "reloading": self.reloading,
+            "reload_count": self.reload_count,
+            "last_reload": self.last_reload,
+            "last_error": self.last_error,
+        }
+
+    def _signature(self):
+        """
+        Identifica a versão em disco: conteúdo de CURRENT no registro ou
+        mtimes dos arquivos no layout legado
+        """
+        if ModelRegistry.exists(self.models_path):
+            return ModelRegistry(self.models_path).current_version()
+        signature = []
+        for name in LEGACY_FILES:
+            try:
+                signature.append(os.stat(os.path.join(self.models_path, name)).st_mtime_ns)
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def check_for_update(self) -> bool:
+        """
+        Recarrega se a versão em disco mudou desde a última carga
+        """
+        if not os.path.exists(self.models_path) or self.reloading:
+            return False
+        signature = self._signature()
+        if signature == self._source_signature or signature in (None, (None,) * len(LEGACY_FILES)):
+            return False
+        try:
+            self.reload()
+        except ReloadInProgress:
+            return False
+        return True
+
+    def start_watching(self, interval_seconds: float):
+        """
+        Observa o diretório de modelos e recarrega quando uma nova versão aparece
+        """
+        if self._watcher is not None or interval_seconds <= 0:
+            return
+        self._stop_watching.clear()
+
+        def watch():
+            while not self._stop_watching.wait(interval_seconds):
+                try:
+                    self.check_for_update()
+                except Exception:
+                    pass  # registrado em last_error; tenta de novo no próximo ciclo
+
+        self._watcher = threading.Thread(target=watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
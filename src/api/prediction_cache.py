@@ -0,0 +1,221 @@
+"""
+Cache de predições por vetor de features e versão do modelo.
+
+A chave é (rota, versão do modelo, vetor de features canônico): o mesmo vetor
+que o modelo recebe, em float64, com -0.0 normalizado para 0.0. Assim
+requisições com o mesmo conteúdo em formatos diferentes (5 e 5.0, campos em
+outra ordem, campos extras) compartilham a entrada.
+
+Dois níveis:
+
+- local: LRU com TTL no processo, consultado sem I/O (microssegundos)
+- compartilhado (opcional): qualquer backend de cache.py, ex. redis://,
+  para que workers e réplicas aproveitem o cálculo uns dos outros
+
+Chamadas simultâneas para a mesma chave esperam um único cálculo. A troca de
+modelos (ModelManager.on_swap) limpa o nível local; no compartilhado, as
+entradas da versão antiga deixam de ser consultadas e expiram pelo TTL.
+"""
+import asyncio
+import hashlib
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+from .serialization import dumps
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - dependência opcional
+    import json
+
+    _loads = json.loads
+
+PredictionKey = Tuple[str, str, Tuple[float, ...]]
+
+
+def canonical_key(route: str, version: Optional[str], features: Sequence[float]) -> PredictionKey:
+    # `+ 0.0` transforma -0.0 em 0.0; NaN não é igual a si mesmo e nunca acerta (recalcula)
+    return route, str(version), tuple(float(value) + 0.0 for value in features)
+
+
+def shared_key(key: PredictionKey) -> str:
+    route, version, features = key
+    packed = struct.pack(f"<{len(features)}d", *features)
+    return f"{route}:{version}:{hashlib.blake2b(packed, digest_size=16).hexdigest()}"
+
+
+class RouteStats:
+    """
+    Acertos, falhas e tempo economizado de uma rota
+    """
+
+    __slots__ = ("local_hits", "shared_hits", "coalesced", "misses", "compute_seconds", "hit_seconds")
+
+    def __init__(self):
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.compute_seconds = 0.0  # soma do tempo das predições calculadas
+        self.hit_seconds = 0.0  # soma do tempo das respostas vindas do cache
+
+    def snapshot(self) -> Dict[str, Any]:
+        hits = self.local_hits + self.shared_hits + self.coalesced
+        lookups = hits + self.misses
+        mean_compute = self.compute_seconds / self.misses if self.misses else None
+        mean_hit = self.hit_seconds / hits if hits else None
+        saved = hits * (mean_compute - mean_hit) if mean_compute is not None and mean_hit is not None else 0.0
+        return {
+            "lookups": lookups,
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "mean_compute_ms": round(mean_compute * 1000, 4) if mean_compute is not None else None,
+            "mean_hit_ms": round(mean_hit * 1000, 4) if mean_hit is not None else None,
+            # Estimativa: acertos x (tempo médio de cálculo - tempo médio do acerto)
+            "saved_seconds": round(max(saved, 0.0), 6),
+        }
+
+
+class PredictionCache:
+    """
+    Cache de resultados de modelo em dois níveis; `ttl_seconds <= 0` desativa
+    """
+
+    def __init__(self, max_entries: int = 100_000, ttl_seconds: float = 300, shared=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.shared = shared
+        self._entries: "OrderedDict[PredictionKey, Tuple[float, Any]]" = OrderedDict()
+        # on_swap roda na thread da recarga: o lock protege o LRU entre threads
+        self._lock = threading.Lock()
+        self._inflight: Dict[PredictionKey, asyncio.Future] = {}
+        self.routes: Dict[str, RouteStats] = {}
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _stats(self, route: str) -> RouteStats:
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = self.routes[route] = RouteStats()
+        return stats
+
+    def get_local(self, key: PredictionKey) -> Optional[Any]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set_local(self, key: PredictionKey, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def get_or_compute(self, key: Optional[PredictionKey], compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Resultado em cache (local, compartilhado ou de um cálculo em andamento) ou calculado uma
+        vez; sem chave (modelos sem versão), apenas calcula
+        """
+        if not self.enabled or key is None:
+            return await compute()
+        started = time.perf_counter()
+        stats = self._stats(key[0])
+
+        value = self.get_local(key)
+        if value is not None:
+            stats.local_hits += 1
+            stats.hit_seconds += time.perf_counter() - started
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            value = await asyncio.shield(task)
+            stats.coalesced += 1
+            stats.hit_seconds += time.perf_counter() - started
+            return value
+
+        # Tarefa própria: o cancelamento de quem iniciou o cálculo não atinge quem o aguarda
+        task = asyncio.ensure_future(self._lookup(key, compute, stats, started))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: PredictionKey, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # evita o aviso de exceção não lida sem aguardadores
+
+    async def _lookup(self, key: PredictionKey, compute: Callable[[], Awaitable[Any]], stats: RouteStats,
+                      started: float) -> Any:
+        value = await self._get_shared(key)
+        if value is not None:
+            stats.shared_hits += 1
+            stats.hit_seconds += time.perf_counter() - started
+        else:
+            value = await compute()
+            stats.misses += 1
+            stats.compute_seconds += time.perf_counter() - started
+            await self._set_shared(key, value)
+        self.set_local(key, value)
+        return value
+
+    async def _get_shared(self, key: PredictionKey) -> Optional[Any]:
+        if self.shared is None:
+            return None
+        try:
+            entry = await self.shared.get(shared_key(key))
+        except Exception:
+            return None  # nível compartilhado indisponível: segue só com o local
+        return _loads(entry[0]) if entry is not None else None
+
+    async def _set_shared(self, key: PredictionKey, value: Any):
+        if self.shared is None:
+            return
+        try:
+            await self.shared.set(shared_key(key), (dumps(value), key[1]), self.ttl_seconds)
+        except Exception:
+            pass
+
+    def invalidate(self):
+        """
+        Limpa o nível local
+        """
+        with self._lock:
+            self._entries.clear()
+        self.invalidations += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl_seconds,
+            "max_entries": self.max_entries,
+            "entries": len(self._entries),
+            "shared_backend": type(self.shared).__name__ if self.shared is not None else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "routes": {route: stats.snapshot() for route, stats in self.routes.items()},
+        }
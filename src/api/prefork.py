@@ -0,0 +1,374 @@
+"""
+Servidor de produção multiprocesso com modelos pré-carregados (SERVER_MODE=prefork).
+
+O processo pai carrega e aquece todos os modelos uma única vez, congela o
+heap (gc.freeze) e abre o socket de escuta; depois cria WORKERS processos
+com fork. Os workers herdam os modelos copy-on-write: as páginas dos arrays
+(e os artefatos mapeados com mmap) ficam compartilhadas entre todos, em vez
+de uma cópia por worker como em `uvicorn --workers`.
+
+- Workers: WORKERS > 0 ou, com 0, as CPUs disponíveis ao processo (afinidade
+  e limite de CPU do cgroup, como em contêineres).
+- Threads: BLAS/OpenMP (numpy, sklearn, xgboost) e o pool de inferência
+  limitados a WORKER_THREADS por worker, para workers x threads não
+  ultrapassar os núcleos. Também evita o travamento do OpenMP após fork.
+- Sinais no pai: SIGTERM/SIGINT encerram os workers com graça (requisições
+  em andamento terminam em até WORKER_GRACEFUL_TIMEOUT_SECONDS); SIGHUP
+  recarrega os modelos no pai e troca os workers um a um, cada novo worker
+  entrando em serviço antes de o antigo sair; um worker que morre é recriado.
+- Métricas: sem PROMETHEUS_MULTIPROC_DIR, um diretório temporário é criado
+  para /metrics agregar todos os workers; os gauges de workers encerrados são
+  descartados (metrics.mark_process_dead).
+
+Estado em memória (feature store, caches locais, buffers do arquivo) é por
+worker. As features de velocidade do feature store contam só as transações
+que cada worker viu (~1/N do valor real com N workers, fora da distribuição
+do treino): com mais de um worker, o launcher recusa modelos que usam essas
+features e FEATURE_STORE_SNAPSHOT_PATH (os workers sobrescreveriam o mesmo
+snapshot). Para elas, use WORKERS=1 ou um feature store compartilhado.
+
+Uso: SERVER_MODE=prefork WORKERS=4 python main.py
+"""
+import gc
+import math
+import os
+import select
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+import traceback
+from typing import Dict, List, Optional
+
+# Variáveis lidas pelas bibliotecas de álgebra linear e OpenMP ao carregar
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS",
+)
+
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """
+    Limite de CPU do cgroup (v2: cpu.max, v1: cfs_quota/cfs_period), em núcleos
+    """
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        return quota / period if quota > 0 and period > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> int:
+    """
+    CPUs que o processo pode usar: afinidade, limitada pela cota do cgroup
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+def pin_threads(threads: int):
+    """
+    Limita BLAS/OpenMP a `threads`; as variáveis valem para bibliotecas ainda
+    não carregadas, o threadpoolctl para as já carregadas
+    """
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:  # pragma: no cover - vem com o scikit-learn
+        return
+    threadpool_limits(threads)
+
+
+class PreforkServer:
+    """
+    Supervisor: pré-carrega a aplicação, cria os workers e os mantém
+    """
+
+    def __init__(self, settings, workers: int = 0, threads: int = 1, graceful_timeout: float = 30,
+                 ready_timeout: float = 120, log_level: str = "info"):
+        self.settings = settings
+        self.workers = workers or available_cpus()
+        self.threads = max(1, threads)
+        self.graceful_timeout = graceful_timeout
+        self.ready_timeout = ready_timeout
+        self.log_level = log_level
+        self.app_module = None
+        self.socket: Optional[socket.socket] = None
+        self.metrics_dir: Optional[str] = None  # criado por nós, removido no encerramento
+        self.children: Dict[int, float] = {}  # pid -> horário de início
+        self._signals: List[int] = []
+        self._stopping = False
+
+    # Processo pai
+
+    def preload(self):
+        """
+        Importa a aplicação e carrega/aquece todos os modelos antes do fork
+        """
+        if self.workers > 1 and self.settings.FEATURE_STORE_SNAPSHOT_PATH:
+            raise RuntimeError(
+                "FEATURE_STORE_SNAPSHOT_PATH requires WORKERS=1: each worker keeps its own feature store "
+                "and would overwrite the others' snapshot"
+            )
+        pin_threads(self.threads)
+        if self.settings.INFERENCE_WORKERS == 0:
+            self.settings.INFERENCE_WORKERS = self.threads
+        if self.workers > 1 and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            self.metrics_dir = tempfile.mkdtemp(prefix="financeai-metrics-")
+            os.environ["PROMETHEUS_MULTIPROC_DIR"] = self.metrics_dir
+
+        from src.api import main as app_module
+
+        self.app_module = app_module
+        started = time.perf_counter()
+        app_module.warm_up_models()
+        if app_module.warmup_status["state"] != "ready":
+            raise RuntimeError(f"Model preload failed: {app_module.warmup_status['error']}")
+        self._check_velocity_features()
+        # Nenhum pool de threads criado no pai pode ser herdado pelos workers
+        app_module.inference_executor.reset()
+        self._freeze()
+        print(f"[prefork] models {app_module.model_manager.version} preloaded in "
+              f"{time.perf_counter() - started:.2f}s; starting {self.workers} workers x {self.threads} threads")
+
+    def _check_velocity_features(self):
+        from .feature_store import VELOCITY_FEATURES
+
+        used = set(self.app_module.model_manager.current.transaction_features) & set(VELOCITY_FEATURES)
+        if self.workers > 1 and used:
+            raise RuntimeError(
+                f"Models {self.app_module.model_manager.version} use velocity features ({', '.join(sorted(used))}), "
+                "which are per-process in prefork mode; run with WORKERS=1"
+            )
+
+    @staticmethod
+    def _freeze():
+        # Objetos do pré-carregamento vão para a geração permanente: o coletor dos
+        # workers não escreve nos cabeçalhos deles e as páginas seguem compartilhadas
+        gc.collect()
+        gc.freeze()
+
+    def bind(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.settings.HOST, self.settings.PORT))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        self.socket = sock
+
+    def run(self) -> int:
+        self.preload()
+        self.bind()
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(sig, lambda signum, frame: self._signals.append(signum))
+        try:
+            for _ in range(self.workers):
+                if self.spawn() is None:
+                    raise RuntimeError("Worker failed to start; see the log above")
+            self.supervise()
+        finally:
+            self.stop()
+        return 0
+
+    def supervise(self):
+        last_respawn = 0.0
+        while not self._stopping:
+            while self._signals:
+                signum = self._signals.pop(0)
+                if signum == signal.SIGHUP:
+                    self.rolling_restart()
+                else:
+                    self._stopping = True
+            for pid in self._reap():
+                if self._stopping:
+                    continue
+                # Worker morreu fora de um reinício planejado: recria, no máximo um por segundo
+                print(f"[prefork] worker {pid} exited unexpectedly; respawning")
+                time.sleep(max(0.0, 1.0 - (time.monotonic() - last_respawn)))
+                last_respawn = time.monotonic()
+                self.spawn()
+            time.sleep(0.1)
+
+    def _reap(self) -> List[int]:
+        exited = []
+        while self.children:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            self.children.pop(pid, None)
+            self._mark_dead(pid)
+            exited.append(pid)
+        return exited
+
+    def _mark_dead(self, pid: int):
+        from .metrics import mark_process_dead
+
+        mark_process_dead(pid)
+
+    def spawn(self) -> Optional[int]:
+        """
+        Cria um worker e espera ele aceitar conexões; retorna o pid ou None
+        """
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            code = 1
+            try:
+                self._worker(write_fd)
+                code = 0
+            except Exception:
+                traceback.print_exc()
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        os.close(write_fd)
+        self.children[pid] = time.monotonic()
+        try:
+            ready, _, _ = select.select([read_fd], [], [], self.ready_timeout)
+            if ready and os.read(read_fd, 1) == b"1":
+                return pid
+        finally:
+            os.close(read_fd)
+        print(f"[prefork] worker {pid} did not become ready; stopping it")
+        self._terminate([pid])
+        return None
+
+    def rolling_restart(self):
+        """
+        Recarrega os modelos no pai e substitui cada worker por um novo, um de cada vez
+        """
+        manager = self.app_module.model_manager
+        previous = manager.current
+        try:
+            manager.reload()
+        except Exception as e:
+            print(f"[prefork] model reload failed, keeping {previous.version}: {e}")
+        else:
+            try:
+                self._check_velocity_features()
+            except RuntimeError as e:
+                # Reativa a instância anterior para que workers recriados continuem iguais aos atuais
+                print(f"[prefork] rolling restart refused, keeping {previous.version}: {e}")
+                try:
+                    manager.restore(previous)
+                except Exception as restore_error:
+                    print(f"[prefork] could not restore {previous.version}: {restore_error}")
+                return
+            self.app_module.inference_executor.reset()
+            gc.unfreeze()
+            self._freeze()
+        for old in list(self.children):
+            if self.spawn() is None:
+                print("[prefork] rolling restart aborted: new worker failed")
+                return
+            self._terminate([old])
+
+    def _terminate(self, pids: List[int]):
+        # SIGTERM: o uvicorn para de aceitar conexões e termina as requisições em andamento
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.graceful_timeout
+        pending = set(pids)
+        while pending and time.monotonic() < deadline:
+            for pid in list(pending):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    pending.discard(pid)
+                    self.children.pop(pid, None)
+                    self._mark_dead(pid)
+            time.sleep(0.05)
+        for pid in pending:
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self.children.pop(pid, None)
+            self._mark_dead(pid)
+
+    def stop(self):
+        self._stopping = True
+        if self.children:
+            self._terminate(list(self.children))
+        if self.socket is not None:
+            self.socket.close()
+        if self.metrics_dir is not None:
+            shutil.rmtree(self.metrics_dir, ignore_errors=True)
+
+    # Processo filho
+
+    def _worker(self, ready_fd: int):
+        import uvicorn
+
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(sig, signal.SIG_DFL)
+        pin_threads(self.threads)
+        # Conexões do pool do banco não podem ser compartilhadas com o pai
+        if self.app_module.transaction_store is not None:
+            self.app_module.transaction_store.engine.dispose(close=False)
+
+        class WorkerServer(uvicorn.Server):
+            async def startup(self, sockets=None):
+                await super().startup(sockets=sockets)
+                if self.started:
+                    os.write(ready_fd, b"1")
+                os.close(ready_fd)
+
+        config = uvicorn.Config(
+            self.app_module.app,
+            lifespan="on",
+            log_level=self.log_level,
+            access_log=False,
+            timeout_graceful_shutdown=int(self.graceful_timeout),
+        )
+        WorkerServer(config).run(sockets=[self.socket])
+
+
+def serve(settings) -> int:
+    """
+    Ponto de entrada do modo prefork (main.py com SERVER_MODE=prefork)
+    """
+    server = PreforkServer(
+        settings,
+        workers=settings.WORKERS,
+        threads=settings.WORKER_THREADS,
+        graceful_timeout=settings.WORKER_GRACEFUL_TIMEOUT_SECONDS,
+        log_level="debug" if settings.DEBUG else "info",
+    )
+    return server.run()
+
+
+if __name__ == "__main__":
+    from src.config import get_settings
+
+    sys.exit(serve(get_settings()))
@@ -0,0 +1,73 @@
+"""
+Serialização JSON direta para bytes.
+
+Com orjson instalado, arrays e escalares NumPy são escritos nativamente
+(OPT_SERIALIZE_NUMPY) e modelos Pydantic são convertidos uma única vez, sem
+passar por `jsonable_encoder` nem por uma segunda validação do response_model.
+Sem orjson, usa a biblioteca padrão com o mesmo tratamento de tipos.
+"""
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from time import perf_counter
+from typing import Any, Callable, Optional
+
+import numpy as np
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+# Observador opcional do tempo de codificação das respostas, chamado como observer(seconds).
+# Instalado por src/api/metrics.py; enquanto for None nenhum relógio é lido.
+render_observer: Optional[Callable[[float], None]] = None
+
+
+def _default(value: Any) -> Any:
+    """
+    Tipos que o codificador não conhece diretamente
+    """
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, np.ndarray):
+        return value.tolist()  # dtypes não suportados nativamente (object, não contíguos)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(content: Any) -> bytes:
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _orjson_dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+dumps = _orjson_dumps if orjson is not None else _stdlib_dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse que codifica o conteúdo com `dumps` em uma única passada
+    """
+
+    def render(self, content: Any) -> bytes:
+        observer = render_observer
+        if observer is None:
+            return dumps(content)
+        start = perf_counter()
+        body = dumps(content)
+        observer(perf_counter() - start)
+        return body
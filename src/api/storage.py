@@ -0,0 +1,158 @@
+"""
+Armazenamento de transações com SQLAlchemy.
+
+Funciona com SQLite (desenvolvimento) e Postgres (produção). Inserções em
+lote usam executemany em blocos; no Postgres com psycopg2, COPY FROM STDIN.
+Toda inserção atualiza os agregados do dashboard (aggregates.py) na mesma
+transação.
+"""
+import csv
+import io
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import (
+    BigInteger, Boolean, Column, DateTime, Float, Index, Integer, MetaData, String, Table,
+    create_engine, delete, func, insert, select,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.pool import StaticPool
+
+from .aggregates import apply_deltas, compute_deltas, define_rollups_table, read_series, read_total
+
+DEFAULT_DATABASE_URL = "sqlite:///./financeai.db"
+
+metadata = MetaData()
+
+transactions = Table(
+    "transactions",
+    metadata,
+    Column("id", BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True),
+    Column("amount", Float, nullable=False),
+    Column("merchant", String(255), nullable=False),
+    Column("timestamp", DateTime(timezone=True), nullable=False),
+    Column("category", String(100), nullable=False),
+    Column("is_fraud", Boolean, nullable=True),
+    Column("is_delinquent", Boolean, nullable=True),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Index("ix_transactions_timestamp", "timestamp"),
+    Index("ix_transactions_merchant", "merchant"),
+    Index("ix_transactions_category", "category"),
+)
+
+rollups = define_rollups_table(metadata)
+
+TRANSACTION_COLUMNS = ("amount", "merchant", "timestamp", "category", "is_fraud", "is_delinquent")
+
+
+def create_db_engine(url: str, pool_size: int = 5, max_overflow: int = 10) -> Engine:
+    """
+    Engine com pool de conexões; SQLite em memória usa uma única conexão compartilhada
+    """
+    if url.startswith("sqlite"):
+        kwargs: Dict[str, Any] = {"connect_args": {"check_same_thread": False}}
+        if url in ("sqlite://", "sqlite:///:memory:"):
+            kwargs["poolclass"] = StaticPool
+        return create_engine(url, **kwargs)
+    return create_engine(url, pool_size=pool_size, max_overflow=max_overflow, pool_pre_ping=True)
+
+
+class TransactionStore:
+    """
+    Persistência de TransactionData
+    """
+
+    def __init__(self, url: str = DEFAULT_DATABASE_URL, pool_size: int = 5, max_overflow: int = 10,
+                 batch_size: int = 5000):
+        self.engine = create_db_engine(url, pool_size, max_overflow)
+        self.batch_size = batch_size
+        metadata.create_all(self.engine)
+
+    @property
+    def supports_copy(self) -> bool:
+        return self.engine.dialect.name == "postgresql" and self.engine.dialect.driver == "psycopg2"
+
+    @staticmethod
+    def _row(transaction: Dict[str, Any]) -> Dict[str, Any]:
+        return {name: transaction.get(name) for name in TRANSACTION_COLUMNS}
+
+    def add(self, transaction: Dict[str, Any]) -> int:
+        """
+        Insere uma transação e retorna o id gerado
+        """
+        row = self._row(transaction)
+        with self.engine.begin() as conn:
+            result = conn.execute(insert(transactions).values(**row))
+            apply_deltas(conn, rollups, compute_deltas([row]))
+            return int(result.inserted_primary_key[0])
+
+    def add_many(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insere transações em blocos de `batch_size` em uma única transação e retorna a quantidade
+        """
+        rows = [self._row(row) for row in rows]
+        if not rows:
+            return 0
+        with self.engine.begin() as conn:
+            if self.supports_copy:
+                self._copy(conn, rows)
+            else:
+                for start in range(0, len(rows), self.batch_size):
+                    conn.execute(insert(transactions), rows[start:start + self.batch_size])
+            apply_deltas(conn, rollups, compute_deltas(rows))
+        return len(rows)
+
+    def _copy(self, conn: Connection, rows: List[Dict[str, Any]]):
+        # COPY FROM STDIN: caminho mais rápido de carga no Postgres
+        created_at = datetime.now(timezone.utc).isoformat()
+        with conn.connection.cursor() as cursor:
+            for start in range(0, len(rows), self.batch_size):
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for row in rows[start:start + self.batch_size]:
+                    writer.writerow([
+                        row["amount"], row["merchant"], row["timestamp"].isoformat(), row["category"],
+                        "" if row["is_fraud"] is None else row["is_fraud"],
+                        "" if row["is_delinquent"] is None else row["is_delinquent"],
+                        created_at,
+                    ])
+                buffer.seek(0)
+                cursor.copy_expert(
+                    "COPY transactions (amount, merchant, timestamp, category, is_fraud, is_delinquent, "
+                    "created_at) FROM STDIN WITH (FORMAT csv)",
+                    buffer,
+                )
+
+    def count(self) -> int:
+        with self.engine.connect() as conn:
+            return int(conn.execute(select(func.count()).select_from(transactions)).scalar_one())
+
+    def get(self, transaction_id: int) -> Optional[Dict[str, Any]]:
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(transactions).where(transactions.c.id == transaction_id)
+            ).mappings().first()
+        return dict(row) if row else None
+
+    def rollup_series(self, granularity: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Últimos `limit` buckets agregados (day, month ou quarter)
+        """
+        with self.engine.connect() as conn:
+            return read_series(conn, rollups, granularity, limit)
+
+    def rollup_total(self) -> Optional[Dict[str, Any]]:
+        with self.engine.connect() as conn:
+            return read_total(conn, rollups)
+
+    def rebuild_rollups(self, chunk_rows: int = 100_000):
+        """
+        Recalcula os agregados a partir da tabela de transações (backfill/migração)
+        """
+        columns = [transactions.c.amount, transactions.c.timestamp,
+                   transactions.c.is_fraud, transactions.c.is_delinquent]
+        with self.engine.begin() as conn:
+            conn.execute(delete(rollups))
+            result = conn.execution_options(yield_per=chunk_rows).execute(select(*columns))
+            for chunk in result.mappings().partitions():
+                apply_deltas(conn, rollups, compute_deltas(chunk))
@@ -0,0 +1,218 @@
+"""
+Pontuação de fraude em fluxo contínuo (WebSocket e POST NDJSON).
+
+O cliente envia transações como linhas JSON (NDJSON) numa conexão longa e
+recebe de volta uma linha por transação, na ordem de chegada:
+
+    {"seq": 0, "id": "abc", "fraud_probability": 12.5, "risk_level": "Low"}
+    {"seq": 1, "error": "amount must be a number"}
+
+`seq` é a posição da transação no fluxo (linhas vazias não contam) e `id` é
+repetido quando enviado. As linhas são validadas sem Pydantic (o mesmo
+contrato de TransactionData) e pontuadas em lotes com tudo o que já chegou,
+até `max_batch_size`.
+
+Controle de fluxo: a leitura para quando há `max_in_flight` transações lidas
+e ainda não pontuadas, e os resultados só são produzidos quando o consumidor
+os retira. Um cliente lento segura a leitura (e, pelo TCP, o próprio envio)
+em vez de acumular memória no servidor.
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from .serialization import dumps
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _DecodeError = orjson.JSONDecodeError
+except ImportError:  # pragma: no cover - dependência opcional
+    import json
+
+    _loads = json.loads
+    _DecodeError = ValueError
+
+# Recebe as transações validadas de um lote e retorna a probabilidade de fraude de cada uma
+StreamScorer = Callable[[List[Dict[str, Any]]], Awaitable[Sequence[float]]]
+
+_END = object()
+
+
+class StreamError(Exception):
+    """
+    Fluxo inválido como um todo (ex.: linha acima do tamanho máximo)
+    """
+
+
+class StreamStats:
+    """
+    Contadores agregados de todas as conexões de streaming
+    """
+
+    def __init__(self):
+        self.active = 0
+        self.opened = 0
+        self.received = 0
+        self.scored = 0
+        self.errors = 0
+        self.batches = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "active_streams": self.active,
+            "streams_opened": self.opened,
+            "transactions_received": self.received,
+            "transactions_scored": self.scored,
+            "errors": self.errors,
+            "batches": self.batches,
+            "mean_batch_size": round(self.scored / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse cujo corpo é gerado enquanto o corpo da requisição ainda
+    é lido. A StreamingResponse padrão (ASGI < 2.4) consome `receive` para
+    detectar a desconexão e tomaria as mensagens do corpo; aqui a desconexão
+    chega pela leitura da requisição (ClientDisconnect)
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except (ClientDisconnect, OSError):
+            return
+
+
+def parse_transaction(line: bytes) -> Dict[str, Any]:
+    """
+    Valida uma linha com o contrato de TransactionData; levanta ValueError
+    """
+    try:
+        payload = _loads(line)
+    except _DecodeError:
+        raise ValueError("invalid JSON")
+    if not isinstance(payload, dict):
+        raise ValueError("expected a JSON object")
+    amount = payload.get("amount")
+    if isinstance(amount, bool) or not isinstance(amount, (int, float)):
+        raise ValueError("amount must be a number")
+    for name in ("merchant", "category"):
+        if not isinstance(payload.get(name), str):
+            raise ValueError(f"{name} must be a string")
+    timestamp = payload.get("timestamp")
+    if not isinstance(timestamp, str):
+        raise ValueError("timestamp must be an ISO 8601 string")
+    try:
+        payload["timestamp"] = datetime.fromisoformat(timestamp)
+    except ValueError:
+        raise ValueError("timestamp must be an ISO 8601 string")
+    payload["amount"] = float(amount)
+    return payload
+
+
+def _risk_level(score: float) -> str:
+    return "High" if score > 0.7 else "Medium" if score > 0.3 else "Low"
+
+
+async def _read_lines(chunks: AsyncIterator[bytes], queue: asyncio.Queue, max_line_bytes: int):
+    # Corta os blocos em linhas; cada linha vira (seq, transação ou mensagem de erro)
+    seq = 0
+    remainder = b""
+    try:
+        async for chunk in chunks:
+            lines = (remainder + chunk).split(b"\n") if remainder else chunk.split(b"\n")
+            remainder = lines.pop()
+            if len(remainder) > max_line_bytes:
+                raise StreamError(f"line longer than {max_line_bytes} bytes")
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    item: Any = parse_transaction(line)
+                except ValueError as e:
+                    item = str(e)
+                await queue.put((seq, item))
+                seq += 1
+        if remainder.strip():
+            try:
+                item = parse_transaction(remainder)
+            except ValueError as e:
+                item = str(e)
+            await queue.put((seq, item))
+        await queue.put((_END, None))
+    except Exception as e:
+        await queue.put((_END, e))
+
+
+async def score_stream(
+    chunks: AsyncIterator[bytes],
+    score_batch: StreamScorer,
+    max_batch_size: int = 1024,
+    max_in_flight: int = 8192,
+    max_line_bytes: int = 65_536,
+    stats: Optional[StreamStats] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Lê NDJSON de `chunks` e produz, para cada lote pontuado, um bloco NDJSON de resultados
+    """
+    stats = stats or StreamStats()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_in_flight))
+    reader = asyncio.create_task(_read_lines(chunks, queue, max_line_bytes))
+    stats.active += 1
+    stats.opened += 1
+    try:
+        finished = False
+        while not finished:
+            # Espera ao menos um item e junta o que já estiver disponível
+            batch: List[Tuple[int, Any]] = [await queue.get()]
+            while len(batch) < max_batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            if batch[-1][0] is _END:
+                finished = True
+                _, error = batch.pop()
+                if error is not None:
+                    batch.append((-1, f"stream aborted: {error}"))
+
+            valid = [(seq, item) for seq, item in batch if isinstance(item, dict)]
+            scores: Sequence[float] = []
+            if valid:
+                try:
+                    scores = await score_batch([item for _, item in valid])
+                except Exception as e:
+                    # O lote falha, o fluxo continua
+                    message = f"scoring failed: {e.__class__.__name__}"
+                    batch = [(seq, message if isinstance(item, dict) else item) for seq, item in batch]
+                    valid = []
+                else:
+                    stats.batches += 1
+                    stats.scored += len(valid)
+            stats.received += sum(1 for seq, _ in batch if seq >= 0)
+            stats.errors += len(batch) - len(valid)
+            if batch:
+                yield _render(batch, scores)
+    finally:
+        stats.active -= 1
+        reader.cancel()
+
+
+def _render(batch: List[Tuple[int, Any]], scores: Sequence[float]) -> bytes:
+    lines = []
+    scores_iter = iter(scores)
+    for seq, item in batch:
+        if isinstance(item, dict):
+            score = float(next(scores_iter))
+            result = {"seq": seq, "fraud_probability": round(score * 100, 2), "risk_level": _risk_level(score)}
+            if "id" in item:
+                result["id"] = item["id"]
+        else:
+            result = {"seq": seq, "error": item} if seq >= 0 else {"error": item}
+        lines.append(dumps(result))
+    lines.append(b"")
+    return b"\n".join(lines)
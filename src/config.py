@@ -12,11 +12,83 @@ class Settings(BaseSettings):
     HOST: str = "127.0.0.1"
     PORT: int = 8000
     RELOAD: bool = True
-    WORKERS: int = 1
+    WORKERS: int = 1  # modo prefork: 0 = CPUs disponíveis
     DEBUG: bool = True
+    # "dev" (uvicorn com RELOAD) ou "prefork" (produção: modelos pré-carregados, ver src/api/prefork.py)
+    SERVER_MODE: str = "dev"
+    WORKER_THREADS: int = 1  # threads BLAS/OpenMP e de inferência por worker no modo prefork
+    WORKER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    
+    # Inference Settings
+    INFERENCE_BATCHING: bool = True
+    INFERENCE_MAX_BATCH_SIZE: int = 64
+    INFERENCE_MAX_WAIT_MS: float = 2.0
+    INFERENCE_EXECUTOR: str = "thread"  # "thread" ou "process"
+    INFERENCE_WORKERS: int = 0  # 0 = os.cpu_count()
+    INFERENCE_MAX_QUEUE: int = 1024
+    INFERENCE_RETRY_AFTER_SECONDS: int = 1
+    # Modelos servidos pelo motor de árvores compilado: "fraud_detector", "risk_analyzer"
+    COMPILED_MODELS: list[str] = []
+    # Streaming (/ws/detect/fraud e /detect/fraud/stream)
+    STREAM_MAX_BATCH_SIZE: int = 1024
+    STREAM_MAX_IN_FLIGHT: int = 8192  # transações lidas e ainda não pontuadas, por conexão
+    STREAM_MAX_LINE_BYTES: int = 65_536
+    
+    # Model Registry Settings
+    MODELS_PATH: str = "models"
+    MODEL_MMAP_MODE: Optional[str] = "r"  # None desativa o mmap
+    MODEL_WATCH_INTERVAL_SECONDS: float = 0  # 0 desativa a observação do diretório
+    # Modelos (e sklearn/xgboost) carregados no primeiro uso ou no aquecimento, não no import
+    MODEL_LAZY_LOADING: bool = True
+    MODEL_WARMUP_ON_STARTUP: bool = True  # aquece em segundo plano no startup; /ready indica o fim
+    DELINQUENCY_MODEL_PATH: str = "models/delinquency"
+    DELINQUENCY_BATCH_MAX: int = 100_000
+    BOLETO_FRAUD_MODEL_PATH: str = "models/boleto_fraud"
+    BOLETO_BATCH_MAX: int = 100_000
+    BOLETO_ANOMALY_WEIGHT: float = 0.5  # peso do Isolation Forest no score combinado
+    
+    # Upload Settings
+    UPLOAD_CSV_CHUNK_ROWS: int = 100_000
+    
+    # Background Job Settings
+    JOB_STORE_URL: str = "memory://"  # memory://, sqlite:///jobs.db ou redis://host:6379/0
+    JOB_WORKERS: int = 4
+    JOB_SPOOL_DIR: Optional[str] = None  # None = diretório temporário do sistema
+    # Jobs não terminados sem atualização há mais que isso são encerrados no startup (0 = só os
+    # de workers mortos deste host; necessário com redis:// compartilhado entre máquinas)
+    JOB_STALE_SECONDS: int = 0
+    
+    # Response Cache Settings
+    RESPONSE_CACHE_URL: str = "memory://"  # memory:// ou redis://host:6379/0
+    RESPONSE_CACHE_TTL_SECONDS: float = 30  # 0 desativa o cache
+    RESPONSE_CACHE_MAX_ENTRIES: int = 256
+    
+    # Prediction Cache Settings
+    PREDICTION_CACHE_TTL_SECONDS: float = 300  # 0 desativa o cache de predições
+    PREDICTION_CACHE_MAX_ENTRIES: int = 100_000  # nível local, por processo
+    PREDICTION_CACHE_URL: Optional[str] = None  # nível compartilhado opcional, ex.: redis://host:6379/1
+    
+    # Feature Store Settings
+    FEATURE_STORE_MAX_KEYS: int = 100_000  # chaves (estabelecimentos + categorias) em memória
+    FEATURE_STORE_SNAPSHOT_PATH: Optional[str] = None  # None desativa snapshot/restauração
+    FEATURE_STORE_SNAPSHOT_INTERVAL_SECONDS: float = 60
+    
+    # Archive Settings
+    # Arquivo colunar particionado por dia (src/api/archive.py); None desativa
+    ARCHIVE_PATH: Optional[str] = None
+    ARCHIVE_FLUSH_ROWS: int = 50_000
+    ARCHIVE_FLUSH_INTERVAL_SECONDS: float = 5
+    ARCHIVE_COMPACT_INTERVAL_SECONDS: float = 3600  # compacta os dias fechados; 0 desativa
     
     # Database Settings
-    DATABASE_URL: Optional[str] = None
+    DATABASE_URL: Optional[str] = None  # None = SQLite local (./financeai.db)
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    TRANSACTIONS_BULK_MAX: int = 50_000
+    
+    # Metrics Settings
+    # Com vários workers, defina também PROMETHEUS_MULTIPROC_DIR (ver src/api/metrics.py)
+    METRICS_ENABLED: bool = True
     
     # Security Settings
     SECRET_KEY: str = "your-secret-key-here"  # Change this in production
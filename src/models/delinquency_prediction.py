@@ -1,89 +1,111 @@
 import numpy as np
-import xgboost as xgb
-from sklearn.preprocessing import StandardScaler
+import pandas as pd
 import joblib
+from src.models.registry import ModelRegistry
+
+FEATURES = [
+    'historico_pagamentos',
+    'valor_contrato',
+    'prazo_contrato',
+    'score_credito',
+    'renda',
+    'tempo_emprego',
+    'quantidade_parcelas_pagas',
+    'taxa_utilizacao_credito'
+]
 
 class DelinquencyPredictionModel:
-    def __init__(self):
+    def __init__(self, n_jobs=None):
+        # xgboost e sklearn são importados só ao criar o modelo, não ao importar o módulo
+        import xgboost as xgb
+        from sklearn.preprocessing import StandardScaler
+        
         self.model = xgb.XGBClassifier(
             n_estimators=100,
             learning_rate=0.1,
             max_depth=5,
-            random_state=42
+            random_state=42,
+            eval_metric='auc',
+            n_jobs=n_jobs
         )
         self.scaler = StandardScaler()
         
-    def preprocess_data(self, data):
+    @property
+    def is_fitted(self):
+        return hasattr(self.scaler, 'mean_') and hasattr(self.model, '_Booster')
+    
+    def preprocess_data(self, data, fit=False):
         """
-        Pré-processa os dados para previsão de inadimplência
+        Pré-processa os dados para previsão de inadimplência.
+        
+        O scaler só é ajustado no treino (fit=True); na previsão apenas transforma.
+        Aceita DataFrame, lista de dicts ou matriz (n, 8) na ordem de FEATURES.
         """
-        features = [
-            'historico_pagamentos',
-            'valor_contrato',
-            'prazo_contrato',
-            'score_credito',
-            'renda',
-            'tempo_emprego',
-            'quantidade_parcelas_pagas',
-            'taxa_utilizacao_credito'
-        ]
+        if isinstance(data, np.ndarray):
+            values = data
+        else:
+            if not isinstance(data, pd.DataFrame):
+                data = pd.DataFrame.from_records(data, columns=FEATURES)
+            values = data[FEATURES].to_numpy(dtype=np.float64)
         
         # Normaliza features
-        data_scaled = self.scaler.fit_transform(data[features])
-        return data_scaled
+        if fit:
+            return self.scaler.fit_transform(values)
+        return self.scaler.transform(values)
     
     def train(self, X, y):
         """
         Treina o modelo de previsão de inadimplência
         """
-        processed_data = self.preprocess_data(X)
-        self.model.fit(
-            processed_data,
-            y,
-            eval_metric='auc',
-            verbose=True
-        )
+        processed_data = self.preprocess_data(X, fit=True)
+        self.model.fit(processed_data, y)
+    
+    def predict_batch(self, data):
+        """
+        Probabilidade de inadimplência de uma carteira de contratos.
+        
+        Usa inplace_predict do booster: sem DMatrix intermediária e com as
+        threads nativas do XGBoost.
+        """
+        processed_data = np.ascontiguousarray(self.preprocess_data(data), dtype=np.float32)
+        if not len(processed_data):
+            return np.empty(0, dtype=np.float32)
+        return self.model.get_booster().inplace_predict(processed_data)
     
     def predict_probability(self, data):
         """
         Prediz a probabilidade de inadimplência
         """
-        processed_data = self.preprocess_data(data)
-        probabilities = self.model.predict_proba(processed_data)
-        return probabilities[:, 1]  # Retorna probabilidade da classe positiva
+        return self.predict_batch(data)
     
     def get_feature_importance(self):
         """
         Retorna a importância de cada feature no modelo
         """
         feature_importance = self.model.feature_importances_
-        features = [
-            'historico_pagamentos',
-            'valor_contrato',
-            'prazo_contrato',
-            'score_credito',
-            'renda',
-            'tempo_emprego',
-            'quantidade_parcelas_pagas',
-            'taxa_utilizacao_credito'
-        ]
-        
-        return dict(zip(features, feature_importance))
+        return dict(zip(FEATURES, feature_importance))
     
-    def save_model(self, path):
+    def save_model(self, path, version=None):
         """
-        Salva o modelo treinado
+        Salva o modelo treinado como uma nova versão no registro de modelos em `path`
         """
         model_data = {
             'model': self.model,
             'scaler': self.scaler
         }
-        joblib.dump(model_data, path)
+        return ModelRegistry(path).publish(
+            model_data,
+            metadata={'model': type(self).__name__},
+            version=version
+        )
     
-    def load_model(self, path):
+    def load_model(self, path, version=None, mmap_mode='r'):
         """
-        Carrega um modelo salvo
+        Carrega um modelo salvo (registro de modelos ou arquivo joblib único legado)
         """
-        model_data = joblib.load(path)
+        if ModelRegistry.exists(path):
+            model_data, _ = ModelRegistry(path).load(version, mmap_mode=mmap_mode)
+        else:
+            model_data = joblib.load(path, mmap_mode=mmap_mode)
         self.model = model_data['model']
         self.scaler = model_data['scaler']
@@ -1,10 +1,21 @@
 import numpy as np
-from sklearn.ensemble import IsolationForest, RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
+import pandas as pd
 import joblib
+from src.models.registry import ModelRegistry
+
+FEATURES = [
+    'valor_boleto',
+    'tempo_cliente',
+    'frequencia_pagamentos',
+    'valor_medio_transacoes'
+]
 
 class FraudDetectionModel:
-    def __init__(self):
+    def __init__(self, anomaly_weight=0.5):
+        # sklearn é importado só ao criar o modelo, não ao importar o módulo
+        from sklearn.ensemble import IsolationForest, RandomForestClassifier
+        from sklearn.preprocessing import StandardScaler
+        
         self.isolation_forest = IsolationForest(
             contamination=0.1,
             random_state=42
@@ -14,47 +25,101 @@ class FraudDetectionModel:
             random_state=42
         )
         self.scaler = StandardScaler()
+        self.anomaly_weight = anomaly_weight
         
-    def preprocess_data(self, data):
+    @property
+    def is_fitted(self):
+        return hasattr(self.scaler, 'mean_') and hasattr(self.isolation_forest, 'estimators_')
+    
+    @property
+    def is_supervised(self):
+        return hasattr(self.random_forest, 'estimators_')
+    
+    def preprocess_data(self, data, fit=False):
         """
-        Pré-processa os dados para detecção de fraude
+        Pré-processa os dados para detecção de fraude.
+        
+        O scaler só é ajustado no treino (fit=True); na previsão apenas transforma.
+        Aceita DataFrame, lista de dicts ou matriz (n, 4) na ordem de FEATURES.
         """
-        numeric_features = [
-            'valor_boleto',
-            'tempo_cliente',
-            'frequencia_pagamentos',
-            'valor_medio_transacoes'
-        ]
+        if isinstance(data, np.ndarray):
+            values = data
+        else:
+            if not isinstance(data, pd.DataFrame):
+                data = pd.DataFrame.from_records(data, columns=FEATURES)
+            values = data[FEATURES].to_numpy(dtype=np.float64)
         
         # Normaliza features numéricas
-        data_scaled = self.scaler.fit_transform(data[numeric_features])
-        return data_scaled
+        if fit:
+            return self.scaler.fit_transform(values)
+        return self.scaler.transform(values)
     
     def train_anomaly_detection(self, data):
         """
-        Treina o modelo de detecção de anomalias
+        Treina o modelo de detecção de anomalias; o scaler é sempre reajustado aos dados novos
         """
-        processed_data = self.preprocess_data(data)
+        processed_data = self.preprocess_data(data, fit=True)
         self.isolation_forest.fit(processed_data)
         
-    def train_supervised(self, X, y):
+    def train_supervised(self, X, y, reuse_scaler=None):
         """
-        Treina o modelo supervisionado com dados rotulados
+        Treina o modelo supervisionado com dados rotulados.
+        
+        Os dois modelos compartilham o scaler. Por padrão (reuse_scaler=None) usa o
+        já ajustado, se houver. Com reuse_scaler=False o scaler é reajustado a X e o
+        Isolation Forest já treinado é retreinado em X, na mesma escala.
         """
-        processed_data = self.preprocess_data(X)
+        if reuse_scaler is None:
+            reuse_scaler = hasattr(self.scaler, 'mean_')
+        if reuse_scaler and not hasattr(self.scaler, 'mean_'):
+            raise ValueError("reuse_scaler=True requires a fitted scaler; train the anomaly detector first")
+        processed_data = self.preprocess_data(X, fit=not reuse_scaler)
+        if not reuse_scaler and hasattr(self.isolation_forest, 'estimators_'):
+            self.isolation_forest.fit(processed_data)
         self.random_forest.fit(processed_data, y)
     
+    def score(self, data, anomaly_weight=None):
+        """
+        Pontuação unificada: pré-processa uma vez e avalia cada floresta uma única vez.
+        
+        Retorna, por linha:
+        - anomaly_score: score do Isolation Forest em (0, 1], maior = mais anômalo
+        - is_anomaly: mesmo critério de IsolationForest.predict
+        - fraud_probability: probabilidade do modelo supervisionado (None se não treinado)
+        - fraud_score: anomaly_weight * anomaly_score + (1 - anomaly_weight) * fraud_probability
+        """
+        if anomaly_weight is None:
+            anomaly_weight = self.anomaly_weight
+        processed_data = self.preprocess_data(data)
+        
+        # decision_function e predict derivam ambos de score_samples: uma passada basta
+        samples = self.isolation_forest.score_samples(processed_data)
+        decision = samples - self.isolation_forest.offset_
+        anomaly_score = -samples
+        
+        result = {
+            'anomaly_score': anomaly_score,
+            'decision': decision,
+            'is_anomaly': decision < 0,
+            'fraud_probability': None,
+            'fraud_score': anomaly_score
+        }
+        if self.is_supervised:
+            probability = self.random_forest.predict_proba(processed_data)[:, 1]
+            result['fraud_probability'] = probability
+            result['fraud_score'] = anomaly_weight * anomaly_score + (1 - anomaly_weight) * probability
+        return result
+    
     def predict_anomalies(self, data):
         """
         Detecta anomalias nos dados
         """
         processed_data = self.preprocess_data(data)
         anomaly_scores = self.isolation_forest.decision_function(processed_data)
-        predictions = self.isolation_forest.predict(processed_data)
         
         return {
             'scores': anomaly_scores,
-            'is_anomaly': predictions == -1
+            'is_anomaly': anomaly_scores < 0
         }
     
     def predict_fraud_probability(self, data):
@@ -65,22 +130,29 @@ class FraudDetectionModel:
         probabilities = self.random_forest.predict_proba(processed_data)
         return probabilities[:, 1]  # Retorna probabilidade da classe positiva
     
-    def save_model(self, path):
+    def save_model(self, path, version=None):
         """
-        Salva o modelo treinado
+        Salva o modelo treinado como uma nova versão no registro de modelos em `path`
         """
         model_data = {
             'isolation_forest': self.isolation_forest,
             'random_forest': self.random_forest,
             'scaler': self.scaler
         }
-        joblib.dump(model_data, path)
+        return ModelRegistry(path).publish(
+            model_data,
+            metadata={'model': type(self).__name__},
+            version=version
+        )
     
-    def load_model(self, path):
+    def load_model(self, path, version=None, mmap_mode='r'):
         """
-        Carrega um modelo salvo
+        Carrega um modelo salvo (registro de modelos ou arquivo joblib único legado)
         """
-        model_data = joblib.load(path)
+        if ModelRegistry.exists(path):
+            model_data, _ = ModelRegistry(path).load(version, mmap_mode=mmap_mode)
+        else:
+            model_data = joblib.load(path, mmap_mode=mmap_mode)
         self.isolation_forest = model_data['isolation_forest']
         self.random_forest = model_data['random_forest']
         self.scaler = model_data['scaler']
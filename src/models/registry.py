@@ -0,0 +1,180 @@
+"""
+Registro versionado de artefatos de modelos.
+
+Layout em disco:
+
+    <raiz>/
+        CURRENT                  versão ativa
+        <versão>/
+            manifest.json        versão, data, checksums e metadados
+            <artefato>.joblib    um arquivo por artefato, sem compressão
+
+Os artefatos são gravados sem compressão para que `joblib.load` possa
+mapear os arrays NumPy em memória (`mmap_mode`), permitindo que workers
+compartilhem as mesmas páginas. Versões são publicadas em um diretório
+temporário e renomeadas atomicamente; CURRENT é trocado com os.replace.
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+
+
+class ArtifactChecksumError(ValueError):
+    """
+    Checksum de um artefato não confere com o manifesto
+    """
+
+
+def current_rss_mb() -> float:
+    """
+    Memória residente atual do processo, em MB
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Publica e carrega conjuntos de artefatos versionados em um diretório
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.last_load: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def exists(root: str) -> bool:
+        return os.path.isfile(os.path.join(root, CURRENT_FILE))
+
+    def versions(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.isfile(os.path.join(self.root, name, MANIFEST_FILE))
+        )
+
+    def current_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def manifest(self, version: Optional[str] = None) -> Dict[str, Any]:
+        version = version or self.current_version()
+        if version is None:
+            raise FileNotFoundError(f"No active model version in {self.root}")
+        with open(os.path.join(self.root, version, MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def publish(
+        self,
+        artifacts: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None,
+        version: Optional[str] = None,
+        activate: bool = True,
+    ) -> str:
+        """
+        Grava os artefatos como uma nova versão e, por padrão, a torna ativa
+        """
+        version = version or datetime.now().strftime("%Y%m%d%H%M%S%f")
+        final_dir = os.path.join(self.root, version)
+        if os.path.exists(final_dir):
+            raise FileExistsError(f"Model version {version} already exists in {self.root}")
+
+        staging_dir = os.path.join(self.root, f".staging-{version}")
+        os.makedirs(staging_dir)
+        try:
+            entries = {}
+            for name, obj in artifacts.items():
+                filename = f"{name}.joblib"
+                path = os.path.join(staging_dir, filename)
+                joblib.dump(obj, path, compress=0)
+                entries[name] = {
+                    "file": filename,
+                    "sha256": file_sha256(path),
+                    "bytes": os.path.getsize(path),
+                }
+            manifest = {
+                "version": version,
+                "created_at": datetime.now().isoformat(),
+                "artifacts": entries,
+                "metadata": metadata or {},
+            }
+            with open(os.path.join(staging_dir, MANIFEST_FILE), "w") as f:
+                json.dump(manifest, f, indent=2)
+            os.rename(staging_dir, final_dir)
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version: str):
+        if not os.path.isfile(os.path.join(self.root, version, MANIFEST_FILE)):
+            raise FileNotFoundError(f"Model version {version} not found in {self.root}")
+        tmp_path = os.path.join(self.root, f".{CURRENT_FILE}.tmp")
+        with open(tmp_path, "w") as f:
+            f.write(version)
+        os.replace(tmp_path, os.path.join(self.root, CURRENT_FILE))
+
+    def load(
+        self,
+        version: Optional[str] = None,
+        mmap_mode: Optional[str] = "r",
+        verify: bool = True,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Carrega todos os artefatos de uma versão (a ativa por padrão).
+
+        Retorna (artefatos, manifesto) e registra tempo de carga e RSS em `last_load`.
+        """
+        manifest = self.manifest(version)
+        version_dir = os.path.join(self.root, manifest["version"])
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+
+        artifacts = {}
+        for name, entry in manifest["artifacts"].items():
+            path = os.path.join(version_dir, entry["file"])
+            if verify and file_sha256(path) != entry["sha256"]:
+                raise ArtifactChecksumError(f"Checksum mismatch for {name} in version {manifest['version']}")
+            artifacts[name] = joblib.load(path, mmap_mode=mmap_mode)
+
+        self.last_load = {
+            "version": manifest["version"],
+            "load_seconds": time.perf_counter() - start,
+            "mmap_mode": mmap_mode,
+            "rss_before_mb": rss_before,
+            "rss_after_mb": current_rss_mb(),
+            "pid": os.getpid(),
+        }
+        return artifacts, manifest
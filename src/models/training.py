@@ -0,0 +1,386 @@
+"""
+Treinamento em blocos para bases que não cabem em memória.
+
+Os dados são lidos em blocos de um CSV, de um Parquet ou do banco (SQL) e
+percorridos duas vezes:
+
+1. ajuste incremental do scaler (`partial_fit`), contagem de linhas e classes
+   e, no detector de fraudes, os vocabulários de estabelecimento/categoria;
+2. crescimento das florestas com `warm_start`: cada bloco acrescenta árvores
+   proporcionais ao seu tamanho, construídas em paralelo (`n_jobs`). O XGBoost
+   lê os blocos por um DataIter com memória externa (ExtMemQuantileDMatrix).
+
+A memória de pico fica limitada ao tamanho do bloco. Os modelos resultantes
+são os mesmos objetos usados pela API e são salvos no registro de modelos.
+
+Uso: python -m src.models.training financial dados.parquet --output models
+"""
+import argparse
+import numbers
+import os
+import tempfile
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+# Bloco do DataFrame -> matriz de features
+FeatureExtractor = Callable[[pd.DataFrame], np.ndarray]
+
+
+class ChunkSource:
+    """
+    Fonte de blocos reiterável: cada iteração relê a fonte desde o início.
+
+    `source` pode ser um caminho .csv, .parquet/.pq ou uma URL de banco
+    (SQLAlchemy); para bancos, `query` é a consulta (padrão: tabela inteira
+    `table`).
+    """
+
+    def __init__(self, source: str, chunk_rows: int = 100_000, columns: Optional[Sequence[str]] = None,
+                 query: Optional[str] = None, table: str = "transactions"):
+        self.source = source
+        self.chunk_rows = chunk_rows
+        self.columns = list(columns) if columns is not None else None
+        self.query = query
+        self.table = table
+
+    @property
+    def kind(self) -> str:
+        if "://" in self.source:
+            return "sql"
+        if self.source.endswith((".parquet", ".pq")):
+            return "parquet"
+        return "csv"
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        if self.kind == "csv":
+            yield from pd.read_csv(self.source, chunksize=self.chunk_rows, usecols=self.columns)
+        elif self.kind == "parquet":
+            import pyarrow.parquet as pq
+
+            parquet_file = pq.ParquetFile(self.source)
+            for batch in parquet_file.iter_batches(batch_size=self.chunk_rows, columns=self.columns):
+                yield batch.to_pandas()
+        else:
+            from sqlalchemy import create_engine, text
+
+            engine = create_engine(self.source)
+            columns = ", ".join(self.columns) if self.columns else "*"
+            query = self.query or f"SELECT {columns} FROM {self.table}"
+            try:
+                with engine.connect().execution_options(stream_results=True) as conn:
+                    yield from pd.read_sql(text(query), conn, chunksize=self.chunk_rows)
+            finally:
+                engine.dispose()
+
+
+class VocabularyCounter:
+    """
+    Conta os hashes das colunas de texto bloco a bloco, para montar os vocabulários
+    (ml_models.CATEGORICAL_FEATURES) e as estatísticas dos ids sem outra passada
+    """
+
+    def __init__(self, columns: Dict[str, str]):
+        self.columns = dict(columns)  # coluna de texto -> feature numérica
+        self.encoded: Optional[Dict[str, str]] = None  # colunas codificadas, definidas no primeiro bloco
+        self.counts: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.nulls: Dict[str, int] = {}
+        self.n_rows = 0
+
+    def update(self, chunk: pd.DataFrame):
+        from src.api.vocabulary import hash_values
+
+        if self.encoded is None:
+            # Como em _extract_transaction_features: a feature numérica presente dispensa a codificação
+            self.encoded = {column: name for column, name in self.columns.items()
+                            if column in chunk.columns and name not in chunk.columns}
+        self.n_rows += len(chunk)
+        for column in self.encoded:
+            values = chunk[column]
+            nulls = values.isna().to_numpy()
+            hashes, counts = np.unique(hash_values(values[~nulls]), return_counts=True)
+            if column in self.counts:
+                previous_hashes, previous_counts = self.counts[column]
+                merged, inverse = np.unique(np.concatenate([previous_hashes, hashes]), return_inverse=True)
+                counts = np.bincount(inverse, weights=np.concatenate([previous_counts, counts]),
+                                     minlength=len(merged)).astype(np.int64)
+                hashes = merged
+            self.counts[column] = (hashes, counts)
+            self.nulls[column] = self.nulls.get(column, 0) + int(nulls.sum())
+
+    def vocabularies(self) -> Dict:
+        from src.api.vocabulary import Vocabulary
+
+        return {column: Vocabulary(self.counts.get(column, (np.empty(0, dtype=np.uint64), None))[0])
+                for column in self.encoded or {}}
+
+    def moments(self, column: str) -> Tuple[float, float]:
+        """
+        Média e variância dos ids da coluna (id = 1 + posição do hash; nulos = 0)
+        """
+        hashes, counts = self.counts.get(column, (np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)))
+        ids = np.arange(1, len(hashes) + 1, dtype=np.float64)
+        mean = float(counts @ ids) / self.n_rows
+        return mean, float(counts @ (ids * ids)) / self.n_rows - mean * mean
+
+    def fix_scaler(self, scaler: StandardScaler, features: Sequence[str]):
+        # O scaler viu ids provisórios (0): corrige média, variância e escala das features codificadas
+        for column, name in (self.encoded or {}).items():
+            if name not in features:
+                continue
+            index = list(features).index(name)
+            mean, var = self.moments(column)
+            scaler.mean_[index] = mean
+            scaler.var_[index] = max(var, 0.0)
+            scaler.scale_[index] = np.sqrt(scaler.var_[index]) or 1.0
+
+
+def fit_scaler(source: ChunkSource, extract: FeatureExtractor, scaler: Optional[StandardScaler] = None,
+               label_column: Optional[str] = None, vocabularies: Optional[VocabularyCounter] = None,
+               ) -> Tuple[StandardScaler, int, Optional[pd.DataFrame]]:
+    """
+    Primeira passada: ajusta o scaler com partial_fit, conta as linhas, guarda
+    uma linha de exemplo por classe de `label_column` e conta os valores das
+    colunas de texto em `vocabularies`
+    """
+    scaler = scaler if scaler is not None else StandardScaler()
+    n_rows = 0
+    exemplars: List[pd.DataFrame] = []
+    for chunk in source:
+        if not len(chunk):
+            continue
+        scaler.partial_fit(extract(chunk))
+        if vocabularies is not None:
+            vocabularies.update(chunk)
+        n_rows += len(chunk)
+        if label_column is not None:
+            exemplars.append(chunk.drop_duplicates(label_column))
+    if not n_rows:
+        raise ValueError("Training source is empty")
+    if label_column is None:
+        return scaler, n_rows, None
+    return scaler, n_rows, pd.concat(exemplars, ignore_index=True).drop_duplicates(label_column)
+
+
+def resolve_max_samples(max_samples, n_rows: int) -> int:
+    """
+    `max_samples` do IsolationForest resolvido para a base inteira, como o fit em memória faria
+    """
+    if isinstance(max_samples, str):  # "auto"
+        return min(256, n_rows)
+    if isinstance(max_samples, numbers.Integral):
+        return min(max_samples, n_rows)
+    return int(max_samples * n_rows)
+
+
+def _batches(source: ChunkSource, min_rows: int) -> Iterator[pd.DataFrame]:
+    # Junta blocos menores que `min_rows` aos seguintes; um resto curto no fim vai para o último lote
+    held: Optional[pd.DataFrame] = None
+    buffer: List[pd.DataFrame] = []
+    size = 0
+    for chunk in source:
+        if not len(chunk):
+            continue
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= min_rows:
+            if held is not None:
+                yield held
+            held = buffer[0] if len(buffer) == 1 else pd.concat(buffer, ignore_index=True)
+            buffer, size = [], 0
+    if buffer:
+        held = pd.concat(([held] if held is not None else []) + buffer, ignore_index=True)
+    if held is not None:
+        yield held
+
+
+def grow_forest(forest, source: ChunkSource, extract: FeatureExtractor, n_rows: int,
+                scaler: Optional[StandardScaler] = None, label_column: Optional[str] = None,
+                exemplars: Optional[pd.DataFrame] = None, n_estimators: Optional[int] = None):
+    """
+    Segunda passada: cada bloco acrescenta árvores proporcionais ao seu tamanho (warm_start),
+    com pelo menos uma árvore por bloco.
+
+    Em modelos supervisionados todas as árvores precisam ver o mesmo conjunto de
+    classes: um bloco sem alguma classe recebe a linha de exemplo dela (`exemplars`).
+
+    No IsolationForest o tamanho da subamostra (`max_samples_`) normaliza os
+    escores de todas as árvores: ele é resolvido uma vez a partir de `n_rows` e
+    blocos menores que ele são juntados ao vizinho, para nenhuma árvore crescer
+    com menos linhas. Com `contamination` numérica, o limiar (`offset_`) vem do
+    último lote, pontuado por todas as árvores.
+    """
+    n_estimators = n_estimators or forest.n_estimators
+    isolation = isinstance(forest, IsolationForest)
+    max_samples_param = forest.max_samples if isolation else None
+    min_rows = 1
+    if isolation:
+        min_rows = resolve_max_samples(max_samples_param, n_rows)
+        forest.set_params(max_samples=min_rows)
+    forest.set_params(warm_start=True, n_estimators=0)
+    seen = 0
+    for chunk in _batches(source, min_rows):
+        seen += len(chunk)
+        if label_column is not None:
+            missing = exemplars[~exemplars[label_column].isin(chunk[label_column])]
+            if len(missing):
+                chunk = pd.concat([chunk, missing], ignore_index=True)
+        features = extract(chunk)
+        if scaler is not None:
+            features = scaler.transform(features)
+        forest.set_params(n_estimators=max(forest.n_estimators + 1, round(n_estimators * seen / n_rows)))
+        if label_column is None:
+            forest.fit(features)
+        else:
+            forest.fit(features, chunk[label_column].to_numpy())
+    forest.set_params(warm_start=False)
+    if isolation:
+        forest.set_params(max_samples=max_samples_param)
+        forest.max_samples_ = forest._max_samples = min_rows
+    return forest
+
+
+def train_financial_models(transactions: Optional[ChunkSource] = None, clients: Optional[ChunkSource] = None,
+                           label_column: str = "default", n_jobs: int = -1, models=None,
+                           features: Optional[List[str]] = None):
+    """
+    Treina o detector de fraudes e/ou o analisador de risco de FinancialMLModels em blocos.
+
+    `features` escolhe as colunas do detector como em `train_fraud_detector`
+    (ex.: TRANSACTION_FEATURES + feature_store.FEATURES, com as features de
+    velocidade já calculadas na fonte).
+    """
+    from src.api.ml_models import CATEGORICAL_FEATURES, FinancialMLModels
+
+    models = models if models is not None else FinancialMLModels()
+    if transactions is not None:
+        if features is not None:
+            models.transaction_features = list(features)
+        # Sem vocabulário ainda, as features codificadas saem como 0 na primeira passada
+        models.vocabularies = {}
+        models._index_encoders()
+        extract = models._extract_transaction_features
+        counter = VocabularyCounter(CATEGORICAL_FEATURES)
+        scaler, n_rows, _ = fit_scaler(transactions, extract, vocabularies=counter)
+        counter.fix_scaler(scaler, models.transaction_features)
+        models.vocabularies = counter.vocabularies()
+        models._index_encoders()
+        models.scaler = scaler
+        models.fraud_detector.set_params(n_jobs=n_jobs)
+        grow_forest(models.fraud_detector, transactions, extract, n_rows, scaler=scaler)
+    if clients is not None:
+        extract = models._extract_risk_features
+        # O analisador de risco usa as features sem escala; a passada só conta linhas e classes
+        _, n_rows, exemplars = fit_scaler(clients, extract, label_column=label_column)
+        models.risk_analyzer.set_params(n_jobs=n_jobs)
+        grow_forest(models.risk_analyzer, clients, extract, n_rows, label_column=label_column, exemplars=exemplars)
+    models.compile_models()
+    return models
+
+
+def train_boleto_fraud_model(source: ChunkSource, label_column: Optional[str] = None, n_jobs: int = -1,
+                             model=None):
+    """
+    Treina FraudDetectionModel em blocos; o modelo supervisionado só se houver `label_column`
+    """
+    from src.models.fraud_detection import FEATURES, FraudDetectionModel
+
+    model = model if model is not None else FraudDetectionModel()
+
+    def extract(chunk: pd.DataFrame) -> np.ndarray:
+        return chunk[FEATURES].to_numpy(dtype=np.float64)
+
+    scaler, n_rows, exemplars = fit_scaler(source, extract, label_column=label_column)
+    model.scaler = scaler
+    model.isolation_forest.set_params(n_jobs=n_jobs)
+    grow_forest(model.isolation_forest, source, extract, n_rows, scaler=scaler)
+    if label_column is not None:
+        model.random_forest.set_params(n_jobs=n_jobs)
+        grow_forest(model.random_forest, source, extract, n_rows, scaler=scaler,
+                    label_column=label_column, exemplars=exemplars)
+    return model
+
+
+def train_delinquency_model(source: ChunkSource, label_column: str = "inadimplente",
+                            cache_dir: Optional[str] = None, n_jobs: int = -1, model=None):
+    """
+    Treina DelinquencyPredictionModel com memória externa do XGBoost
+    """
+    import xgboost as xgb
+
+    from src.models.delinquency_prediction import FEATURES, DelinquencyPredictionModel
+
+    model = model if model is not None else DelinquencyPredictionModel()
+
+    def extract(chunk: pd.DataFrame) -> np.ndarray:
+        return chunk[FEATURES].to_numpy(dtype=np.float64)
+
+    scaler, _, _ = fit_scaler(source, extract)
+    model.scaler = scaler
+
+    class ChunkIter(xgb.DataIter):
+        def __init__(self, cache_prefix: str):
+            self._chunks: Optional[Iterator[pd.DataFrame]] = None
+            super().__init__(cache_prefix=cache_prefix)
+
+        def next(self, input_data) -> bool:
+            if self._chunks is None:
+                self._chunks = iter(source)
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return False
+            features = scaler.transform(extract(chunk)).astype(np.float32)
+            input_data(data=features, label=chunk[label_column].to_numpy())
+            return True
+
+        def reset(self):
+            self._chunks = None
+
+    params = model.model.get_xgb_params()
+    params.pop("n_jobs", None)
+    params.update(nthread=n_jobs if n_jobs > 0 else os.cpu_count(), tree_method="hist")
+    params = {name: value for name, value in params.items() if value is not None}
+    with tempfile.TemporaryDirectory(dir=cache_dir, prefix="financeai-xgb-") as tmp:
+        dtrain = xgb.ExtMemQuantileDMatrix(ChunkIter(os.path.join(tmp, "cache")))
+        booster = xgb.train(params, dtrain, num_boost_round=model.model.n_estimators)
+        del dtrain  # libera o cache antes de remover o diretório
+    # Mesmo artefato do treino em memória: um XGBClassifier com o booster treinado
+    model.model.load_model(bytearray(booster.save_raw("ubj")))
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Treinamento em blocos a partir de CSV, Parquet ou SQL")
+    parser.add_argument("model", choices=["financial", "boleto", "delinquency"])
+    parser.add_argument("source", help="Arquivo .csv/.parquet ou URL do banco")
+    parser.add_argument("--clients", help="Fonte dos clientes rotulados (analisador de risco)")
+    parser.add_argument("--query", help="Consulta SQL, para fontes de banco")
+    parser.add_argument("--label-column")
+    parser.add_argument("--features", nargs="+", help="Colunas do detector de fraudes (padrão: TRANSACTION_FEATURES)")
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--output", required=True, help="Diretório do registro de modelos")
+    parser.add_argument("--version")
+    args = parser.parse_args()
+
+    source = ChunkSource(args.source, args.chunk_rows, query=args.query)
+    if args.model == "financial":
+        clients = ChunkSource(args.clients, args.chunk_rows) if args.clients else None
+        models = train_financial_models(source, clients, label_column=args.label_column or "default",
+                                        n_jobs=args.n_jobs, features=args.features)
+        version = models.save_models(args.output, version=args.version)
+    elif args.model == "boleto":
+        model = train_boleto_fraud_model(source, label_column=args.label_column, n_jobs=args.n_jobs)
+        version = model.save_model(args.output, version=args.version)
+    else:
+        model = train_delinquency_model(source, label_column=args.label_column or "inadimplente",
+                                        n_jobs=args.n_jobs)
+        version = model.save_model(args.output, version=args.version)
+    print(f"Published version {version} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def make_transactions(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """Transações sintéticas no formato esperado pelo detector de fraudes"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'amount': rng.lognormal(5, 1, n_rows),
+        'hour_of_day': rng.integers(0, 24, n_rows),
+        'day_of_week': rng.integers(0, 7, n_rows),
+        'merchant_category': rng.integers(0, 20, n_rows),
+    })
+
+
+def make_risk_data(n_rows: int, seed: int = 42):
+    """Dados de clientes sintéticos e rótulos de inadimplência"""
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'income': rng.normal(5000, 1500, n_rows),
+        'debt_ratio': rng.uniform(0, 1, n_rows),
+        'credit_history_length': rng.integers(0, 30, n_rows),
+        'num_credit_lines': rng.integers(0, 10, n_rows),
+        'payment_history_score': rng.uniform(0, 100, n_rows),
+    })
+    labels = (data['debt_ratio'] + rng.normal(0, 0.2, n_rows) > 0.6).astype(int).to_numpy()
+    return data, labels
+
+
+@pytest.fixture(scope="session")
+def trained_models():
+    """Treina os modelos globais da API com dados sintéticos"""
+    from src.api.main import model_manager
+
+    ml_models = model_manager.current
+    ml_models.train_fraud_detector(make_transactions(500))
+    ml_models.train_risk_analyzer(*make_risk_data(500))
+    return ml_models
+
+
+@pytest.fixture
+def transaction_store(monkeypatch):
+    """Banco SQLite em memória no lugar do armazenamento da API, com cache de respostas vazio"""
+    from src.api import main
+    from src.api.cache import MemoryCacheBackend, ResponseCache
+    from src.api.storage import TransactionStore
+
+    store = TransactionStore("sqlite://")
+    monkeypatch.setattr(main, "transaction_store", store)
+    monkeypatch.setattr(main, "response_cache", ResponseCache(MemoryCacheBackend()))
+    return store
@@ -0,0 +1,59 @@
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from src.api import main
+from src.api.aggregates import compute_deltas
+from src.api.storage import TransactionStore
+
+def make_rows():
+    return [
+        {"amount": 100.0, "merchant": "Loja", "timestamp": datetime(2024, 1, 31, 10), "category": "retail",
+         "is_fraud": True, "is_delinquent": None},
+        {"amount": 300.0, "merchant": "Loja", "timestamp": datetime(2024, 2, 1, 10), "category": "retail",
+         "is_fraud": False, "is_delinquent": True},
+        {"amount": 200.0, "merchant": "Loja", "timestamp": datetime(2024, 4, 2, 10), "category": "retail"},
+    ]
+
+def test_compute_deltas_groups_by_granularity():
+    deltas = {(d["granularity"], d["bucket"]): d for d in compute_deltas(make_rows())}
+    assert deltas[("month", "2024-01")]["fraud_count"] == 1
+    assert deltas[("quarter", "2024-Q1")]["count"] == 2
+    assert deltas[("quarter", "2024-Q2")]["amount_sum"] == 200.0
+    assert deltas[("total", "all")]["delinquent_count"] == 1
+    assert len([key for key in deltas if key[0] == "day"]) == 3
+
+def test_rollups_update_incrementally_and_rebuild():
+    store = TransactionStore("sqlite://")
+    rows = make_rows()
+    store.add_many(rows[:2])
+    store.add(rows[2])
+    store.add_many(rows)
+    total = store.rollup_total()
+    assert total["count"] == 6
+    assert total["mean"] == pytest.approx(200.0)
+    assert total["fraud_rate"] == pytest.approx(2 / 6)
+    assert [s["bucket"] for s in store.rollup_series("month", 2)] == ["2024-02", "2024-04"]
+
+    series = store.rollup_series("day", 30)
+    store.rebuild_rollups(chunk_rows=2)
+    assert store.rollup_series("day", 30) == series
+    assert store.rollup_total() == total
+
+def test_dashboards_read_rollups(transaction_store):
+    client = TestClient(main.app)
+    assert client.get("/dashboard").json()["transactionHistory"]  # sem dados: exemplo
+
+    payload = [{**row, "timestamp": row["timestamp"].isoformat()} for row in make_rows()]
+    client.post("/api/transactions/bulk", json={"transactions": payload})
+
+    data = client.get("/api/dashboard/data").json()
+    assert data["total_transactions"] == 3
+    assert data["fraud_rate"] == pytest.approx(1 / 3)
+    assert [p["name"] for p in data["transaction_history"]] == ["31/01", "01/02", "02/04"]
+    assert data["transaction_history"][1]["trend"] == pytest.approx(200.0)
+
+    dashboard = client.get("/dashboard").json()
+    assert [p["name"] for p in dashboard["fraudMetrics"]] == ["Jan/24", "Feb/24", "Apr/24"]
+    assert dashboard["fraudMetrics"][0]["value"] == 1000.0
+    assert dashboard["defaultRisk"][0]["value"] == 50.0
+    assert dashboard["metrics"]["totalTransactions"] == 600.0
@@ -0,0 +1,153 @@
+import fcntl
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from src.api import main
+from src.api import archive as archive_module
+from src.api.archive import TransactionArchive
+
+START = datetime(2024, 3, 1, 9, 0, 0)
+
+def make_history(days: int, per_day: int, seed: int = 5) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n_rows = days * per_day
+    return pd.DataFrame({
+        "timestamp": [START + timedelta(days=i // per_day, minutes=int(m)) for i, m in
+                      enumerate(rng.integers(0, 600, n_rows))],
+        "amount": rng.lognormal(5, 1.5, n_rows).round(2),
+        "merchant": rng.choice(["a", "b", "c"], n_rows),
+        "category": rng.choice(["retail", "travel"], n_rows),
+        "is_fraud": rng.random(n_rows) < 0.1,
+    })
+
+def test_query_matches_pandas_and_prunes_partitions(tmp_path):
+    history = make_history(days=10, per_day=200)
+    archive = TransactionArchive(str(tmp_path), flush_rows=300)
+    for start in range(0, len(history), 300):
+        archive.append_frame(history.iloc[start:start + 300])  # dias divididos entre arquivos
+    archive.flush()
+    assert archive.stats()["partitions"] == 10
+
+    result = archive.query(start=date(2024, 3, 3), end=date(2024, 3, 5), merchant="b",
+                           min_amount=100, max_amount=1000, group_by="category")
+    days = history["timestamp"].dt.date
+    expected = history[(days >= date(2024, 3, 3)) & (days <= date(2024, 3, 5)) & (history["merchant"] == "b")
+                       & (history["amount"] >= 100) & (history["amount"] < 1000)]
+    assert result["partitions_scanned"] == 3
+    by_category = {group["category"]: group for group in result["groups"]}
+    for category, rows in expected.groupby("category"):
+        assert by_category[category]["count"] == len(rows)
+        assert np.isclose(by_category[category]["total_amount"], rows["amount"].sum())
+        assert by_category[category]["fraud_count"] == rows["is_fraud"].sum()
+
+    totals = archive.query(group_by="day")
+    assert [group["day"] for group in totals["groups"]] == [f"2024-03-{d:02d}" for d in range(1, 11)]
+    assert sum(group["count"] for group in totals["groups"]) == len(history)
+
+    assert archive.compact(before=date(2024, 3, 6)) > 0
+    compacted = archive.query(group_by="day")["groups"]
+    assert [(g["day"], g["count"]) for g in compacted] == [(g["day"], g["count"]) for g in totals["groups"]]
+    assert np.allclose([g["total_amount"] for g in compacted], [g["total_amount"] for g in totals["groups"]])
+    partition = tmp_path / "date=2024-03-02"
+    assert len(os.listdir(partition)) == 1
+
+def test_query_during_compaction_never_counts_a_day_twice(tmp_path, monkeypatch):
+    history = make_history(days=2, per_day=200)
+    archive = TransactionArchive(str(tmp_path), flush_rows=100)
+    for start in range(0, len(history), 100):
+        archive.append_frame(history.iloc[start:start + 100])
+    archive.flush()
+    rows_written = archive.stats()["rows_written"]
+
+    # Uma consulta disparada no instante em que o arquivo compactado é publicado
+    results = []
+    replace = archive_module.os.replace
+    def replace_and_query(src, dst):
+        replace(src, dst)
+        if "compacted-" in dst:
+            thread = threading.Thread(target=lambda: results.append(archive.query()["groups"][0]["count"]))
+            thread.start()
+            thread.join(0.2)
+            threads.append(thread)
+    threads = []
+    monkeypatch.setattr(archive_module.os, "replace", replace_and_query)
+
+    assert archive.compact(before=date(2024, 3, 3)) == 2
+    for thread in threads:
+        thread.join()
+    assert results == [len(history), len(history)]
+    assert archive.stats()["rows_written"] == rows_written
+
+def test_query_opens_one_partition_at_a_time(tmp_path, monkeypatch):
+    history = make_history(days=5, per_day=200)
+    archive = TransactionArchive(str(tmp_path), flush_rows=100)
+    for start in range(0, len(history), 100):
+        archive.append_frame(history.iloc[start:start + 100])
+    archive.flush()
+
+    opened = []
+    memory_map = archive_module.pa.memory_map
+    monkeypatch.setattr(archive_module.pa, "memory_map", lambda path: opened.append(path) or memory_map(path))
+    partitions = archive._open(None, None)
+    day, readers = next(partitions)
+    assert day == date(2024, 3, 1) and len(opened) == len(readers) == 2
+    assert sum(len(readers) for _, readers in partitions) == len(opened) - 2 == 8
+
+def test_flusher_compacts_closed_days(tmp_path):
+    history = make_history(days=3, per_day=200)
+    archive = TransactionArchive(str(tmp_path), flush_rows=100)
+    for start in range(0, len(history), 100):
+        archive.append_frame(history.iloc[start:start + 100])
+    archive.flush()
+    assert archive.stats()["files"] == 6
+    with open(tmp_path / ".compact.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)  # outro processo compactando: este não faz nada
+        assert archive.compact() == 0
+
+    archive.start_flusher(0.01, compact_interval_seconds=0.01)
+    try:
+        deadline = time.time() + 10
+        while time.time() < deadline and archive.stats()["files"] > 3:
+            time.sleep(0.02)
+    finally:
+        archive.stop_flusher()
+    assert archive.stats()["files"] == 3
+    assert archive.query()["groups"][0]["count"] == len(history)
+
+def test_amount_range_skips_files_by_metadata(tmp_path):
+    archive = TransactionArchive(str(tmp_path))
+    archive.append([{"timestamp": START, "amount": 10.0, "merchant": "a", "category": "retail"}])
+    archive.flush()
+    archive.append([{"timestamp": START, "amount": 50_000.0, "merchant": "a", "category": "retail",
+                     "is_fraud": True}])
+    archive.flush()
+    result = archive.query(min_amount=10_000)
+    assert result["files_skipped"] == 1 and result["files_scanned"] == 1
+    assert result["groups"][0]["count"] == 1 and result["groups"][0]["fraud_count"] == 1
+
+def test_ingestion_and_uploads_reach_the_archive(tmp_path, transaction_store, monkeypatch):
+    archive = TransactionArchive(str(tmp_path))
+    monkeypatch.setattr(main, "archive", archive)
+    client = TestClient(main.app)
+    payload = {"amount": 20.0, "merchant": "Loja", "timestamp": "2024-03-01T10:00:00", "category": "retail"}
+    assert client.post("/api/transactions", json=payload).status_code == 200
+    assert client.post("/api/transactions/bulk", json={"transactions": [payload] * 3}).status_code == 200
+    csv = b"timestamp,amount,merchant,category\n2024-03-02T10:00:00,500.0,Loja,travel\nbad,1,x,y\n"
+    assert client.post("/upload", files=[("files", ("t.csv", csv, "text/csv"))]).status_code == 200
+    archive.flush()
+
+    response = client.get("/api/analytics/transactions", params={"group_by": "day", "merchant": "Loja"})
+    assert response.status_code == 200
+    assert [(g["day"], g["count"]) for g in response.json()["groups"]] == [("2024-03-01", 4), ("2024-03-02", 1)]
+    banded = client.get("/api/analytics/transactions", params={"amount_band": "100-1k"}).json()
+    assert banded["groups"][0]["total_amount"] == 500.0
+    assert client.get("/api/analytics/transactions", params={"group_by": "hour"}).status_code == 400
+    assert client.get("/api/archive/metrics").json()["partitions"] == 2
+
+def test_analytics_disabled_without_archive(monkeypatch):
+    monkeypatch.setattr(main, "archive", None)
+    assert TestClient(main.app).get("/api/analytics/transactions").status_code == 404
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from src.api import main
+from src.models.fraud_detection import FEATURES, FraudDetectionModel
+
+def make_boletos(n_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'valor_boleto': rng.lognormal(6, 1, n_rows),
+        'tempo_cliente': rng.integers(0, 120, n_rows),
+        'frequencia_pagamentos': rng.uniform(0, 30, n_rows),
+        'valor_medio_transacoes': rng.lognormal(5, 1, n_rows),
+    })
+    labels = (data['valor_boleto'] > data['valor_boleto'].quantile(0.9)).astype(int)
+    return data, labels
+
+def trained_model():
+    data, labels = make_boletos(1000)
+    model = FraudDetectionModel(anomaly_weight=0.25)
+    model.train_anomaly_detection(data)
+    model.train_supervised(data, labels, reuse_scaler=True)
+    return model, data
+
+def test_score_matches_separate_predictions_with_one_pass():
+    model, data = trained_model()
+    calls = []
+    original = model.isolation_forest.score_samples
+    model.isolation_forest.score_samples = lambda X: calls.append(1) or original(X)
+
+    result = model.score(data.iloc[:200])
+    assert len(calls) == 1
+    anomalies = model.predict_anomalies(data.iloc[:200])
+    np.testing.assert_array_equal(result['decision'], anomalies['scores'])
+    np.testing.assert_array_equal(result['is_anomaly'], anomalies['is_anomaly'])
+    probability = model.predict_fraud_probability(data.iloc[:200])
+    np.testing.assert_allclose(result['fraud_score'], 0.25 * result['anomaly_score'] + 0.75 * probability)
+    np.testing.assert_allclose(model.score(data.iloc[:200], anomaly_weight=1)['fraud_score'], result['anomaly_score'])
+
+def test_retraining_refits_the_scaler():
+    model, _ = trained_model()
+    shifted, labels = make_boletos(1000, seed=3)
+    shifted['valor_boleto'] *= 10
+    model.train_anomaly_detection(shifted)
+    np.testing.assert_allclose(model.scaler.mean_, shifted[FEATURES].to_numpy().mean(axis=0))
+    model.train_supervised(shifted, labels, reuse_scaler=True)
+    np.testing.assert_allclose(model.scaler.mean_, shifted[FEATURES].to_numpy().mean(axis=0))
+
+def test_supervised_training_keeps_anomaly_scores():
+    model, data = trained_model()
+    before = model.score(data.iloc[:200])['anomaly_score']
+    shifted, labels = make_boletos(1000, seed=3)
+    shifted['valor_boleto'] *= 10
+    model.train_supervised(shifted, labels)
+    np.testing.assert_array_equal(model.score(data.iloc[:200])['anomaly_score'], before)
+
+    # Scaler reajustado explicitamente: o Isolation Forest é retreinado na nova escala
+    model.train_supervised(shifted, labels, reuse_scaler=False)
+    np.testing.assert_allclose(model.scaler.mean_, shifted[FEATURES].to_numpy().mean(axis=0))
+    retrained = FraudDetectionModel()
+    retrained.train_anomaly_detection(shifted)
+    np.testing.assert_allclose(model.score(data.iloc[:200])['anomaly_score'],
+                               retrained.score(data.iloc[:200])['anomaly_score'])
+
+def test_boleto_endpoint(monkeypatch):
+    client = TestClient(main.app)
+    model, data = trained_model()
+    payload = {"boletos": data.iloc[:30].to_dict('records')}
+    monkeypatch.setattr(main, "boleto_fraud_model", FraudDetectionModel())
+    assert client.post("/detect/fraud/boletos", json=payload).status_code == 503
+
+    monkeypatch.setattr(main, "boleto_fraud_model", model)
+    body = client.post("/detect/fraud/boletos?anomaly_weight=0.5", json=payload).json()
+    expected = model.score(data.iloc[:30], anomaly_weight=0.5)
+    assert body["count"] == 30 and body["anomaly_weight"] == 0.5
+    np.testing.assert_allclose(body["fraud_scores"], expected['fraud_score'] * 100, atol=0.006)
+    assert body["is_anomaly"] == expected['is_anomaly'].tolist()
+    assert client.post("/detect/fraud/boletos?anomaly_weight=2", json=payload).status_code == 422
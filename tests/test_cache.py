@@ -0,0 +1,78 @@
+import asyncio
+import time
+from fastapi.testclient import TestClient
+from src.api import main
+from src.api.cache import MemoryCacheBackend, ResponseCache
+
+def test_memory_backend_lru_and_ttl():
+    async def scenario():
+        backend = MemoryCacheBackend(max_entries=2)
+        await backend.set("a", (b"1", '"a"'), 60)
+        await backend.set("b", (b"2", '"b"'), 60)
+        await backend.get("a")
+        await backend.set("c", (b"3", '"c"'), 60)
+        assert await backend.get("b") is None  # menos recente
+        assert await backend.get("a") == (b"1", '"a"')
+        await backend.set("d", (b"4", '"d"'), 0.01)
+        time.sleep(0.02)
+        assert await backend.get("d") is None
+    asyncio.run(scenario())
+
+def test_concurrent_requests_are_coalesced():
+    cache = ResponseCache(MemoryCacheBackend(), ttl_seconds=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"value": len(calls)}
+
+    async def scenario():
+        key = await cache.key("/dashboard", [])
+        entries = await asyncio.gather(*(cache.get_or_compute(key, compute) for _ in range(20)))
+        assert len({entry for entry in entries}) == 1
+        await cache.get_or_compute(key, compute)
+        await cache.invalidate()
+        assert await cache.key("/dashboard", []) != key
+    asyncio.run(scenario())
+    assert len(calls) == 1
+    assert (cache.misses, cache.coalesced, cache.hits) == (1, 19, 1)
+
+def test_cancelled_leader_does_not_cancel_followers():
+    cache = ResponseCache(MemoryCacheBackend(), ttl_seconds=60)
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return {"value": 1}
+
+    async def scenario():
+        leader = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(cache.get_or_compute("k", compute)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()  # cliente desconectou
+        entries = await asyncio.gather(*followers)
+        assert leader.cancelled()
+        assert len(set(entries)) == 1
+        assert await cache.backend.get("k") == entries[0]
+    asyncio.run(scenario())
+    assert (cache.misses, cache.coalesced) == (1, 3)
+
+def test_dashboard_etag_and_invalidation(transaction_store):
+    client = TestClient(main.app)
+    first = client.get("/api/dashboard/data")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"  # revalida sempre pelo ETag
+    assert client.get("/api/dashboard/data").json() == first.json()
+
+    cached = client.get("/api/dashboard/data", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    payload = {"amount": 10.0, "merchant": "Loja", "timestamp": "2024-01-10T10:00:00", "category": "retail"}
+    client.post("/api/transactions", json=payload)
+    fresh = client.get("/api/dashboard/data", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json()["total_transactions"] == 1
+
+    metrics = client.get("/api/cache/metrics").json()
+    assert (metrics["hits"], metrics["misses"], metrics["not_modified"]) == (2, 2, 1)
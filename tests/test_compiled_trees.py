@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest, RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from src.api.compiled_trees import compile_estimator
+from src.api.ml_models import FinancialMLModels
+from tests.conftest import make_risk_data, make_transactions
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 5))
+    y = (X[:, 0] + rng.normal(0, 0.5, 2000) > 0).astype(int)
+    X_test = rng.normal(scale=2.0, size=(500, 5))
+    return X, y, X_test
+
+def test_random_forest_parity(data):
+    X, y, X_test = data
+    forest = RandomForestClassifier(n_estimators=30, random_state=0).fit(X, y)
+    compiled = compile_estimator(forest)
+    np.testing.assert_array_equal(compiled.predict_proba(X_test), forest.predict_proba(X_test))
+    np.testing.assert_array_equal(compiled.predict_proba(X_test[:1]), forest.predict_proba(X_test[:1]))
+
+@pytest.mark.parametrize("max_features", [1.0, 0.6])
+def test_isolation_forest_parity(data, max_features):
+    X, _, X_test = data
+    forest = IsolationForest(max_features=max_features, random_state=0).fit(X)
+    compiled = compile_estimator(forest)
+    np.testing.assert_array_equal(compiled.score_samples(X_test), forest.score_samples(X_test))
+    np.testing.assert_array_equal(compiled.decision_function(X_test), forest.decision_function(X_test))
+    for row in X_test[:20]:
+        np.testing.assert_array_equal(compiled.score_samples([row]), forest.score_samples([row]))
+
+def test_random_forest_parity_with_missing_values(data):
+    X, y, X_test = data
+    X = X.copy()
+    X[::7, 1] = np.nan
+    forest = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    X_test = X_test.copy()
+    X_test[::3, 1] = np.nan
+    np.testing.assert_array_equal(
+        compile_estimator(forest).predict_proba(X_test), forest.predict_proba(X_test)
+    )
+
+def test_scaler_parity(data):
+    X, _, X_test = data
+    scaler = StandardScaler().fit(X)
+    np.testing.assert_array_equal(compile_estimator(scaler).transform(X_test), scaler.transform(X_test))
+
+def test_compiled_mode_is_selectable_per_model():
+    stock = FinancialMLModels()
+    compiled = FinancialMLModels(compiled=["risk_analyzer"])
+    for models in (stock, compiled):
+        models.train_fraud_detector(make_transactions(300))
+        models.train_risk_analyzer(*make_risk_data(300))
+    assert set(compiled._compiled) == {"risk_analyzer"}
+
+    clients = make_risk_data(20, seed=7)[0].to_dict("records")
+    assert compiled.analyze_risk_batch(clients) == stock.analyze_risk_batch(clients)
+
+    compiled.compile_models(["fraud_detector", "risk_analyzer"])
+    transactions = make_transactions(20, seed=7).to_dict("records")
+    np.testing.assert_array_equal(
+        compiled.detect_fraud_batch(transactions), stock.detect_fraud_batch(transactions)
+    )
+    assert compiled.detect_fraud(transactions[0]) == stock.detect_fraud(transactions[0])
+
+def test_unknown_compiled_model_is_rejected():
+    with pytest.raises(ValueError):
+        FinancialMLModels(compiled=["delinquency"])
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from src.api import main
+from src.models.delinquency_prediction import FEATURES, DelinquencyPredictionModel
+
+def make_contracts(n_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame(rng.normal(size=(n_rows, len(FEATURES))), columns=FEATURES)
+    labels = (data['historico_pagamentos'] + rng.normal(0, 0.5, n_rows) < 0).astype(int)
+    return data, labels
+
+def test_scaler_fitted_once_and_batch_matches_single_rows():
+    data, labels = make_contracts(2000)
+    model = DelinquencyPredictionModel()
+    model.train(data, labels)
+    mean = model.scaler.mean_.copy()
+
+    batch = model.predict_batch(data.iloc[:50])
+    assert np.array_equal(model.scaler.mean_, mean)
+    single = [model.predict_probability(data.iloc[i:i + 1])[0] for i in range(5)]
+    np.testing.assert_array_equal(single, batch[:5])
+    np.testing.assert_allclose(
+        batch, model.model.predict_proba(model.preprocess_data(data.iloc[:50]))[:, 1], rtol=1e-6
+    )
+    np.testing.assert_array_equal(model.predict_batch(data.iloc[:50].to_dict('records')), batch)
+
+def test_delinquency_batch_endpoint(monkeypatch):
+    client = TestClient(main.app)
+    data, labels = make_contracts(500)
+    payload = {"contracts": data.iloc[:20].to_dict('records')}
+    monkeypatch.setattr(main, "delinquency_model", DelinquencyPredictionModel())
+    assert client.post("/predict/delinquency/batch", json=payload).status_code == 503
+
+    main.delinquency_model.train(data, labels)
+    body = client.post("/predict/delinquency/batch", json=payload).json()
+    expected = main.delinquency_model.predict_batch(data.iloc[:20]).astype(np.float64) * 100
+    assert body["count"] == 20
+    np.testing.assert_allclose(body["default_probabilities"], expected, atol=0.006)
+    assert sum(body["summary"][k] for k in ("high_risk", "medium_risk", "low_risk")) == 20
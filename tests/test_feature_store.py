@@ -0,0 +1,118 @@
+import time
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+from fastapi.testclient import TestClient
+from src.api import main
+from src.api.feature_store import FEATURES, FeatureStore
+from src.api.inference import InferenceOverloaded
+from src.api.ml_models import FinancialMLModels
+
+START = datetime(2024, 1, 5, 10, 0, 0)  # sexta-feira
+
+def tx(seconds, amount=10.0, merchant="Loja", category="retail"):
+    return {"amount": amount, "merchant": merchant, "category": category,
+            "timestamp": START + timedelta(seconds=seconds)}
+
+def test_sliding_windows_and_time_features():
+    store = FeatureStore()
+    first = store.enrich(tx(0, 100.0))
+    assert first["merchant_count_24h"] == 0 and first["merchant_seconds_since_last"] == 86400
+    assert (first["hour_of_day"], first["day_of_week"]) == (10, 4)
+
+    second = store.enrich(tx(30, 50.0))
+    assert second["merchant_count_1m"] == 1 and second["merchant_sum_1m"] == 100.0
+    assert second["merchant_seconds_since_last"] == 30
+
+    later = store.enrich(tx(90, 5.0, category="travel"))
+    assert later["merchant_count_1m"] == 0
+    assert later["merchant_count_1h"] == 2 and later["merchant_sum_1h"] == 150.0
+    assert later["category_count_24h"] == 0  # outra categoria
+
+    next_day = store.enrich(tx(86400 + 3600))
+    assert next_day["merchant_count_24h"] == 0 and next_day["merchant_count_1h"] == 0
+    assert set(FEATURES) <= set(next_day)
+
+def test_idle_and_overflow_eviction():
+    store = FeatureStore(max_keys=4)
+    store.enrich(tx(0, merchant="a"))
+    store.enrich(tx(1, merchant="b"))
+    store.enrich(tx(2, merchant="c", category="travel"))
+    assert len(store) == 4 and store.evictions == 1  # merchant "a" saiu primeiro
+    store.enrich(tx(3 * 86400, merchant="d", category="food"))
+    assert len(store) == 2 and store.stats()["evictions"] == 5
+
+def test_snapshot_and_restore(tmp_path):
+    store = FeatureStore()
+    for i in range(50):
+        store.enrich(tx(i * 17, amount=i, merchant=f"m{i % 3}"))
+    path = str(tmp_path / "features.pkl")
+    assert store.snapshot(path) == len(store)
+
+    restored = FeatureStore()
+    assert restored.restore(path) == len(store)
+    probe = tx(900, merchant="m1")
+    assert restored.enrich(probe, update=False) == store.enrich(probe, update=False)
+
+def test_velocity_features_reach_the_model(tmp_path):
+    store = FeatureStore()
+    history = pd.DataFrame(store.enrich_many(
+        tx(i * 13, amount=10 + i % 5, merchant=f"m{i % 7}") for i in range(300)
+    ))
+    features = ["amount", "hour_of_day", "merchant_count_1h", "merchant_seconds_since_last"]
+    models = FinancialMLModels()
+    models.train_fraud_detector(history, features=features)
+    models.save_models(str(tmp_path), version="v1")
+
+    loaded = FinancialMLModels()
+    loaded.load_models(str(tmp_path))
+    assert loaded.transaction_features == features
+    assert 0 <= loaded.detect_fraud(store.enrich(tx(4000, merchant="m1"))) <= 1
+
+def test_detect_fraud_updates_store(trained_models, monkeypatch):
+    monkeypatch.setattr(main, "feature_store", FeatureStore())
+    client = TestClient(main.app)
+    payload = {"amount": 100.0, "merchant": "Loja", "timestamp": "2024-01-10T10:00:00", "category": "retail"}
+    assert client.post("/detect/fraud", json=payload).status_code == 200
+    assert client.post("/detect/fraud/batch", json={"transactions": [payload] * 2}).status_code == 200
+    metrics = client.get("/api/features/metrics").json()
+    assert metrics["updates"] == 3 and metrics["keys"] == 2
+
+def test_preview_matches_enrich_without_updating():
+    store, reference = FeatureStore(), FeatureStore()
+    for i in range(20):
+        store.enrich(tx(i * 7, merchant=f"m{i % 2}"))
+        reference.enrich(tx(i * 7, merchant=f"m{i % 2}"))
+    batch = [tx(200 + i, amount=i, merchant="m0") for i in range(5)]
+    assert store.preview_many(batch) == reference.enrich_many(batch)
+    assert store.updates == 20
+    assert store.record_many(batch) == 5
+    assert store.enrich(tx(300), update=False) == reference.enrich(tx(300), update=False)
+
+def test_rejected_requests_are_not_counted(trained_models, monkeypatch):
+    store = FeatureStore()
+    monkeypatch.setattr(main, "feature_store", store)
+
+    async def overloaded(*args):
+        raise InferenceOverloaded(1)
+
+    monkeypatch.setattr(main.fraud_batcher, "submit", overloaded)
+    monkeypatch.setattr(main.inference_executor, "run", overloaded)
+    client = TestClient(main.app)
+    payload = {"amount": 100.0, "merchant": "Loja", "timestamp": "2024-01-10T10:00:00", "category": "retail"}
+    assert client.post("/detect/fraud", json=payload).status_code == 503
+    assert client.post("/detect/fraud/batch", json={"transactions": [payload] * 2}).status_code == 503
+    assert store.updates == 0 and len(store) == 0
+
+def test_epoch_timestamps_are_utc_on_any_host(monkeypatch):
+    monkeypatch.setenv("TZ", "America/Sao_Paulo")
+    time.tzset()
+    try:
+        store = FeatureStore()
+        epoch = START.replace(tzinfo=timezone.utc).timestamp()
+        numeric = store.enrich({**tx(0), "timestamp": epoch})
+        assert (numeric["hour_of_day"], numeric["day_of_week"]) == (10, 4)
+        later = store.enrich({**tx(30), "timestamp": START + timedelta(seconds=30)})
+        assert later["merchant_seconds_since_last"] == 30 and later["merchant_count_1m"] == 1
+    finally:
+        monkeypatch.undo()
+        time.tzset()
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from src.api.main import app
+
+TRANSACTIONS = [
+    {"amount": 120.5, "merchant": "Loja A", "timestamp": "2024-01-10T10:00:00", "category": "retail"},
+    {"amount": 25000.0, "merchant": "Loja B", "timestamp": "2024-01-10T03:00:00", "category": "crypto"},
+    {"amount": 60.0, "merchant": "Loja C", "timestamp": "2024-01-10T15:30:00", "category": "services"},
+]
+
+@pytest.fixture
+def client(trained_models):
+    return TestClient(app)
+
+def test_detect_fraud_batch_matches_single(trained_models):
+    """O lote deve produzir os mesmos scores que chamadas individuais"""
+    batch_scores = trained_models.detect_fraud_batch(TRANSACTIONS)
+    single_scores = [trained_models.detect_fraud(t) for t in TRANSACTIONS]
+    np.testing.assert_allclose(batch_scores, single_scores)
+
+def test_detect_fraud_batch_endpoint(client):
+    """Resultados retornam na ordem de entrada, com fatores por item"""
+    response = client.post("/detect/fraud/batch", json={"transactions": TRANSACTIONS})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == len(TRANSACTIONS)
+    singles = [client.post("/detect/fraud", json=t).json() for t in TRANSACTIONS]
+    assert body["results"] == singles
+    assert body["results"][1]["factors"] == {
+        "amount": "Suspicious", "timing": "Suspicious", "category": "Review"
+    }
+
+def test_detect_fraud_batch_rejects_empty(client):
+    response = client.post("/detect/fraud/batch", json={"transactions": []})
+    assert response.status_code == 422
@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+import threading
+from src.api.inference import InferenceExecutor, InferenceOverloaded, MicroBatcher
+from src.api.main import app, fraud_batcher
+
+def test_concurrent_requests_are_coalesced():
+    """Chamadas concorrentes são agrupadas e cada uma recebe o próprio resultado"""
+    calls = []
+
+    def double(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, max_batch_size=8, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(20)))
+
+    assert asyncio.run(run()) == [i * 2 for i in range(20)]
+    assert [len(c) for c in calls] == [8, 8, 4]
+    snapshot = batcher.snapshot()
+    assert snapshot["batches"] == 3 and snapshot["items"] == 20
+    assert snapshot["batch_size_histogram"]["<=8"] == 2
+    assert snapshot["queue_depth"] == 0
+
+def test_batch_errors_propagate_to_every_caller():
+    def fail(items):
+        raise ValueError("model not fitted")
+
+    batcher = MicroBatcher(fail, max_wait_ms=1)
+
+    async def run():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert batcher.snapshot()["errors"] == 1
+
+def test_batched_routes_and_metrics(trained_models):
+    client = TestClient(app)
+    response = client.post("/analyze/risk", json={
+        "income": 4000, "debt_ratio": 0.5, "credit_history_length": 3,
+        "num_credit_lines": 2, "payment_history_score": 95
+    })
+    assert response.status_code == 200
+    assert response.json()["risk_factors"]["debt_ratio"] == "High"
+
+    metrics = client.get("/api/inference/metrics").json()
+    risk = next(b for b in metrics["batchers"] if b["name"] == "analyze_risk")
+    assert risk["items"] >= 1
+
+def test_process_executor_matches_in_process_scores(trained_models):
+    """Workers do pool de processos usam cópias aquecidas dos modelos"""
+    transactions = [{"amount": a} for a in (10.0, 500.0, 90000.0)]
+    executor = InferenceExecutor(lambda: trained_models, kind="process", max_workers=1)
+    try:
+        scores = asyncio.run(executor.run("detect_fraud_batch", transactions))
+    finally:
+        executor.shutdown()
+    assert list(scores) == list(trained_models.detect_fraud_batch(transactions))
+
+def test_executor_rejects_when_queue_is_full():
+    release = threading.Event()
+
+    class SlowModels:
+        def wait(self):
+            release.wait(5)
+            return "done"
+
+    executor = InferenceExecutor(lambda: SlowModels(), max_workers=1, max_queue=0, retry_after=3)
+
+    async def run():
+        first = asyncio.ensure_future(executor.run("wait"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(InferenceOverloaded) as exc_info:
+            await executor.run("wait")
+        release.set()
+        return await first, exc_info.value.retry_after
+
+    assert asyncio.run(run()) == ("done", 3)
+    assert executor.snapshot()["rejected"] == 1
+    executor.shutdown()
+
+def test_full_queue_returns_503_with_retry_after(trained_models, monkeypatch):
+    monkeypatch.setattr(fraud_batcher, "max_queue", 0)
+    response = TestClient(app).post("/detect/fraud", json={
+        "amount": 10.0, "merchant": "Loja", "timestamp": "2024-01-10T10:00:00", "category": "retail"
+    })
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
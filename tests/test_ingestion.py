@@ -0,0 +1,37 @@
+import io
+from fastapi.testclient import TestClient
+from src.api.ingestion import profile_csv
+from src.api.main import app
+
+CSV = b"""amount,merchant,hour_of_day
+10.5,Loja A,10
+,Loja B,3
+20000,,23
+7,Loja C,
+"""
+
+def test_profile_is_accumulated_across_chunks():
+    analysis = profile_csv(io.BytesIO(CSV), chunk_rows=2)
+    assert analysis["rows_processed"] == 4
+    assert analysis["chunks"] == 2
+    assert analysis["columns_detected"] == 3
+    assert analysis["data_quality_score"] == 75.0
+    amount = analysis["columns"]["amount"]
+    assert amount == {"type": "numeric", "non_null": 3, "null_ratio": 0.25,
+                      "min": 7.0, "max": 20000.0, "mean": (10.5 + 20000 + 7) / 3}
+    assert analysis["columns"]["merchant"]["type"] == "text"
+
+def test_empty_csv_has_empty_profile():
+    analysis = profile_csv(io.BytesIO(b""))
+    assert analysis["rows_processed"] == 0 and analysis["data_quality_score"] == 0.0
+
+def test_upload_streams_csv_and_scores_chunks(trained_models):
+    client = TestClient(app)
+    response = client.post(
+        "/upload?score=true",
+        files=[("files", ("transactions.csv", CSV, "text/csv"))]
+    )
+    assert response.status_code == 200
+    analysis = response.json()["results"][0]["analysis"]
+    assert analysis["rows_processed"] == 4
+    assert analysis["fraud"]["rows_scored"] == 4
@@ -0,0 +1,115 @@
+import asyncio
+import io
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+import pytest
+from fastapi.testclient import TestClient
+from src.api.jobs import (
+    COMPLETED, FAILED, INTERRUPTED_ERROR, QUEUED, RUNNING, JobManager, JobStore, SQLiteJobStore, create_job_store,
+    new_job,
+)
+from src.api.main import app
+
+CSV = b"amount,merchant\n10.0,Loja A\n20.0,Loja B\n"
+
+def test_sqlite_store_updates_files_atomically(tmp_path):
+    store = create_job_store(f"sqlite:///{tmp_path / 'jobs.db'}")
+    assert isinstance(store, SQLiteJobStore)
+    job = new_job([{"filename": "a.csv", "content_type": "text/csv"},
+                   {"filename": "b.pdf", "content_type": "application/pdf"}])
+    store.create(job)
+    store.update_file(job["id"], 1, error="boom")
+    assert store.get(job["id"])["status"] == "queued"
+    updated = store.update_file(job["id"], 0, result={"type": "CSV"})
+    assert updated["status"] == COMPLETED and updated["files_done"] == 2
+    assert store.get(job["id"])["results"][0] == {"type": "CSV"}
+
+def test_sqlite_store_closes_its_connections(tmp_path, monkeypatch):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    connections = []
+    connect = store._connect
+    monkeypatch.setattr(store, "_connect", lambda: connections.append(connect()) or connections[-1])
+    job = new_job([{"filename": "a.csv", "content_type": "text/csv"}])
+    store.create(job)
+    store.get(job["id"])
+    store.set_status(job["id"], RUNNING)
+    list(store.active_jobs())
+    assert len(connections) == 4
+    for conn in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+def test_job_manager_processes_files_concurrently(tmp_path):
+    def processor(source, filename, content_type):
+        if filename == "bad.csv":
+            raise ValueError("unreadable")
+        return {"filename": filename, "size": len(source.read())}
+
+    manager = JobManager(create_job_store("memory://"), processor, workers=2, spool_dir=str(tmp_path))
+
+    async def run():
+        job = await manager.submit([
+            {"file": io.BytesIO(CSV), "filename": "ok.csv", "content_type": "text/csv"},
+            {"file": io.BytesIO(b"x"), "filename": "bad.csv", "content_type": "text/csv"},
+        ])
+        await manager.wait_idle()
+        return manager.store.get(job["id"])
+
+    job = asyncio.run(run())
+    assert job["status"] == COMPLETED
+    assert job["results"][0] == {"filename": "ok.csv", "size": len(CSV)}
+    assert job["errors"] == [{"filename": "bad.csv", "error": "ValueError: unreadable"}]
+    assert list(tmp_path.iterdir()) == []  # arquivos de spool removidos
+
+def test_recover_fails_jobs_of_dead_workers_and_removes_spools(tmp_path):
+    with pytest.raises(TypeError):
+        JobStore()  # classe abstrata
+    store = create_job_store(f"sqlite:///{tmp_path / 'jobs.db'}")
+    spool = tmp_path / "spool"
+    spool.mkdir()
+    dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    host = socket.gethostname()
+    jobs = {}
+    for name, worker, status in [("dead", f"{host}:{dead.stdout.strip()}", RUNNING),
+                                 ("alive", f"{host}:{os.getppid()}", QUEUED),
+                                 ("other_host", "elsewhere:1", QUEUED),
+                                 ("done", f"{host}:{dead.stdout.strip()}", COMPLETED)]:
+        job = {**new_job([{"filename": f"{name}.csv", "content_type": "text/csv"}]), "worker": worker, "status": status}
+        store.create(job)
+        (spool / f"financeai-job-{job['id']}-0-abc").write_bytes(CSV)
+        jobs[name] = job["id"]
+
+    manager = JobManager(store, lambda *args: {}, spool_dir=str(spool))
+    assert manager.recover() == 1
+    assert store.get(jobs["dead"])["status"] == FAILED
+    assert store.get(jobs["dead"])["errors"][0]["error"] == INTERRUPTED_ERROR
+    assert {store.get(jobs[name])["status"] for name in ("alive", "other_host")} == {QUEUED}
+    assert sorted(p.name.split("-")[2] for p in spool.iterdir()) == sorted(
+        jobs[name] for name in ("alive", "other_host", "done"))
+
+    # Outros hosts não podem ser verificados: só pelo tempo sem atualização
+    store.modify(jobs["other_host"], lambda job: {**job, "updated_at": "2000-01-01T00:00:00"})
+    assert manager.recover(stale_seconds=3600) == 1
+    assert store.get(jobs["other_host"])["status"] == FAILED
+
+def test_upload_job_endpoints():
+    with TestClient(app) as client:
+        response = client.post("/jobs", files=[("files", ("data.csv", CSV, "text/csv"))])
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        lines = [json.loads(line) for line in
+                 client.get(f"/jobs/{job_id}?stream=true").text.splitlines()]
+        assert lines[-1]["status"] == COMPLETED and lines[-1]["progress"] == 100.0
+
+        job = client.get(f"/jobs/{job_id}").json()
+        assert job["results"][0]["analysis"]["rows_processed"] == 2
+
+        background = client.post("/upload?background=true", files=[("files", ("data.csv", CSV, "text/csv"))])
+        assert background.status_code == 202 and "job_id" in background.json()
+        assert client.get("/jobs/unknown").status_code == 404
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+from src.api.main import app
+
+def sample_value(text, name, **labels):
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            if sample.name == name and all(sample.labels.get(k) == v for k, v in labels.items()):
+                return sample.value
+    return 0.0
+
+def test_route_latency_model_stages_and_counters(trained_models):
+    client = TestClient(app)
+    before = client.get("/metrics").text
+    client.get("/api/health")
+    client.get("/jobs/does-not-exist")
+    client.post("/detect/fraud/batch", json={"transactions": [
+        {"amount": 100.0, "merchant": "Loja", "timestamp": "2024-01-10T10:00:00", "category": "retail"}
+    ] * 3})
+    csv = b"amount\n1\n2\n"
+    client.post("/upload", files=[("files", ("t.csv", csv, "text/csv"))])
+    after = client.get("/metrics").text
+
+    def delta(name, **labels):
+        return sample_value(after, name, **labels) - sample_value(before, name, **labels)
+
+    count = "financeai_http_request_duration_seconds_count"
+    assert delta(count, method="GET", route="/api/health", status="200") == 1
+    assert delta(count, method="GET", route="/jobs/{job_id}", status="404") == 1
+    for stage in ("feature_extraction", "scaling", "tree_evaluation", "postprocess"):
+        assert delta("financeai_model_stage_duration_seconds_count", call="detect_fraud_batch", stage=stage) == 1
+    # Codificação das respostas medida onde acontece: lote de fraude e upload
+    assert delta("financeai_response_serialization_seconds_count") == 2
+    assert delta("financeai_rows_processed_total", source="fraud_batch") == 3
+    assert delta("financeai_rows_processed_total", source="upload_csv") == 2
+    assert delta("financeai_upload_bytes_total", content_type="text/csv") == len(csv)
+    assert sample_value(after, "financeai_http_requests_in_flight", method="GET") == 1  # o próprio /metrics
+
+def test_multiprocess_metrics_are_aggregated(tmp_path):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    worker = "from src.api.metrics import record_rows; record_rows('upload_csv', 5)"
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker], env=env, check=True)
+    rendered = subprocess.run(
+        [sys.executable, "-c", "import sys; from src.api.metrics import render_metrics; "
+                               "sys.stdout.write(render_metrics().decode())"],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    assert sample_value(rendered, "financeai_rows_processed_total", source="upload_csv") == 10
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+from src.api.ml_models import FinancialMLModels
+from tests.conftest import make_risk_data, make_transactions
+
+def test_columnar_transaction_features_match_single_record():
+    """O caminho colunar de treino deve gerar as mesmas features do caminho online"""
+    models = FinancialMLModels()
+    data = make_transactions(50)
+    features = models._extract_transaction_features(data)
+    expected = [models._extract_single_transaction_features(row) for row in data.to_dict('records')]
+    assert features.dtype == np.float64 and features.flags['C_CONTIGUOUS']
+    np.testing.assert_array_equal(features, expected)
+
+def test_columnar_risk_features_match_single_record():
+    models = FinancialMLModels()
+    data, _ = make_risk_data(50)
+    features = models._extract_risk_features(data, dtype=np.float32)
+    expected = [models._extract_risk_features_single(row) for row in data.to_dict('records')]
+    assert features.dtype == np.float32
+    np.testing.assert_array_equal(features, np.asarray(expected, dtype=np.float32))
+
+def test_missing_columns_default_to_zero():
+    models = FinancialMLModels()
+    data = pd.DataFrame({'amount': [10.0, 20.0]})
+    np.testing.assert_array_equal(
+        models._extract_transaction_features(data),
+        [[10.0, 0, 0, 0], [20.0, 0, 0, 0]]
+    )
@@ -0,0 +1,103 @@
+import threading
+import time
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from src.api import main
+from src.api.ml_models import FinancialMLModels
+from src.api.model_manager import ModelManager, ReloadInProgress
+from tests.conftest import make_risk_data, make_transactions
+
+def train(seed: int) -> FinancialMLModels:
+    models = FinancialMLModels()
+    models.train_fraud_detector(make_transactions(200, seed=seed))
+    models.train_risk_analyzer(*make_risk_data(200, seed=seed))
+    return models
+
+def test_reload_swaps_atomically_and_reports_costs(tmp_path):
+    path = str(tmp_path)
+    train(1).save_models(path, version="v1")
+    manager = ModelManager(path)
+    manager.load_initial()
+    old = manager.current
+    assert old.version == "v1"
+
+    swapped = []
+    manager.on_swap.append(lambda new, previous: swapped.append((new.version, previous.version)))
+    train(2).save_models(path, version="v2")
+    stats = manager.reload()
+
+    assert manager.current.version == "v2" and manager.current is not old
+    assert swapped == [("v2", "v1")]
+    assert stats["previous_version"] == "v1"
+    assert stats["load_seconds"] > 0 and stats["warmup_seconds"] > 0
+    assert stats["swap_pause_seconds"] < 0.01
+    # Quem ainda segura a referência antiga continua funcionando
+    assert 0 <= old.detect_fraud({"amount": 10.0}) <= 1
+
+def test_failed_reload_keeps_current_model(tmp_path):
+    manager = ModelManager(str(tmp_path))
+    current = manager.current
+    with pytest.raises(Exception):
+        manager.reload()
+    assert manager.current is current
+    assert manager.status()["last_error"]
+
+def test_reload_is_not_undone_by_a_lazy_load_in_progress(tmp_path):
+    path = str(tmp_path)
+    train(1).save_models(path, version="v1")
+    train(2).save_models(path, version="v2")
+    started, release = threading.Event(), threading.Event()
+    instances = []
+
+    class SlowFirstLoad(FinancialMLModels):
+        def load_models(self, *args, **kwargs):
+            super().load_models(*args, **kwargs)
+            if not instances:
+                instances.append(self)
+                started.set()
+                release.wait(10)
+
+    manager = ModelManager(path, factory=SlowFirstLoad, lazy=True)
+    lazy_load = threading.Thread(target=manager.load_initial)
+    lazy_load.start()
+    assert started.wait(10)
+    pinned = threading.Thread(target=manager.reload, args=("v1",))
+    pinned.start()
+    pinned.join(2)  # a troca espera a carga preguiçosa terminar
+    release.set()
+    lazy_load.join()
+    pinned.join()
+    assert manager.current.version == "v1" and manager.current is not instances[0]
+
+def test_watcher_picks_up_new_version(tmp_path):
+    path = str(tmp_path)
+    train(1).save_models(path, version="v1")
+    manager = ModelManager(path)
+    manager.load_initial()
+    assert not manager.check_for_update()
+    train(2).save_models(path, version="v2")
+    assert manager.check_for_update()
+    assert manager.current.version == "v2"
+
+def test_reload_endpoint_and_health_version(tmp_path, monkeypatch):
+    path = str(tmp_path)
+    train(1).save_models(path, version="v1")
+    manager = ModelManager(path)
+    monkeypatch.setattr(main, "model_manager", manager)
+    client = TestClient(main.app)
+
+    response = client.post("/api/admin/models/reload")
+    assert response.status_code == 202
+    for _ in range(100):
+        if not manager.reloading and manager.reload_count:
+            break
+        time.sleep(0.05)
+    assert client.get("/api/health").json()["model_version"] == "v1"
+    assert client.get("/api/models").json()["last_reload"]["version"] == "v1"
+
+    manager._reload_lock.acquire()
+    try:
+        assert client.post("/api/admin/models/reload").status_code == 409
+    finally:
+        manager._reload_lock.release()
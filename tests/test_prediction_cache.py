@@ -0,0 +1,132 @@
+import asyncio
+from fastapi.testclient import TestClient
+from src.api import main
+from src.api.cache import MemoryCacheBackend
+from src.api.prediction_cache import PredictionCache, canonical_key
+
+RISK_REQUEST = {"income": 5000, "debt_ratio": 0.3, "credit_history_length": 10,
+                "num_credit_lines": 3, "payment_history_score": 95.0}
+
+def test_canonical_key_ignores_formatting():
+    assert canonical_key("r", "v1", [5, -0.0, 1]) == canonical_key("r", "v1", [5.0, 0.0, 1.0])
+    assert canonical_key("r", "v1", [5]) != canonical_key("r", "v2", [5])
+
+def test_lru_ttl_and_coalescing():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": len(calls)}
+
+    async def scenario():
+        cache = PredictionCache(max_entries=2, ttl_seconds=60)
+        keys = [canonical_key("r", "v1", [i]) for i in range(3)]
+        results = await asyncio.gather(*(cache.get_or_compute(keys[0], compute) for _ in range(10)))
+        assert len(calls) == 1 and all(r == {"value": 1} for r in results)
+        await cache.get_or_compute(keys[1], compute)
+        await cache.get_or_compute(keys[2], compute)
+        assert len(cache) == 2 and cache.evictions == 1
+        await cache.get_or_compute(keys[0], compute)  # descartada pelo LRU: recalcula
+        assert len(calls) == 4
+
+        short = PredictionCache(ttl_seconds=0.01)
+        await short.get_or_compute(keys[0], compute)
+        await asyncio.sleep(0.02)
+        await short.get_or_compute(keys[0], compute)
+        assert len(calls) == 6
+        return cache.snapshot()["routes"]["r"]
+
+    stats = asyncio.run(scenario())
+    assert stats["coalesced"] == 9 and stats["misses"] == 4 and stats["local_hits"] == 0
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def compute():
+        await asyncio.sleep(0.05)
+        return {"value": 1}
+
+    async def scenario():
+        cache = PredictionCache(ttl_seconds=60)
+        key = canonical_key("r", "v1", [1])
+        leader = asyncio.ensure_future(cache.get_or_compute(key, compute))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(cache.get_or_compute(key, compute)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await asyncio.gather(*followers) == [{"value": 1}] * 3
+        assert cache.get_local(key) == {"value": 1}
+    asyncio.run(scenario())
+
+def test_shared_tier_is_reused_across_processes():
+    shared = MemoryCacheBackend(max_entries=100)
+    key = canonical_key("r", "v1", [1.0, 2.0])
+
+    async def compute():
+        return {"default_risk": 0.25}
+
+    async def scenario():
+        await PredictionCache(shared=shared).get_or_compute(key, compute)
+        other = PredictionCache(shared=shared)
+
+        async def fail():
+            raise AssertionError("should come from the shared tier")
+
+        assert await other.get_or_compute(key, fail) == {"default_risk": 0.25}
+        return other.snapshot()["routes"]["r"]
+
+    assert asyncio.run(scenario())["shared_hits"] == 1
+
+def test_analyze_risk_uses_cache_per_model_version(trained_models, monkeypatch):
+    cache = PredictionCache()
+    monkeypatch.setattr(main, "prediction_cache", cache)
+    monkeypatch.setattr(trained_models, "version", "v-test")
+    client = TestClient(main.app)
+    first = client.post("/analyze/risk", json=RISK_REQUEST).json()
+    reformatted = {**RISK_REQUEST, "income": 5000.0, "payment_history_score": 95}
+    assert client.post("/analyze/risk", json=reformatted).json() == first
+
+    stats = client.get("/api/predictions/metrics").json()["routes"]["analyze_risk"]
+    assert (stats["misses"], stats["local_hits"], stats["hit_rate"]) == (1, 1, 0.5)
+    assert stats["mean_compute_ms"] > 0
+
+    main.model_manager.on_swap[-1](trained_models, trained_models)
+    assert len(cache) == 0 and cache.invalidations == 1
+    monkeypatch.setattr(trained_models, "version", "v-test-2")
+    client.post("/analyze/risk", json=RISK_REQUEST)
+    assert cache.snapshot()["routes"]["analyze_risk"]["misses"] == 2
+
+def test_legacy_reload_does_not_serve_old_shared_entries(tmp_path):
+    import os
+    import joblib
+    from src.api.model_manager import LEGACY_FILES, ModelManager
+    from tests.test_model_manager import train
+
+    def save_legacy(models, mtime):
+        for name in LEGACY_FILES:
+            target = str(tmp_path / name)
+            joblib.dump(getattr(models, name.replace(".joblib", "")), target)
+            os.utime(target, ns=(mtime, mtime))
+
+    old, new = train(1), train(2)
+    save_legacy(old, 1_000_000_000_000_000_000)
+    manager = ModelManager(str(tmp_path))
+    manager.load_initial()
+    shared = MemoryCacheBackend(max_entries=100)
+    cache = PredictionCache(shared=shared)
+    manager.on_swap.append(lambda new, old: cache.invalidate())
+
+    async def predict():
+        models = manager.current
+        key = canonical_key("analyze_risk", models.version, models._extract_risk_features_single(RISK_REQUEST))
+
+        async def compute():
+            return models.analyze_risk(RISK_REQUEST)
+
+        return await cache.get_or_compute(key, compute)
+
+    before = asyncio.run(predict())
+    save_legacy(new, 2_000_000_000_000_000_000)
+    manager.reload()
+    assert manager.current.version.startswith("legacy-") and manager.current.version != old.version
+    assert asyncio.run(predict()) == new.analyze_risk(RISK_REQUEST) != before
+    assert cache.snapshot()["routes"]["analyze_risk"]["shared_hits"] == 0
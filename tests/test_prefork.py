@@ -0,0 +1,134 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import httpx
+import pandas as pd
+import pytest
+
+from src.api import prefork
+from src.api.feature_store import VELOCITY_FEATURES
+from src.api.ml_models import FinancialMLModels
+from src.config import Settings
+from tests.test_model_manager import train
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_available_cpus_respects_cgroup_quota(monkeypatch):
+    monkeypatch.setattr(prefork.os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+    monkeypatch.setattr(prefork, "_cgroup_cpu_limit", lambda: 1.5)
+    assert prefork.available_cpus() == 2
+    monkeypatch.setattr(prefork, "_cgroup_cpu_limit", lambda: None)
+    assert prefork.available_cpus() == 8
+    monkeypatch.setattr(prefork, "_cgroup_cpu_limit", lambda: 0.2)
+    assert prefork.available_cpus() == 1
+
+def test_pin_threads_limits_loaded_libraries():
+    code = ("import numpy, sklearn.ensemble; from threadpoolctl import threadpool_info; "
+            "from src.api.prefork import pin_threads; pin_threads(1); "
+            "import os; print(os.environ['OMP_NUM_THREADS'], {p['num_threads'] for p in threadpool_info()})")
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True, cwd=ROOT_DIR)
+    assert output.stdout.strip().splitlines()[-1] == "1 {1}"
+
+def test_multiple_workers_refuse_per_process_feature_store(tmp_path):
+    settings = Settings(FEATURE_STORE_SNAPSHOT_PATH=str(tmp_path / "features.json"))
+    with pytest.raises(RuntimeError, match="FEATURE_STORE_SNAPSHOT_PATH"):
+        prefork.PreforkServer(settings, workers=2).preload()
+
+    server = prefork.PreforkServer(Settings(), workers=2)
+    models = train(1)
+    server.app_module = SimpleNamespace(model_manager=SimpleNamespace(current=models, version="v1"))
+    server._check_velocity_features()
+    models.transaction_features = models.transaction_features + VELOCITY_FEATURES[:1]
+    with pytest.raises(RuntimeError, match=VELOCITY_FEATURES[0]):
+        server._check_velocity_features()
+    server.workers = 1
+    server._check_velocity_features()
+
+def test_crashing_worker_logs_its_traceback(capfd):
+    server = prefork.PreforkServer(Settings(), workers=1, ready_timeout=30, graceful_timeout=1)
+    server.app_module = SimpleNamespace(transaction_store=SimpleNamespace())  # sem engine: o worker falha
+    assert server.spawn() is None
+    assert "AttributeError" in capfd.readouterr().err
+
+def test_refused_rolling_restart_keeps_previous_models(tmp_path):
+    from src.api.feature_store import FeatureStore
+    from src.api.model_manager import ModelManager
+    from tests.test_feature_store import tx
+
+    train(1).save_models(str(tmp_path), version="v1")
+    manager = ModelManager(str(tmp_path))
+    manager.load_initial()
+    previous = manager.current
+    history = pd.DataFrame(FeatureStore().enrich_many(tx(i * 13, merchant=f"m{i % 7}") for i in range(300)))
+    velocity = FinancialMLModels()
+    velocity.train_fraud_detector(history, features=["amount", "hour_of_day", VELOCITY_FEATURES[0]])
+    velocity.save_models(str(tmp_path), version="v2")
+
+    server = prefork.PreforkServer(Settings(), workers=2)
+    server.app_module = SimpleNamespace(model_manager=manager)
+    server.rolling_restart()
+    assert manager.last_reload["version"] == "v2"  # carregada, recusada e desfeita
+    assert manager.current is previous and manager.version == "v1"
+
+def worker_pids(pid: int) -> set:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return {int(child) for child in f.read().split()}
+
+def test_prefork_serves_and_restarts_workers_without_downtime(tmp_path):
+    train(1).save_models(str(tmp_path / "models"), version="v1")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = {
+        **os.environ,
+        "SERVER_MODE": "prefork",
+        "WORKERS": "2",
+        "PORT": str(port),
+        "MODELS_PATH": str(tmp_path / "models"),
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'financeai.db'}",
+        "MODEL_WATCH_INTERVAL_SECONDS": "0",
+        "WORKER_GRACEFUL_TIMEOUT_SECONDS": "5",
+    }
+    server = subprocess.Popen([sys.executable, "main.py"], env=env, cwd=ROOT_DIR,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 120
+        while time.time() < deadline and len(worker_pids(server.pid)) < 2:
+            time.sleep(0.2)
+        workers = worker_pids(server.pid)
+        assert len(workers) == 2
+        response = httpx.get(f"{base_url}/ready")
+        assert response.status_code == 200 and response.json()["model_version"] == "v1"
+
+        # Reinício gradual: as requisições continuam sendo atendidas durante toda a troca
+        server.send_signal(signal.SIGHUP)
+        statuses = []
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            statuses.append(httpx.get(f"{base_url}/health").status_code)
+            current = worker_pids(server.pid)
+            if len(current) == 2 and not current & workers:
+                break
+            time.sleep(0.05)
+        assert len(current) == 2 and not current & workers
+        assert set(statuses) == {200}
+
+        # Worker que morre é recriado
+        os.kill(next(iter(current)), signal.SIGKILL)
+        deadline = time.time() + 60
+        while time.time() < deadline and len(worker_pids(server.pid) - current) < 1:
+            time.sleep(0.2)
+        assert len(worker_pids(server.pid)) == 2
+
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=30) == 0
+    finally:
+        if server.poll() is None:
+            server.kill()
+            server.wait()
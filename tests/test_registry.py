@@ -0,0 +1,75 @@
+import os
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from src.api.ml_models import FinancialMLModels
+from src.models.delinquency_prediction import DelinquencyPredictionModel
+from src.models.fraud_detection import FraudDetectionModel
+from src.models.registry import ArtifactChecksumError, ModelRegistry
+from tests.conftest import make_risk_data, make_transactions
+
+def test_publish_and_load_roundtrip(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    first = registry.publish({"weights": np.arange(10.0)}, version="v1")
+    second = registry.publish({"weights": np.arange(20.0)}, version="v2", metadata={"note": "retrain"})
+    assert registry.versions() == [first, second] == ["v1", "v2"]
+    assert registry.current_version() == "v2"
+
+    artifacts, manifest = registry.load()
+    assert isinstance(artifacts["weights"], np.memmap)
+    np.testing.assert_array_equal(artifacts["weights"], np.arange(20.0))
+    assert manifest["metadata"] == {"note": "retrain"}
+    assert registry.last_load["version"] == "v2" and registry.last_load["load_seconds"] >= 0
+
+    artifacts, _ = registry.load("v1", mmap_mode=None)
+    assert len(artifacts["weights"]) == 10
+
+def test_checksum_mismatch_is_detected(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    version = registry.publish({"weights": np.arange(10.0)})
+    with open(os.path.join(str(tmp_path), version, "weights.joblib"), "ab") as f:
+        f.write(b"corrupted")
+    with pytest.raises(ArtifactChecksumError):
+        registry.load()
+
+def test_financial_models_registry_and_legacy_layout(tmp_path):
+    models = FinancialMLModels()
+    models.train_fraud_detector(make_transactions(200))
+    models.train_risk_analyzer(*make_risk_data(200))
+    version = models.save_models(str(tmp_path / "registry"))
+
+    loaded = FinancialMLModels()
+    loaded.load_models(str(tmp_path / "registry"))
+    assert loaded.version == version
+    transactions = make_transactions(10, seed=3).to_dict("records")
+    np.testing.assert_array_equal(loaded.detect_fraud_batch(transactions), models.detect_fraud_batch(transactions))
+
+    legacy_dir = tmp_path / "legacy"
+    legacy_dir.mkdir()
+    for name in ("fraud_detector", "risk_analyzer", "scaler"):
+        joblib.dump(getattr(models, name), str(legacy_dir / f"{name}.joblib"))
+    legacy = FinancialMLModels()
+    legacy.load_models(str(legacy_dir))
+    assert legacy.version.startswith("legacy-")
+    np.testing.assert_array_equal(legacy.detect_fraud_batch(transactions), models.detect_fraud_batch(transactions))
+
+def test_fraud_and_delinquency_models_use_registry_layout(tmp_path):
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.normal(size=(100, 4)), columns=[
+        'valor_boleto', 'tempo_cliente', 'frequencia_pagamentos', 'valor_medio_transacoes'
+    ])
+    fraud = FraudDetectionModel()
+    fraud.train_anomaly_detection(data)
+    fraud.save_model(str(tmp_path / "fraud"))
+    restored = FraudDetectionModel()
+    restored.load_model(str(tmp_path / "fraud"))
+    np.testing.assert_array_equal(
+        restored.isolation_forest.decision_function(restored.preprocess_data(data)),
+        fraud.isolation_forest.decision_function(fraud.preprocess_data(data))
+    )
+
+    DelinquencyPredictionModel().save_model(str(tmp_path / "delinquency"), version="v1")
+    assert ModelRegistry(str(tmp_path / "delinquency")).manifest()["metadata"] == {
+        "model": "DelinquencyPredictionModel"
+    }
@@ -0,0 +1,34 @@
+import json
+from datetime import datetime
+import numpy as np
+from src.api import serialization
+from src.api.main import DashboardData, TransactionHistory
+
+def make_payload():
+    return {
+        "data": DashboardData(
+            total_transactions=2, average_transaction=1.5, fraud_rate=0.1, delinquency_rate=0.2,
+            transaction_history=[TransactionHistory(name="01/01", value=np.float64(1.25), trend=0.0)],
+        ),
+        "scores": np.array([0.5, 0.25], dtype=np.float32),
+        "labels": np.array(["a", None], dtype=object),
+        "count": np.int64(3),
+        "flag": np.bool_(True),
+        "at": datetime(2024, 1, 1, 12),
+    }
+
+EXPECTED = {
+    "data": {"total_transactions": 2, "average_transaction": 1.5, "fraud_rate": 0.1, "delinquency_rate": 0.2,
+             "transaction_history": [{"name": "01/01", "value": 1.25, "trend": 0.0}]},
+    "scores": [0.5, 0.25],
+    "labels": ["a", None],
+    "count": 3,
+    "flag": True,
+    "at": "2024-01-01T12:00:00",
+}
+
+def test_dumps_handles_numpy_and_models():
+    assert json.loads(serialization.dumps(make_payload())) == EXPECTED
+
+def test_stdlib_fallback_matches():
+    assert json.loads(serialization._stdlib_dumps(make_payload())) == EXPECTED
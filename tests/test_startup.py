@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+import time
+from fastapi.testclient import TestClient
+from src.api import main
+from src.api.model_manager import ModelManager
+from tests.test_model_manager import train
+
+def test_import_does_not_load_heavy_libraries():
+    code = ("import sys; import src.api.main; "
+            "print(sorted(m for m in ('sklearn', 'xgboost', 'scipy') if m in sys.modules))")
+    env = {**os.environ, "MODEL_LAZY_LOADING": "true"}
+    output = subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True)
+    assert output.stdout.strip().splitlines()[-1] == "[]"
+
+def test_lazy_manager_loads_on_first_use(tmp_path):
+    path = str(tmp_path)
+    train(1).save_models(path, version="v1")
+    manager = ModelManager(path, lazy=True)
+    assert not manager.loaded and manager.version is None
+    assert manager.current.version == "v1"
+    assert manager.loaded and not manager.ready
+    manager.prepare()
+    assert manager.ready and manager.status()["ready"]
+
+def test_health_answers_before_ready(tmp_path, monkeypatch):
+    path = str(tmp_path)
+    train(1).save_models(path, version="v1")
+    monkeypatch.setattr(main, "model_manager", ModelManager(path, lazy=True))
+    monkeypatch.setattr(main, "warmup_status", {"state": "pending", "seconds": None, "error": None})
+    monkeypatch.setattr(main, "delinquency_model", None)
+    monkeypatch.setattr(main, "boleto_fraud_model", None)
+
+    client = TestClient(main.app)
+    assert client.get("/health").status_code == 200
+    assert client.get("/ready").status_code == 503  # sem startup, nada aquecido
+    assert client.get("/api/health").json()["model_version"] is None
+
+    with TestClient(main.app) as client:
+        for _ in range(200):
+            response = client.get("/ready")
+            if response.status_code == 200:
+                break
+            time.sleep(0.05)
+        assert response.json()["status"] == "ready"
+        assert response.json()["model_version"] == "v1"
+        assert client.get("/api/health").json()["models_ready"]
+
+def test_ready_without_startup_warmup(tmp_path, monkeypatch):
+    path = str(tmp_path)
+    train(1).save_models(path, version="v1")
+    monkeypatch.setattr(main.settings, "MODEL_WARMUP_ON_STARTUP", False)
+    monkeypatch.setattr(main, "model_manager", ModelManager(path, lazy=True))
+    monkeypatch.setattr(main, "warmup_status", {"state": "pending", "seconds": None, "error": None})
+
+    with TestClient(main.app) as client:
+        assert client.get("/ready").status_code == 503  # nada carregado ainda
+        transaction = {"amount": 150.0, "merchant": "Loja", "timestamp": "2024-01-10T10:00:00", "category": "retail"}
+        assert client.post("/detect/fraud", json=transaction).status_code == 200
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["model_version"] == "v1"
@@ -0,0 +1,38 @@
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect
+from src.api import main
+from src.api.storage import TransactionStore
+
+def make_rows(n):
+    return [
+        {"amount": float(i), "merchant": f"Loja {i % 3}", "timestamp": datetime(2024, 1, 1, i % 24),
+         "category": "retail"}
+        for i in range(n)
+    ]
+
+def test_bulk_insert_in_batches_and_indexes():
+    store = TransactionStore("sqlite://", batch_size=7)
+    assert store.add_many(make_rows(20)) == 20
+    transaction_id = store.add(make_rows(1)[0])
+    assert store.count() == 21
+    assert store.get(transaction_id)["merchant"] == "Loja 0"
+    indexes = {ix["name"] for ix in inspect(store.engine).get_indexes("transactions")}
+    assert {"ix_transactions_timestamp", "ix_transactions_merchant", "ix_transactions_category"} <= indexes
+
+def test_transaction_endpoints_persist(transaction_store):
+    client = TestClient(main.app)
+    payload = {"amount": 99.9, "merchant": "Loja", "timestamp": "2024-01-10T10:00:00", "category": "retail"}
+    created = client.post("/api/transactions", json=payload)
+    assert created.status_code == 200
+    assert transaction_store.get(created.json()["id"])["amount"] == 99.9
+
+    bulk = client.post("/api/transactions/bulk", json={"transactions": [payload] * 1000})
+    assert bulk.json()["inserted"] == 1000
+    assert transaction_store.count() == 1001
+
+def test_bulk_limit(transaction_store, monkeypatch):
+    monkeypatch.setattr(main.settings, "TRANSACTIONS_BULK_MAX", 2)
+    payload = {"amount": 1.0, "merchant": "Loja", "timestamp": "2024-01-10T10:00:00", "category": "retail"}
+    response = TestClient(main.app).post("/api/transactions/bulk", json={"transactions": [payload] * 3})
+    assert response.status_code == 413
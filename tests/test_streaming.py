@@ -0,0 +1,72 @@
+import asyncio
+import json
+from fastapi.testclient import TestClient
+from src.api import main
+from src.api.feature_store import FeatureStore
+from src.api.streaming import score_stream
+
+def tx_line(i, **overrides):
+    payload = {"id": f"t{i}", "amount": 10.0 + i, "merchant": "Loja", "category": "retail",
+               "timestamp": "2024-01-10T10:00:00"}
+    payload.update(overrides)
+    return json.dumps(payload).encode()
+
+def parse(body: bytes):
+    return [json.loads(line) for line in body.splitlines() if line]
+
+def test_results_are_ordered_batched_and_bounded():
+    consumed = []
+    batches = []
+
+    async def chunks():
+        for i in range(200):
+            consumed.append(i)
+            yield tx_line(i) + b"\n"
+
+    async def scorer(transactions):
+        batches.append(len(transactions))
+        return [t["amount"] / 1000 for t in transactions]
+
+    async def scenario():
+        stream = score_stream(chunks(), scorer, max_batch_size=16, max_in_flight=32)
+        first = await stream.__anext__()
+        await asyncio.sleep(0.05)  # consumidor parado: a leitura tem que parar também
+        read_while_paused = len(consumed)
+        rest = [chunk async for chunk in stream]
+        return first, rest, read_while_paused
+
+    first, rest, read_while_paused = asyncio.run(scenario())
+    assert read_while_paused <= 1 + 32 + 16 + 1
+    results = parse(first + b"".join(rest))
+    assert [r["seq"] for r in results] == list(range(200))
+    assert results[5] == {"seq": 5, "id": "t5", "fraud_probability": 1.5, "risk_level": "Low"}
+    assert max(batches) == 16 and sum(batches) == 200
+
+def test_ndjson_stream_reports_invalid_lines_in_order(trained_models, monkeypatch):
+    monkeypatch.setattr(main, "feature_store", FeatureStore())
+    body = b"\n".join([
+        tx_line(0), b"{not json", tx_line(2, amount="10"), b"", tx_line(3, timestamp="ontem"), tx_line(4),
+    ])
+    response = TestClient(main.app).post("/detect/fraud/stream", content=body,
+                                         headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    results = parse(response.content)
+    assert [r["seq"] for r in results] == [0, 1, 2, 3, 4]
+    assert results[1]["error"] == "invalid JSON"
+    assert results[2]["error"] == "amount must be a number"
+    assert results[3]["error"].startswith("timestamp")
+    assert results[4]["id"] == "t4" and 0 <= results[4]["fraud_probability"] <= 100
+    streams = TestClient(main.app).get("/api/inference/metrics").json()["streams"]
+    assert streams["transactions_scored"] >= 2 and streams["active_streams"] == 0
+
+def test_websocket_stream(trained_models, monkeypatch):
+    monkeypatch.setattr(main, "feature_store", FeatureStore())
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws/detect/fraud") as websocket:
+        websocket.send_text((tx_line(0) + b"\n" + tx_line(1)).decode())
+        websocket.send_bytes(tx_line(2))
+        results = []
+        while len(results) < 3:
+            results.extend(parse(websocket.receive_text().encode()))
+    assert [(r["seq"], r["id"]) for r in results] == [(0, "t0"), (1, "t1"), (2, "t2")]
+    assert main.feature_store.updates == 3
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from src.api.ml_models import FinancialMLModels
+from src.models.delinquency_prediction import FEATURES as DELINQUENCY_FEATURES, DelinquencyPredictionModel
+from src.models.fraud_detection import FraudDetectionModel
+from src.models.training import (
+    ChunkSource, train_boleto_fraud_model, train_delinquency_model, train_financial_models,
+)
+from tests.conftest import make_risk_data, make_transactions
+from tests.test_vocabulary import make_labeled_transactions
+
+def test_financial_models_from_csv_chunks(tmp_path):
+    make_transactions(3000).to_csv(tmp_path / "transactions.csv", index=False)
+    clients, labels = make_risk_data(3000)
+    # Ordenado pelo rótulo: a maioria dos blocos tem uma só classe e recebe o exemplo da outra
+    clients.assign(default=labels).sort_values("default").to_csv(tmp_path / "clients.csv", index=False)
+
+    models = train_financial_models(
+        ChunkSource(str(tmp_path / "transactions.csv"), chunk_rows=500),
+        ChunkSource(str(tmp_path / "clients.csv"), chunk_rows=500),
+    )
+    assert len(models.fraud_detector.estimators_) == 100
+    assert len(models.risk_analyzer.estimators_) == 100
+    np.testing.assert_allclose(models.scaler.mean_, models._extract_transaction_features(make_transactions(3000)).mean(axis=0))
+
+    models.save_models(str(tmp_path / "models"))
+    restored = FinancialMLModels()
+    restored.load_models(str(tmp_path / "models"))
+    transactions = make_transactions(10, seed=1).to_dict("records")
+    np.testing.assert_array_equal(restored.detect_fraud_batch(transactions), models.detect_fraud_batch(transactions))
+    assert 0 <= restored.analyze_risk(clients.iloc[0].to_dict())["default_risk"] <= 1
+
+def test_isolation_forest_with_short_final_chunk_matches_in_memory_fit(tmp_path):
+    transactions = make_transactions(10_050)
+    transactions.to_csv(tmp_path / "transactions.csv", index=False)
+    models = train_financial_models(ChunkSource(str(tmp_path / "transactions.csv"), chunk_rows=1000))
+    reference = FinancialMLModels()
+    reference.train_fraud_detector(transactions)
+
+    chunked, in_memory = models.fraud_detector, reference.fraud_detector
+    assert chunked.max_samples_ == in_memory.max_samples_ == 256
+    assert chunked.max_samples == "auto"
+    # Nenhuma árvore cresceu com menos linhas que as demais
+    assert {tree.tree_.n_node_samples[0] for tree in chunked.estimators_} == {256}
+    features = reference.scaler.transform(reference._extract_transaction_features(transactions))
+    chunked_scores, reference_scores = chunked.score_samples(features), in_memory.score_samples(features)
+    assert abs(chunked_scores.mean() - reference_scores.mean()) < 0.01
+    assert abs((chunked.predict(features) == -1).mean() - (in_memory.predict(features) == -1).mean()) < 0.05
+
+def test_chunked_fraud_detector_encodes_strings_and_velocity_features(tmp_path):
+    transactions = make_labeled_transactions(3000)
+    transactions.loc[::97, 'merchant'] = None
+    transactions['merchant_count_1h'] = np.arange(3000) % 7
+    transactions.to_parquet(tmp_path / "transactions.parquet")
+    features = ['amount', 'hour_of_day', 'day_of_week', 'merchant_category', 'merchant_id', 'merchant_count_1h']
+
+    models = train_financial_models(ChunkSource(str(tmp_path / "transactions.parquet"), chunk_rows=400),
+                                    features=features)
+    reference = FinancialMLModels()
+    reference.train_fraud_detector(transactions, features=features)
+
+    assert models.transaction_features == features
+    for column in ('merchant', 'category'):
+        np.testing.assert_array_equal(models.vocabularies[column].hashes, reference.vocabularies[column].hashes)
+    # Mesmas estatísticas do ajuste em memória, inclusive das features codificadas
+    np.testing.assert_allclose(models.scaler.mean_, reference.scaler.mean_)
+    np.testing.assert_allclose(models.scaler.scale_, reference.scaler.scale_)
+
+    models.save_models(str(tmp_path / "models"))
+    restored = FinancialMLModels()
+    restored.load_models(str(tmp_path / "models"))
+    encoded = restored._extract_transaction_features(transactions)
+    assert (encoded[:, features.index('merchant_id')] > 0).sum() == transactions['merchant'].notna().sum()
+    np.testing.assert_array_equal(encoded, reference._extract_transaction_features(transactions))
+
+def test_boleto_model_from_sql(tmp_path):
+    rng = np.random.default_rng(0)
+    boletos = pd.DataFrame({
+        'valor_boleto': rng.lognormal(6, 1, 2000),
+        'tempo_cliente': rng.integers(0, 120, 2000),
+        'frequencia_pagamentos': rng.uniform(0, 30, 2000),
+        'valor_medio_transacoes': rng.lognormal(5, 1, 2000),
+    })
+    boletos['fraude'] = (boletos['valor_boleto'] > boletos['valor_boleto'].quantile(0.8)).astype(int)
+    url = f"sqlite:///{tmp_path / 'boletos.db'}"
+    boletos.to_sql("boletos", create_engine(url), index=False)
+
+    model = train_boleto_fraud_model(ChunkSource(url, chunk_rows=300, table="boletos"), label_column="fraude")
+    scores = model.score(boletos)
+    assert scores['is_anomaly'].mean() > 0
+    assert scores['fraud_probability'][boletos['fraude'] == 1].mean() > 0.5
+
+    model.save_model(str(tmp_path / "boleto"))
+    restored = FraudDetectionModel()
+    restored.load_model(str(tmp_path / "boleto"))
+    np.testing.assert_array_equal(restored.score(boletos)['fraud_score'], scores['fraud_score'])
+
+def test_delinquency_model_with_external_memory(tmp_path):
+    rng = np.random.default_rng(0)
+    contracts = pd.DataFrame(rng.normal(size=(5000, 8)), columns=DELINQUENCY_FEATURES)
+    contracts['inadimplente'] = (contracts['historico_pagamentos'] + rng.normal(0, 0.5, 5000) < 0).astype(int)
+    contracts.to_parquet(tmp_path / "contracts.parquet")
+
+    model = train_delinquency_model(ChunkSource(str(tmp_path / "contracts.parquet"), chunk_rows=1000))
+    probabilities = model.predict_batch(contracts)
+    assert probabilities[contracts['inadimplente'] == 1].mean() > 0.7
+    assert probabilities[contracts['inadimplente'] == 0].mean() < 0.3
+
+    model.save_model(str(tmp_path / "delinquency"))
+    restored = DelinquencyPredictionModel()
+    restored.load_model(str(tmp_path / "delinquency"))
+    np.testing.assert_array_equal(restored.predict_batch(contracts), probabilities)
@@ -0,0 +1,55 @@
+import pickle
+import numpy as np
+import pandas as pd
+from src.api.ml_models import FinancialMLModels
+from src.api.vocabulary import UNKNOWN_ID, Vocabulary
+
+def make_labeled_transactions(n_rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'amount': rng.lognormal(5, 1, n_rows),
+        'hour_of_day': rng.integers(0, 24, n_rows),
+        'day_of_week': rng.integers(0, 7, n_rows),
+        'merchant': [f"loja-{i}" for i in rng.integers(0, 50, n_rows)],
+        'category': rng.choice(["retail", "services", "travel", "games"], n_rows),
+    })
+
+def test_encode_known_unknown_and_null():
+    vocabulary = Vocabulary.build(["a", "b", "a", None, "c"])
+    assert len(vocabulary) == 3 and vocabulary.size == 4 and vocabulary.nbytes == 24
+    ids = vocabulary.encode(pd.Series(["a", "b", "c", "zz", None]))
+    assert ids.dtype == np.int32
+    assert sorted(ids[:3]) == [1, 2, 3]
+    assert list(ids[3:]) == [UNKNOWN_ID, UNKNOWN_ID]
+    assert [vocabulary.encode_one(v) for v in ["a", "b", "c", "zz", None]] == list(ids)
+
+    rare = Vocabulary.build(["a", "a", "b"], min_count=2)
+    assert len(rare) == 1 and rare.encode_one("b") == UNKNOWN_ID
+
+    restored = pickle.loads(pickle.dumps(vocabulary))
+    np.testing.assert_array_equal(restored.encode(["c", "a", "x"]), vocabulary.encode(["c", "a", "x"]))
+
+def test_string_columns_are_encoded_and_persisted(tmp_path):
+    data = make_labeled_transactions(400)
+    features = ['amount', 'hour_of_day', 'day_of_week', 'merchant_category', 'merchant_id']
+    models = FinancialMLModels()
+    models.train_fraud_detector(data, features=features)
+    assert set(models.vocabularies) == {'merchant', 'category'}
+    models.save_models(str(tmp_path), version="v1")
+
+    loaded = FinancialMLModels()
+    loaded.load_models(str(tmp_path))
+    assert len(loaded.vocabularies['merchant']) == data['merchant'].nunique()
+
+    records = make_labeled_transactions(20, seed=3).to_dict("records")
+    records[0]['merchant'] = "loja-nova"  # fora do vocabulário
+    records[1]['merchant_category'] = 5  # feature numérica informada tem prioridade
+    batch = loaded.detect_fraud_batch(records)
+    np.testing.assert_allclose(batch, [loaded.detect_fraud(record) for record in records])
+    np.testing.assert_allclose(batch, models.detect_fraud_batch(records))
+
+    encoded = loaded._extract_transaction_features_batch(records)
+    assert encoded[0, features.index('merchant_id')] == UNKNOWN_ID
+    assert encoded[1, features.index('merchant_category')] == 5
+    frame = loaded._extract_transaction_features(pd.DataFrame(records[2:]))
+    np.testing.assert_array_equal(frame, encoded[2:])